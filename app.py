@@ -1,15 +1,30 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request, render_template, stream_with_context
 from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
+import sqlite3
 from dotenv import load_dotenv
 
-from backend.app.services.database import get_db_connection
-from backend.app.models.hotspot_model import HotspotModel
-import pandas as pd
+from backend.app.services.database import get_db_connection, ensure_indexes, ensure_spatial_index, bump_data_version, init_app as init_db_app
+from backend.app.services import crime_query, json_encoder
+from backend.app.services.rollups import apply_inserted, ensure_rollups
+from backend.app.services.analytics import crime_summary
+from backend.app.services.column_store import crime_store, fetch_row
+from backend.app.services.cache import cached_response
+from backend.app.services import metrics as metrics_service
+from backend.app.services.metrics import metrics
+from backend.app.services.writer import WriteTimeout, write_queue
+from backend.app.services.news_feed import news_feed
+from backend.app.models.hotspot_registry import hotspot_registry, grid_registry
+from backend.app.models import grid_hotspot_model
+from backend.app.models.risk_model import risk_registry, AREA_CENTERS
+from backend.app.models import cluster_pyramid
+from backend.app.models.cluster_pyramid import cluster_registry
+from backend.app.models import forecast_model
+from backend.app.models.forecast_model import forecast_registry
+from backend.app.models import emergence
+from backend.app.models.emergence import emergence_registry
 import random
-import math
-import numpy as np
 
 # --- CUSTOM JSON PROVIDER TO HANDLE NAN ---
 import simplejson
@@ -18,6 +33,11 @@ class SimpleJsonProvider(DefaultJSONProvider):
     def dumps(self, obj, **kwargs):
         return simplejson.dumps(obj, **kwargs, ignore_nan=True)
 
+    def response(self, *args, **kwargs):
+        # jsonify() goes through here; timed as the serialization step
+        with metrics.timer('serialize'):
+            return super().response(*args, **kwargs)
+
     def loads(self, s, **kwargs):
         return simplejson.loads(s, **kwargs)
 
@@ -30,6 +50,20 @@ app.json = SimpleJsonProvider(app)
 
 CORS(app)
 
+# Per-route latency and response size, plus /api/metrics
+metrics_service.init_app(app)
+
+# Hand each request's pooled connection back when the request ends
+init_db_app(app)
+
+# Make sure databases created before the crime indexes, rollups and spatial index existed get them
+ensure_indexes()
+ensure_rollups()
+ensure_spatial_index()
+
+# Analytics and model fits read the crimes from memory; load them once up front
+crime_store.preload()
+
 # Default configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'crime-pattern-dev-key')
 
@@ -68,24 +102,19 @@ def api_register():
     if not all([full_name, email, password, role]):
         return jsonify({"status": "error", "message": "Missing required fields"}), 400
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
-    try:
-        cursor = connection.cursor()
-        cursor.execute(
+    def insert_user(connection):
+        connection.execute(
             "INSERT INTO users (full_name, email, password, role, phone, station, badge_number) VALUES (?, ?, ?, ?, ?, ?, ?)",
             (full_name, email, password, role, phone, station, badge_number)
         )
-        connection.commit()
+
+    try:
+        write_queue.run(insert_user)
         return jsonify({"status": "success", "message": "User registered successfully"}), 201
     except sqlite3.IntegrityError:
         return jsonify({"status": "error", "message": "Email already exists"}), 409
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        connection.close()
 
 @app.route('/api/auth/login', methods=['POST'])
 def api_login():
@@ -133,11 +162,7 @@ def update_password():
     if not (user_id or email) or not current_password or not new_password:
         return jsonify({"status": "error", "message": "Missing fields"}), 400
         
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-        
-    try:
+    def change_password(connection):
         cursor = connection.cursor()
         
         # Verify current password
@@ -147,30 +172,33 @@ def update_password():
              cursor.execute("SELECT user_id FROM users WHERE email = ? AND password = ?", (email, current_password))
 
         user = cursor.fetchone()
-        
         if not user:
-            return jsonify({"status": "error", "message": "Invalid current password"}), 401
+            return False
             
         # Update password
         cursor.execute("UPDATE users SET password = ? WHERE user_id = ?", (new_password, user['user_id']))
-        connection.commit()
+        return True
+
+    try:
+        if not write_queue.run(change_password):
+            return jsonify({"status": "error", "message": "Invalid current password"}), 401
         
         return jsonify({"status": "success", "message": "Password updated successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        connection.close()
 
 
 @app.route('/api/crimes/submit', methods=['POST'])
 def submit_crime():
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-    
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Expected a JSON object"}), 400
+    try:
+        crime_type, description, occurred, lat, lng, location = crime_query.parse_submission(data)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
     try:
-        cursor = connection.cursor()
         query = """
         INSERT INTO crimes 
         (crime_id, crime_type, description, occurrence_date, latitude, longitude, location_description, arrested)
@@ -178,17 +206,27 @@ def submit_crime():
         """
         crime_id = f"C{random.randint(200000, 999999)}"
         values = (
-            crime_id, data['type'], data['description'], 
-            data['date'], data['lat'], data['lng'],
-            data['location'], 0
+            crime_id, crime_type, description,
+            occurred, lat, lng,
+            location, 0
         )
-        cursor.execute(query, values)
-        connection.commit()
+
+        def insert_crime(connection):
+            cursor = connection.execute(query, values)
+            apply_inserted(connection, cursor.lastrowid - 1)
+            return fetch_row(connection, cursor.lastrowid)
+
+        # Queued behind other writes and committed in the writer's batch
+        row = write_queue.run(insert_crime)
+        version = bump_data_version()
+        crime_store.record(row, version)
+        emergence_registry.record(lat, lng, occurred, version)
         return jsonify({"status": "success", "crime_id": crime_id}), 201
+    except WriteTimeout as e:
+        # Cancelled before it ran, so the client can safely retry
+        return jsonify({"status": "error", "message": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        connection.close()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -199,52 +237,227 @@ def version_check():
     return "VERIFIED_FIX_V2", 200
 
 
-def clean_nans(data):
-    if isinstance(data, float):
-        if math.isnan(data) or np.isnan(data):
-            return None
-    elif isinstance(data, dict):
-        return {k: clean_nans(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [clean_nans(v) for v in data]
-    return data
-
 @app.route('/api/crimes', methods=['GET'])
+@cached_response
 def get_crimes():
+    if any(arg in request.args for arg in crime_query.PAGE_ARGS):
+        return get_crimes_page()
+
     connection = get_db_connection()
     if not connection:
         return jsonify({"error": "Database connection failed"}), 500
     
     try:
         query = "SELECT * FROM crimes ORDER BY occurrence_date DESC"
-        df = pd.read_sql(query, connection)
-        
-        # Convert to dict
-        crimes_raw = df.to_dict(orient='records')
-        
-        # Explicitly clean NaNs before jsonify
-        crimes = clean_nans(crimes_raw)
-        
-        return jsonify({"crimes": crimes, "count": len(crimes)}), 200
+        with metrics.timer('sql', op='crimes_all'):
+            cursor = connection.execute(query)
+            rows = cursor.fetchall()
+
+        # Encoded column-wise straight from the rows; NULLs stay null and
+        # NaN is written as null on the way, so there is no cleaning pass
+        with metrics.timer('serialize'):
+            crimes = json_encoder.encode_rows([column[0] for column in cursor.description], rows)
+            body = json_encoder.dumps({"crimes": crimes, "count": crimes.rows})
+        return Response(body, status=200, mimetype='application/json')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        connection.close()
+
+def get_crimes_page():
+    try:
+        fields = crime_query.parse_fields(request.args.get('fields'))
+        filters = crime_query.parse_filters(request.args)
+        limit = crime_query.parse_limit(request.args.get('limit'))
+        cursor = request.args.get('cursor') or None
+        if cursor:
+            crime_query.decode_cursor(cursor)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({"error": "Database connection failed"}), 500
+
+    try:
+        crimes, next_cursor = crime_query.fetch_crimes_page(connection, fields, filters, cursor, limit)
+        return jsonify({"crimes": crimes, "count": len(crimes), "limit": limit, "next_cursor": next_cursor}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        connection.close()
+
+@app.route('/api/crimes/near', methods=['GET'])
+@cached_response
+def get_crimes_near():
+    try:
+        lat, lng, radius_km = crime_query.parse_point(request.args)
+        fields = crime_query.parse_fields(request.args.get('fields'))
+        filters = crime_query.parse_filters(request.args)
+        limit = crime_query.parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({"error": "Database connection failed"}), 500
+
+    try:
+        crimes = crime_query.fetch_crimes_near(connection, lat, lng, radius_km, fields, filters, limit)
+        return jsonify({"crimes": crimes, "count": len(crimes), "radius_km": radius_km}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         connection.close()
 
+@app.route('/api/crimes/bbox', methods=['GET'])
+@cached_response
+def get_crimes_bbox():
+    if not request.args.get('bbox'):
+        return jsonify({"status": "error", "message": "bbox=min_lng,min_lat,max_lng,max_lat is required"}), 400
+    try:
+        fields = crime_query.parse_fields(request.args.get('fields'))
+        filters = crime_query.parse_filters(request.args)
+        limit = crime_query.parse_limit(request.args.get('limit') or str(crime_query.MAX_PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({"error": "Database connection failed"}), 500
+
+    try:
+        crimes, truncated = crime_query.fetch_crimes_bbox(connection, filters['bbox'], fields, filters, limit)
+        return jsonify({"crimes": crimes, "count": len(crimes), "truncated": truncated}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        connection.close()
+
+# Highest zoom served without a bbox; at zoom 5 the whole world is 128 x 128 cells
+MAP_UNBOUNDED_MAX_ZOOM = 5
+
+@app.route('/api/map/clusters', methods=['GET'])
+def get_map_clusters():
+    try:
+        zoom = int(request.args.get('zoom', ''))
+    except ValueError:
+        return jsonify({"status": "error", "message": "zoom must be an integer"}), 400
+    if not 0 <= zoom <= cluster_pyramid.MAX_ZOOM:
+        return jsonify({"status": "error", "message": f"zoom must be between 0 and {cluster_pyramid.MAX_ZOOM}"}), 400
+    # Past this zoom the whole world is too many cells to send; the map passes its viewport
+    if 'bbox' not in request.args and zoom > MAP_UNBOUNDED_MAX_ZOOM:
+        return jsonify({"status": "error", "message": f"bbox is required above zoom {MAP_UNBOUNDED_MAX_ZOOM}"}), 400
+    try:
+        bbox = crime_query.parse_bbox(request.args.get('bbox', '-180,-85,180,85'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    try:
+        pyramid = cluster_registry.get_pyramid()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    try:
+        level, clusters = pyramid.clusters(zoom, bbox)
+    except ValueError as e:
+        # The bbox spans more cells than one response may carry
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"zoom": zoom, "level": level, "clusters": clusters, "count": len(clusters)}), 200
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+@app.route('/api/crimes/export', methods=['GET'])
+def export_crimes():
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"status": "error", "message": "format must be 'ndjson' or 'json'"}), 400
+    try:
+        fields = crime_query.parse_fields(request.args.get('fields'))
+        filters = crime_query.parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({"error": "Database connection failed"}), 500
+
+    def generate():
+        # Rows are serialized batch by batch as they leave the cursor, so peak
+        # memory is bounded by EXPORT_BATCH_SIZE rather than the table size.
+        try:
+            first = True
+            if export_format == 'json':
+                yield '['
+            for batch in crime_query.iter_crime_batches(connection, fields, filters):
+                encoded = [simplejson.dumps(row, ignore_nan=True) for row in batch]
+                if export_format == 'ndjson':
+                    yield '\n'.join(encoded) + '\n'
+                else:
+                    yield ('' if first else ',') + ','.join(encoded)
+                first = False
+            if export_format == 'json':
+                yield ']'
+        finally:
+            connection.close()
+
+    # stream_with_context keeps the request (and its pooled connection) alive until the last chunk
+    return Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[export_format])
+
+MAX_GRID_HOTSPOTS = 100
+
+def hotspots_stamp():
+    return grid_registry.stamp if request.args.get('engine') == 'grid' else hotspot_registry.stamp
+
 @app.route('/api/hotspots', methods=['GET'])
+@cached_response(stamp=hotspots_stamp)
 def get_hotspots():
-    model = HotspotModel(n_clusters=10)
-    centers = model.get_hotspots()
-    if centers is not None:
-        hotspots = []
-        for c in centers:
-             lat = float(c[0])
-             lng = float(c[1])
-             if not (math.isnan(lat) or math.isnan(lng)):
-                 hotspots.append({"lat": lat, "lng": lng})
+    engine = request.args.get('engine', 'kmeans')
+    if engine == 'grid':
+        return get_grid_hotspots()
+    if engine != 'kmeans':
+        return jsonify({"status": "error", "message": "engine must be 'kmeans' or 'grid'"}), 400
+
+    hotspots = hotspot_registry.get_hotspots()
+    if hotspots is not None:
         return jsonify({"hotspots": hotspots}), 200
     return jsonify({"error": "Could not generate hotspots"}), 500
 
+@app.route('/api/hotspots/emerging', methods=['GET'])
+def get_emerging_hotspots():
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit must be an integer"}), 400
+    try:
+        emerging = emergence_registry.get_detector().emerging(limit=max(1, min(limit, 100)))
+        return jsonify({
+            "emerging": emerging,
+            "recent_days": emergence.RECENT_DAYS,
+            "baseline_days": emergence.BASELINE_DAYS,
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def get_grid_hotspots():
+    try:
+        top_n = int(request.args.get('top', 10))
+        cell_size = float(request.args.get('cell', grid_hotspot_model.DEFAULT_CELL_SIZE))
+    except ValueError:
+        return jsonify({"status": "error", "message": "top must be an integer and cell a number"}), 400
+    if not 1 <= top_n <= MAX_GRID_HOTSPOTS:
+        return jsonify({"status": "error", "message": f"top must be between 1 and {MAX_GRID_HOTSPOTS}"}), 400
+    if not grid_hotspot_model.MIN_CELL_SIZE <= cell_size <= grid_hotspot_model.MAX_CELL_SIZE:
+        return jsonify({"status": "error", "message": f"cell must be between {grid_hotspot_model.MIN_CELL_SIZE} and {grid_hotspot_model.MAX_CELL_SIZE} degrees"}), 400
+
+    try:
+        hotspots = grid_registry.get_hotspots(top_n, cell_size)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"hotspots": hotspots, "engine": "grid", "cell_size": cell_size}), 200
+
 @app.route('/api/admin/users', methods=['GET'])
 def get_users():
     connection = get_db_connection()
@@ -262,18 +475,11 @@ def get_users():
 
 @app.route('/api/admin/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     try:
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        connection.commit()
+        write_queue.run(lambda connection: connection.execute("DELETE FROM users WHERE id = ?", (user_id,)))
         return jsonify({"status": "success"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        connection.close()
 
 @app.route('/api/admin/db-reset', methods=['POST'])
 def reset_database():
@@ -300,40 +506,42 @@ def reset_database():
         # 3. Seed Crimes
         sample_data = generate_sample_data(200)
         insert_to_mysql(sample_data)
+        bump_data_version()
         
         return jsonify({"status": "success", "message": "Database reset and re-seeded with Users & 200 Crimes."}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/analytics/summary', methods=['GET'])
+@cached_response
+def analytics_summary():
+    # Dashboard counters and charts, without shipping the crimes table
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({"error": "Database connection failed"}), 500
+    try:
+        return jsonify(crime_summary(connection, top_locations=5)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        connection.close()
+
 @app.route('/api/admin/analysis', methods=['GET'])
+@cached_response
 def admin_analysis():
     connection = get_db_connection()
     if not connection:
         return jsonify({"error": "Database connection failed"}), 500
     try:
-        # 1. Get total crime count & open cases
-        cursor = connection.cursor()
-        cursor.execute("SELECT COUNT(*) FROM crimes")
-        total_crimes = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM crimes WHERE arrested = 0")
-        open_cases = cursor.fetchone()[0]
-
-        # 2. Identify Hotspot (Most frequent location description in last 50 recs)
-        # We use a simple frequency check on 'location_description' or 'crime_type'
-        query = """
-            SELECT location_description, COUNT(*) as count 
-            FROM crimes 
-            GROUP BY location_description 
-            ORDER BY count DESC 
-            LIMIT 1
-        """
-        cursor.execute(query)
-        hotspot_row = cursor.fetchone()
+        # 1. Totals, open cases and the busiest location in one read
+        summary = crime_summary(connection, top_locations=1)
+        total_crimes = summary['total_crimes']
+        open_cases = summary['open_cases']
+        hotspot_row = summary['top_locations'][0] if summary['top_locations'] else None
         
         if hotspot_row:
-            location = hotspot_row[0]
-            count = hotspot_row[1]
+            location = hotspot_row['area']
+            count = hotspot_row['count']
             analysis_text = f"Hotspot detected near {location} with {count} reported cases."
             analysis_type = "Critical" if count > 5 else "Moderate"
         else:
@@ -355,44 +563,17 @@ def admin_analysis():
         connection.close()
 
 @app.route('/api/admin/detailed-analysis', methods=['GET'])
+@cached_response(stamp=lambda: emergence_registry.stamp)
 def admin_detailed_analysis():
     connection = get_db_connection()
     if not connection:
         return jsonify({"error": "Database connection failed"}), 500
     try:
-        cursor = connection.cursor()
-        
-        # 1. High Priority Hotspots (Top 5 Areas by Crime Count)
-        cursor.execute("SELECT location_description, COUNT(*) as count FROM crimes GROUP BY location_description ORDER BY count DESC LIMIT 5")
-        hotspots = [{"area": row[0], "count": row[1]} for row in cursor.fetchall()]
-
-        # 2. Crime Type Distribution
-        cursor.execute("SELECT crime_type, COUNT(*) as count FROM crimes GROUP BY crime_type")
-        type_data = [{"type": row[0], "count": row[1]} for row in cursor.fetchall()]
-        total_crimes = sum(item['count'] for item in type_data)
-        type_distribution = []
-        if total_crimes > 0:
-            type_distribution = [{"type": item['type'], "percentage": round((item['count'] / total_crimes) * 100)} for item in type_data]
-            type_distribution.sort(key=lambda x: x['percentage'], reverse=True)
-
-        # 3. Time Patterns
-        cursor.execute("SELECT strftime('%H', occurrence_date), COUNT(*) FROM crimes GROUP BY strftime('%H', occurrence_date)")
-        time_raw = cursor.fetchall()
-        
-        time_counts = {'Morning (4AM-12PM)': 0, 'Afternoon (12PM-6PM)': 0, 'Evening (6PM-11PM)': 0, 'Night (11PM-4AM)': 0}
-        for hour_str, count in time_raw:
-            if hour_str:
-                h = int(hour_str)
-                if 4 <= h < 12: time_counts['Morning (4AM-12PM)'] += count
-                elif 12 <= h < 18: time_counts['Afternoon (12PM-6PM)'] += count
-                elif 18 <= h < 23: time_counts['Evening (6PM-11PM)'] += count
-                else: time_counts['Night (11PM-4AM)'] += count
-        
-        time_patterns = []
-        if total_crimes > 0:
-            for k, v in time_counts.items():
-                time_patterns.append({"time": k, "percentage": round((v / total_crimes) * 100)})
-            time_patterns.sort(key=lambda x: x['percentage'], reverse=True)
+        # 1-3. Hotspots, type distribution and time patterns in one read
+        summary = crime_summary(connection, top_locations=5)
+        hotspots = summary['top_locations']
+        type_distribution = summary['type_distribution']
+        time_patterns = summary['time_patterns']
 
         # 4. AI Insights
         insights = []
@@ -414,19 +595,32 @@ def admin_detailed_analysis():
                 "text": f"Crime reporting peaks during {peak['time'].split('(')[0].lower()} ({peak['percentage']}%)."
             })
 
-        if hotspots:
-            top = hotspots[0]
+        # 5. Cells with a significant rise in the last week over their own baseline
+        emerging = emergence_registry.get_detector().emerging(limit=5)
+        if emerging:
+            top = emerging[0]
+            place = top['area'] or f"{top['lat']}, {top['lng']}"
             insights.append({
                 "title": "Emerging Hotspot",
                 "icon": "fa-map-marker-alt",
                 "color_class": "text-red-500",
-                "text": f"{top['area']} shows high incident frequency ({top['count']} cases)."
+                "text": f"{place}: {top['recent_count']} incidents in the last {emergence.RECENT_DAYS} days, "
+                        f"{top['ratio']}x the {top['expected']} expected from the prior {emergence.BASELINE_DAYS}."
+            })
+        elif hotspots:
+            top = hotspots[0]
+            insights.append({
+                "title": "Established Hotspot",
+                "icon": "fa-map-marker-alt",
+                "color_class": "text-red-500",
+                "text": f"{top['area']} shows high incident frequency ({top['count']} cases); no significant new increase this week."
             })
 
         return jsonify({
             "hotspots": hotspots,
             "type_distribution": type_distribution,
             "time_patterns": time_patterns,
+            "emerging": emerging,
             "insights": insights
         }), 200
 
@@ -435,76 +629,155 @@ def admin_detailed_analysis():
     finally:
         connection.close()
 
-@app.route('/api/predict/safety', methods=['GET'])
-def predict_safety():
-    area = request.args.get('area', 'General').strip().title()
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
+@app.route('/api/forecast', methods=['GET'])
+@cached_response(stamp=lambda: forecast_registry.stamp)
+def get_forecast():
+    freq = request.args.get('freq', 'D').upper()
+    if freq not in forecast_model.FREQUENCIES:
+        return jsonify({"status": "error", "message": "freq must be 'D' (daily) or 'H' (hourly)"}), 400
+    spec = forecast_model.FREQUENCIES[freq]
     try:
-        # 1. Fetch Real-Time Data from Google News RSS
-        import requests
-        import xml.etree.ElementTree as ET
-        
-        rss_url = f"https://news.google.com/rss/search?q={area}+crime+india&hl=en-IN&gl=IN&ceid=IN:en"
-        news_count = 0
-        sentiment_score = 0
-        
-        try:
-            response = requests.get(rss_url, timeout=5)
-            if response.status_code == 200:
-                root = ET.fromstring(response.text)
-                items = root.findall('.//item')
-                news_count = len(items)
-                
-                # Analyze titles for high-risk keywords
-                high_risk_keywords = ['murder', 'arrest', 'killed', 'theft', 'robbery', 'scam', 'fraud', 'rape', 'death']
-                for item in items[:15]:  # Analyze top 15 news items
-                    title = item.find('title').text.lower()
-                    if any(word in title for word in high_risk_keywords):
-                        sentiment_score += 1
-        except Exception as e:
-            print(f"Internet fetching error: {e}")
-            news_count = 5 # Fallback if no internet
-
-        # 2. Simulation Seed + Live Data Integration
-        import hashlib
-        area_seed = int(hashlib.md5(area.encode()).hexdigest(), 16) % 100
-        
-        # Calculate score based on live news frequency and keywords
-        # 10 is perfect safety. More news/keywords = lower score.
-        base_score = 9.5
+        horizon = int(request.args.get('horizon', spec['season']))
+    except ValueError:
+        return jsonify({"status": "error", "message": "horizon must be an integer"}), 400
+    if not 1 <= horizon <= spec['max_horizon']:
+        return jsonify({"status": "error", "message": f"horizon must be between 1 and {spec['max_horizon']}"}), 400
+    area = request.args.get('area', forecast_model.ALL).strip().upper() or forecast_model.ALL
+    crime_type = request.args.get('type', forecast_model.ALL).strip().upper() or forecast_model.ALL
+
+    try:
+        result = forecast_registry.get_model(freq).forecast(area, crime_type, horizon)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if result is None:
+        return jsonify({"status": "error", "message": f"No forecast for area '{area}' and type '{crime_type}' (too few incidents)"}), 404
+    return jsonify(result), 200
+
+# Weight of the local crime-density score when live news is also available
+LOCAL_RISK_WEIGHT = 0.7
+
+def local_risk(area=None, lat=None, lng=None):
+    """Crime-density risk for a point, or for a known area's centre; None if neither applies."""
+    if lat is None:
+        center = AREA_CENTERS.get(area)
+        if center is None:
+            return None
+        lat, lng = center
+    return risk_registry.get_model().score(lat, lng)
+
+def safety_report(area, feed=None, stale=False, local=None):
+    # 10 is perfect safety. Dense recent crime nearby, heavy news coverage
+    # and high-risk keywords all lower the score.
+    parts = []
+    if local is not None:
+        local_score = 9.9 - 8.4 * local['risk']
+        if local['weighted_incidents'] > 0:
+            parts.append(f"{local['weighted_incidents']} recency-weighted incidents nearby "
+                         f"(denser than {round(local['density_percentile'] * 100)}% of mapped areas).")
+        else:
+            parts.append("No recent recorded incidents nearby.")
+
+    news_count = sentiment_score = 0
+    has_news = feed is not None and not (feed.get('fallback') and local is not None)
+    if has_news:
+        news_count = feed['news_count']
+        sentiment_score = feed['sentiment_score']
         news_penalty = (news_count * 0.1) # Frequency penalty
         keyword_penalty = (sentiment_score * 0.3) # Severity penalty
-        
-        # Add a tiny bit of city-specific baseline (hidden constant)
-        city_baseline = 0
-        if area in ['Delhi', 'Mumbai']: city_baseline = -1.5
-        elif area in ['Bangalore', 'Pune']: city_baseline = -0.5
-
-        score = round(max(1.5, min(9.9, base_score - news_penalty - keyword_penalty + city_baseline)), 1)
-        
-        label = "Safe Zone"
+        news_score = 9.5 - news_penalty - keyword_penalty
+        parts.append(f"Analyzed {news_count} recent reports for {area}. Sentiment weighted: {sentiment_score}.")
+
+    if local is not None and has_news:
+        raw_score = LOCAL_RISK_WEIGHT * local_score + (1 - LOCAL_RISK_WEIGHT) * news_score
+    elif local is not None:
+        raw_score = local_score
+    else:
+        raw_score = news_score
+    score = round(max(1.5, min(9.9, raw_score)), 1)
+
+    if local is not None:
+        if score < 4.5: label = "High Alert - Dense Recent Crime"
+        elif score < 7.5: label = "Moderate Risk - Recent Incidents Nearby"
+        else: label = "Safe Zone - Low Crime Density"
+    else:
         if score < 4.5: label = "High Alert - Heavy News Activity"
         elif score < 7.5: label = "Moderate Risk - Recent Incidents Reported"
         else: label = "Safe Zone - Low News Density"
-        
-        return jsonify({
-            "area": area,
-            "score": score,
-            "label": label,
-            "incidents_analyzed": news_count,
-            "source": "Live Google News (Real-time)",
-            "summary": f"Analyzed {news_count} recent reports for {area}. Sentiment weighted: {sentiment_score}."
-        }), 200
+
+    sources = []
+    if local is not None:
+        sources.append("Local crime records")
+    if has_news:
+        sources.append("Offline estimate" if feed.get('fallback') else news_feed.source.label)
+
+    return {
+        "area": area,
+        "score": score,
+        "label": label,
+        "incidents_analyzed": news_count,
+        "local_risk": local,
+        "source": " + ".join(sources),
+        "stale": stale,
+        "summary": " ".join(parts)
+    }
+
+@app.route('/api/predict/safety', methods=['GET'])
+def predict_safety():
+    area = request.args.get('area', '').strip().title()
+    lat = lng = None
+    if 'lat' in request.args or 'lng' in request.args:
+        try:
+            lat = float(request.args['lat'])
+            lng = float(request.args['lng'])
+        except (KeyError, ValueError):
+            return jsonify({"status": "error", "message": "lat and lng must both be numbers"}), 400
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return jsonify({"status": "error", "message": "lat/lng out of range"}), 400
+    elif not area:
+        area = 'General'
+
+    try:
+        local = local_risk(area, lat, lng)
+        feed, stale = None, False
+        if area:
+            # Served from the background news cache; only a never-seen area waits for a fetch
+            feed, stale = news_feed.get(area)
+        return jsonify(safety_report(area or f"{lat},{lng}", feed, stale, local)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+MAX_SAFETY_BATCH = 100
+
+@app.route('/api/predict/safety/batch', methods=['POST'])
+def predict_safety_batch():
+    data = request.get_json(silent=True)
+    areas = data.get('areas') if isinstance(data, dict) else data
+    if not isinstance(areas, list) or not areas or not all(isinstance(a, str) for a in areas):
+        return jsonify({"status": "error", "message": "Expected a JSON list of area names under 'areas'"}), 400
+    if len(areas) > MAX_SAFETY_BATCH:
+        return jsonify({"status": "error", "message": f"At most {MAX_SAFETY_BATCH} areas per batch"}), 400
+
+    try:
+        # 1. Normalize and de-duplicate, keeping the caller's order
+        areas = list(dict.fromkeys(a.strip().title() for a in areas if a.strip()))
+
+        # 2. Fetch every uncached area at once on the news pool, sharing one wait
+        news_feed.prefetch(areas)
+
+        # 3. Score from the cache; areas still fetching get the offline estimate
+        results = []
+        for area in areas:
+            feed, stale = news_feed.get(area, wait=0)
+            results.append(safety_report(area, feed, stale, local_risk(area)))
+        return jsonify({"results": results}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        connection.close()
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     print("\n" + "="*50)
     print("SERVER STARTED SUCCESSFULLY - PLEASE RELOAD DASHBOARD")
     print("="*50 + "\n")
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Development server only; serve production traffic with gunicorn (see gunicorn.conf.py)
+    debug = os.getenv('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes')
+    app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,119 @@
+"""
+Multi-resolution grid of crime counts for the dashboard map.
+
+Level L splits the Web Mercator square into 2^L x 2^L cells, the same
+addressing as slippy-map tiles at zoom L. The finest level is built from
+the points with one np.unique; every coarser level merges the one below it
+(x >> 1, y >> 1), so the whole pyramid costs about one sort of the data.
+
+A map at zoom z is served from level z + CELL_LEVEL_OFFSET, i.e. cells of
+256 / 2^offset screen pixels, so a viewport returns at most a few hundred
+clusters however many crimes it covers. A request whose bbox spans more than
+MAX_VIEW_CELLS cells at its level is refused rather than answered with every
+non-empty cell in it.
+"""
+import math
+import os
+
+import numpy as np
+
+from backend.app.models.hotspot_registry import RefreshingRegistry
+from backend.app.services.column_store import crime_store
+from backend.app.services.metrics import metrics
+
+MAX_LEVEL = int(os.getenv('MAP_CLUSTER_MAX_LEVEL', 16))
+# 2 -> 4x4 cells per 256 px tile, i.e. 64 px clusters
+CELL_LEVEL_OFFSET = 2
+MAX_ZOOM = 22
+MAX_MERCATOR_LAT = 85.05112878
+# Cells a bbox may span at its level: 128 x 128, the whole world at zoom 5
+MAX_VIEW_CELLS = int(os.getenv('MAP_CLUSTER_MAX_VIEW_CELLS', 128 * 128))
+CLUSTER_CHECK_INTERVAL = float(os.getenv('MAP_CLUSTER_CHECK_INTERVAL', 300))
+# Least time between rebuilds prompted by local writes
+CLUSTER_MIN_REFIT_INTERVAL = float(os.getenv('MAP_CLUSTER_MIN_REFIT_INTERVAL', CLUSTER_CHECK_INTERVAL))
+
+
+def mercator_xy(lat, lng, level):
+    """Fractional cell coordinates of points at a pyramid level."""
+    scale = 2 ** level
+    lat = np.radians(np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (np.asarray(lng, dtype=float) + 180) / 360 * scale
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / math.pi) / 2 * scale
+    return np.clip(x, 0, scale - 1e-9), np.clip(y, 0, scale - 1e-9)
+
+
+class ClusterPyramid:
+    def __init__(self, max_level=MAX_LEVEL):
+        self.max_level = max_level
+        # level -> (sorted keys x * 2^level + y, counts, mean lat, mean lng)
+        self.levels = {}
+
+    def fit(self, lat, lng):
+        x, y = mercator_xy(lat, lng, self.max_level)
+        keys = x.astype(np.int64) * 2 ** self.max_level + y.astype(np.int64)
+        keys, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+        sum_lat = np.bincount(inverse, weights=lat, minlength=len(keys))
+        sum_lng = np.bincount(inverse, weights=lng, minlength=len(keys))
+
+        for level in range(self.max_level, -1, -1):
+            self.levels[level] = (keys, counts, (sum_lat / counts).astype(np.float32), (sum_lng / counts).astype(np.float32))
+            if level == 0:
+                break
+            # Parent cell of (x, y) is (x >> 1, y >> 1) one level up
+            size = 2 ** level
+            parents = (keys // size >> 1) * (size >> 1) + (keys % size >> 1)
+            keys, inverse = np.unique(parents, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            sum_lat = np.bincount(inverse, weights=sum_lat, minlength=len(keys))
+            sum_lng = np.bincount(inverse, weights=sum_lng, minlength=len(keys))
+            counts = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+        return self
+
+    def clusters(self, zoom, bbox):
+        """
+        Clusters inside bbox (min_lng, min_lat, max_lng, max_lat) for a map at
+        `zoom`; raises ValueError if the bbox spans more than MAX_VIEW_CELLS cells.
+        """
+        level = min(max(zoom, 0) + CELL_LEVEL_OFFSET, self.max_level)
+        keys, counts, mean_lat, mean_lng = self.levels.get(level, self.levels[self.max_level])
+        size = 2 ** level
+        min_lng, min_lat, max_lng, max_lat = bbox
+        # North is the smaller y in Mercator tiles
+        x0, y0 = mercator_xy(max_lat, min_lng, level)
+        x1, y1 = mercator_xy(min_lat, max_lng, level)
+        if (int(x1) - int(x0) + 1) * (int(y1) - int(y0) + 1) > MAX_VIEW_CELLS:
+            raise ValueError(f"bbox is too large for zoom {zoom}; zoom out or pass a smaller bbox")
+        xs = np.arange(int(x0), int(x1) + 1, dtype=np.int64)
+
+        # One contiguous key range per cell column in view
+        lo = np.searchsorted(keys, xs * size + int(y0))
+        hi = np.searchsorted(keys, xs * size + int(y1), side='right')
+        idx = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)]) if len(xs) else np.empty(0, dtype=np.int64)
+        idx = idx.astype(np.int64)
+
+        return level, [
+            {"lat": round(float(mean_lat[i]), 6), "lng": round(float(mean_lng[i]), 6), "count": int(counts[i])}
+            for i in idx
+        ]
+
+
+class ClusterRegistry(RefreshingRegistry):
+    """
+    Process-wide ClusterPyramid; rebuilt in the background when the crimes
+    table changes, like RiskRegistry.
+    """
+
+    def __init__(self):
+        super().__init__('map clusters', CLUSTER_CHECK_INTERVAL, CLUSTER_MIN_REFIT_INTERVAL)
+
+    def get_pyramid(self):
+        return self.get()
+
+    @metrics.timed('model_fit', model='clusters')
+    def _fit(self):
+        lat, lng = crime_store.columns().points()
+        return ClusterPyramid().fit(lat, lng)
+
+
+cluster_registry = ClusterRegistry()
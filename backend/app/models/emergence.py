@@ -0,0 +1,212 @@
+"""
+Emerging hotspot detection over sliding windows.
+
+Crimes are counted per grid cell and per day in a ring buffer covering the
+last RECENT_DAYS + BASELINE_DAYS days, together with running totals for the
+recent window (e.g. the last 7 days) and the baseline before it (the 90 days
+prior). A submitted crime is one counter increment; moving to a new day
+shifts one column between the windows, which is O(cells). Nothing rescans
+the crime column store except the initial build.
+
+A cell is emerging when its recent count is improbably high for a Poisson
+rate estimated from its own baseline (one-sided test). Every occupied cell is
+tested, so the significance level is Bonferroni-corrected for their number.
+"""
+import os
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+from backend.app.models.grid_hotspot_model import GridHotspotModel
+from backend.app.models.hotspot_registry import RefreshingRegistry
+from backend.app.models.risk_model import AREA_CENTERS
+from backend.app.services.column_store import crime_store
+from backend.app.services.metrics import metrics
+
+RECENT_DAYS = int(os.getenv('EMERGENCE_RECENT_DAYS', 7))
+BASELINE_DAYS = int(os.getenv('EMERGENCE_BASELINE_DAYS', 90))
+EMERGENCE_CELL_SIZE = float(os.getenv('EMERGENCE_CELL_SIZE', 0.01))
+# Family-wise significance level across all cells
+EMERGENCE_ALPHA = float(os.getenv('EMERGENCE_ALPHA', 0.05))
+# Fewer recent crimes than this are never flagged, however quiet the baseline
+MIN_RECENT = 5
+# Floor on the expected recent count, so cells with no history need a real burst
+MIN_EXPECTED = 0.5
+EMERGENCE_REBUILD_INTERVAL = float(os.getenv('EMERGENCE_REBUILD_INTERVAL', 600))
+EPOCH = date(1970, 1, 1)
+
+
+def epoch_day(value):
+    """Days since 1970-01-01 for a date, datetime or 'YYYY-MM-DD[ HH:MM:SS]' string."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def nearest_area(lat, lng, max_distance=1.0):
+    best, best_distance = None, max_distance
+    for name, (area_lat, area_lng) in AREA_CENTERS.items():
+        distance = max(abs(lat - area_lat), abs(lng - area_lng))
+        if distance < best_distance:
+            best, best_distance = name, distance
+    return best
+
+
+class EmergenceDetector:
+    def __init__(self, cell_size=EMERGENCE_CELL_SIZE, recent_days=RECENT_DAYS, baseline_days=BASELINE_DAYS):
+        self.grid = GridHotspotModel(cell_size=cell_size)
+        self.recent_days = recent_days
+        self.baseline_days = baseline_days
+        self.window = recent_days + baseline_days
+        self.today = epoch_day(date.today())
+        self.rows = {}                                   # cell key -> row
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros((0, self.window), dtype=np.int32)  # column = day % window
+        self.recent = np.zeros(0, dtype=np.int64)
+        self.baseline = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def fit(self, lat, lng, days):
+        """Build the windows from arrays of coordinates and epoch days."""
+        with self._lock:
+            self.today = epoch_day(date.today())
+            keep = (days <= self.today) & (days > self.today - self.window)
+            keys, rows = np.unique(self.grid.cell_keys(lat[keep], lng[keep]), return_inverse=True)
+            rows = rows.reshape(-1)
+            days = days[keep]
+
+            self.keys = keys
+            self.rows = {int(k): i for i, k in enumerate(keys)}
+            self.counts = np.zeros((len(keys), self.window), dtype=np.int32)
+            np.add.at(self.counts, (rows, days % self.window), 1)
+            is_recent = days > self.today - self.recent_days
+            self.recent = np.bincount(rows[is_recent], minlength=len(keys)).astype(np.int64)
+            self.baseline = np.bincount(rows[~is_recent], minlength=len(keys)).astype(np.int64)
+        return self
+
+    def _advance(self, today):
+        # Caller holds the lock. Each new day: expire the oldest column and
+        # move the day leaving the recent window into the baseline.
+        if today <= self.today:
+            return
+        if today - self.today >= self.window:
+            self.counts[:] = 0
+            self.recent[:] = 0
+            self.baseline[:] = 0
+        else:
+            for day in range(self.today + 1, today + 1):
+                expired = day % self.window
+                self.baseline -= self.counts[:, expired]
+                self.counts[:, expired] = 0
+                leaving = (day - self.recent_days) % self.window
+                self.recent -= self.counts[:, leaving]
+                self.baseline += self.counts[:, leaving]
+        self.today = today
+
+    def _row(self, key):
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            self.rows[key] = row
+            self.keys = np.append(self.keys, key)
+            self.counts = np.vstack([self.counts, np.zeros((1, self.window), dtype=np.int32)])
+            self.recent = np.append(self.recent, 0)
+            self.baseline = np.append(self.baseline, 0)
+        return row
+
+    def add(self, lat, lng, occurred):
+        """Count one crime; those outside the windows (or in the future) are ignored."""
+        if lat is None or lng is None or occurred is None:
+            return
+        day = epoch_day(occurred)
+        with self._lock:
+            self._advance(epoch_day(date.today()))
+            if day > self.today or day <= self.today - self.window:
+                return
+            row = self._row(int(self.grid.cell_keys(float(lat), float(lng))))
+            self.counts[row, day % self.window] += 1
+            if day > self.today - self.recent_days:
+                self.recent[row] += 1
+            else:
+                self.baseline[row] += 1
+
+    def emerging(self, limit=10, alpha=EMERGENCE_ALPHA):
+        """Cells whose recent count is significantly above their baseline rate, strongest first."""
+        # scipy.stats alone takes most of a second to import
+        from scipy.stats import poisson
+
+        with self._lock:
+            self._advance(epoch_day(date.today()))
+            recent = self.recent.copy()
+            baseline = self.baseline.copy()
+            keys = self.keys.copy()
+
+        expected = np.maximum(baseline * self.recent_days / self.baseline_days, MIN_EXPECTED)
+        # P(X >= recent) for X ~ Poisson(expected)
+        p_values = poisson.sf(recent - 1, expected)
+        flagged = np.flatnonzero((p_values < alpha / max(len(keys), 1)) & (recent >= MIN_RECENT))
+        flagged = flagged[np.lexsort((-recent[flagged] / expected[flagged], p_values[flagged]))][:limit]
+
+        lat, lng = self.grid.cell_center(keys[flagged])
+        results = []
+        for i, row in enumerate(flagged):
+            cell_lat, cell_lng = round(float(lat[i]), 6), round(float(lng[i]), 6)
+            results.append({
+                "lat": cell_lat,
+                "lng": cell_lng,
+                "area": nearest_area(cell_lat, cell_lng),
+                "recent_count": int(recent[row]),
+                "expected": round(float(expected[row]), 2),
+                "ratio": round(float(recent[row] / expected[row]), 2),
+                "p_value": float(p_values[row]),
+            })
+        return results
+
+
+def load_window(columns, days):
+    """(lat, lng, epoch day) of located crimes from the last `days` days of a CrimeColumns snapshot."""
+    since = np.datetime64(date.fromordinal(date.today().toordinal() - days), 's')
+    # NaT compares False, so undated crimes drop out here too
+    keep = columns.located() & (columns.occurred >= since)
+    return columns.lat[keep], columns.lng[keep], columns.occurred[keep].astype('datetime64[D]').astype(np.int64)
+
+
+class EmergenceRegistry(RefreshingRegistry):
+    """
+    Process-wide detector. Crimes submitted through this process are added
+    as they commit; a full rebuild only happens on cold start, after writes
+    it did not see (another process, a db reset) and every
+    EMERGENCE_REBUILD_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        super().__init__('emergence detector', EMERGENCE_REBUILD_INTERVAL)
+
+    def get_detector(self):
+        return self.get()
+
+    def record(self, lat, lng, occurred, version):
+        """Add one committed crime; `version` is what bump_data_version() returned for it."""
+        with self._lock:
+            detector = self._model
+            if detector is None or self._data_version != version - 1:
+                # Not built yet, or other writes were missed: leave it to a rebuild
+                return
+            try:
+                detector.add(lat, lng, occurred)
+            except (TypeError, ValueError) as e:
+                print(f"Skipping crime in emergence detector: {e}")
+            self._data_version = version
+
+    @metrics.timed('model_fit', model='emergence')
+    def _fit(self):
+        detector = EmergenceDetector()
+        lat, lng, days = load_window(crime_store.columns(), detector.window)
+        detector.fit(lat, lng, days)
+        return detector
+
+
+emergence_registry = EmergenceRegistry()
@@ -0,0 +1,311 @@
+"""
+Crime volume forecasts per area (location_description) and crime type.
+
+Occurrence dates are resampled into daily or hourly count series for every
+(area, type) pair plus the per-area, per-type and overall totals ('ALL').
+Two lightweight models are fit to each series and the one with the lower
+error on the last held-out season is kept:
+
+    baseline   mean of each seasonal slot (weekday / hour of week) over the
+               last few seasons
+    smoothing  additive seasonal exponential smoothing (level + season, no
+               trend) for a few values of alpha
+
+Both are run across all series at once as NumPy arrays; large fits are split
+into chunks over a process pool. Fitted states are saved to models/ with the
+data fingerprint they were trained on.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.app.models.hotspot_model import write_atomic
+from backend.app.models.hotspot_registry import RefreshingRegistry
+from backend.app.services.column_store import crime_store
+from backend.app.services.metrics import metrics
+
+# pandas and joblib are imported inside the functions that use them, which
+# keeps them out of app start-up
+
+# Series frequency -> pandas alias, season length (in steps) and history window used
+FREQUENCIES = {
+    'D': {"alias": 'D', "season": 7, "window": np.timedelta64(365, 'D'), "max_horizon": 90},
+    'H': {"alias": 'h', "season": 168, "window": np.timedelta64(56, 'D'), "max_horizon": 336},
+}
+ALPHAS = (0.1, 0.3, 0.5)
+GAMMA = 0.1
+BASELINE_SEASONS = 4
+# Series with fewer events than this in the window are not modelled
+MIN_EVENTS = int(os.getenv('FORECAST_MIN_EVENTS', 20))
+FORECAST_WORKERS = int(os.getenv('FORECAST_WORKERS', min(os.cpu_count() or 1, 4)))
+# A vectorized fit handles ~10k hourly series per second, so worker start-up
+# (a spawned interpreter importing pandas) only pays off for very many series
+PARALLEL_MIN_SERIES = int(os.getenv('FORECAST_PARALLEL_MIN_SERIES', 20000))
+FORECAST_CHECK_INTERVAL = float(os.getenv('FORECAST_CHECK_INTERVAL', 600))
+# Least time between refits prompted by local writes; one submit is not worth a full refit
+FORECAST_MIN_REFIT_INTERVAL = float(os.getenv('FORECAST_MIN_REFIT_INTERVAL', FORECAST_CHECK_INTERVAL))
+ALL = 'ALL'
+UNKNOWN_AREA = 'UNKNOWN'
+MODEL_NAMES = ('baseline',) + tuple(f'smoothing(alpha={a})' for a in ALPHAS)
+
+
+def load_events(columns):
+    """Dated crimes of a CrimeColumns snapshot as an (occurrence_date, area, type) frame."""
+    import pandas as pd
+
+    dated = columns.dated()
+    return pd.DataFrame({
+        'occurrence_date': columns.occurred[dated],
+        'area': columns.area_names(dated),
+        'type': columns.type_names(dated),
+    })
+
+
+def build_series(events, freq):
+    """
+    Return (keys, counts, index): (area, type) keys, an (n_series, n_steps)
+    count matrix and the DatetimeIndex of its columns.
+    """
+    import pandas as pd
+
+    spec = FREQUENCIES[freq]
+    alias = spec["alias"]
+    events = events.assign(
+        occurrence_date=pd.to_datetime(events['occurrence_date'], errors='coerce', format='mixed'),
+        # Keys are upper-cased, as the API looks them up, so 'Delhi' and 'DELHI' are one series
+        area=events['area'].fillna('').astype(str).str.strip().str.upper().replace('', UNKNOWN_AREA),
+        type=events['type'].fillna('').astype(str).str.strip().str.upper(),
+    ).dropna(subset=['occurrence_date'])
+    if events.empty:
+        return [], np.zeros((0, 0)), pd.DatetimeIndex([])
+
+    step = pd.Timedelta(1, alias)
+    end = events['occurrence_date'].max().floor(alias)
+    # The bucket still in progress would read as a sudden drop
+    end = min(end, pd.Timestamp.now().floor(alias) - step)
+    index = pd.date_range(end - spec["window"] + step, end, freq=alias)
+    events = events[(events['occurrence_date'] >= index[0]) & (events['occurrence_date'] < end + step)]
+
+    counts = events.groupby(['area', 'type', pd.Grouper(key='occurrence_date', freq=alias)]).size()
+    wide = counts.unstack('occurrence_date', fill_value=0).reindex(columns=index, fill_value=0)
+
+    # Totals per area, per type and overall, from the same matrix
+    by_area = wide.groupby(level='area').sum()
+    by_type = wide.groupby(level='type').sum()
+    frames = [
+        wide,
+        by_area.set_index(pd.MultiIndex.from_arrays([by_area.index, [ALL] * len(by_area)], names=['area', 'type'])),
+        by_type.set_index(pd.MultiIndex.from_arrays([[ALL] * len(by_type), by_type.index], names=['area', 'type'])),
+        pd.DataFrame([wide.sum().values], columns=index,
+                     index=pd.MultiIndex.from_tuples([(ALL, ALL)], names=['area', 'type'])),
+    ]
+    series = pd.concat(frames)
+    series = series[series.sum(axis=1) >= MIN_EVENTS]
+    return list(series.index), series.to_numpy(dtype=float), index
+
+
+def smooth(Y, season, alpha, gamma=GAMMA):
+    """Additive seasonal exponential smoothing over every row of Y; returns (level, seasonal)."""
+    level = Y[:, :season].mean(axis=1)
+    seasonal = Y[:, :season] - level[:, None]
+    for t in range(season, Y.shape[1]):
+        slot = t % season
+        previous = seasonal[:, slot]
+        new_level = alpha * (Y[:, t] - previous) + (1 - alpha) * level
+        seasonal[:, slot] = gamma * (Y[:, t] - new_level) + (1 - gamma) * previous
+        level = new_level
+    return level, seasonal
+
+
+def seasonal_baseline(Y, season):
+    """Mean of each seasonal slot over the last BASELINE_SEASONS seasons, as (level, seasonal)."""
+    T = Y.shape[1]
+    recent = Y[:, max(0, T - BASELINE_SEASONS * season):]
+    slots = (T - recent.shape[1] + np.arange(recent.shape[1])) % season
+    # One-hot slot matrix turns the per-slot means into a single matmul
+    onehot = np.zeros((recent.shape[1], season))
+    onehot[np.arange(recent.shape[1]), slots] = 1
+    seasonal = (recent @ onehot) / np.maximum(onehot.sum(axis=0), 1)
+    return np.zeros(len(Y)), seasonal
+
+
+def project(level, seasonal, start, horizon):
+    """Forecast steps start .. start + horizon - 1 from a (level, seasonal) state."""
+    season = seasonal.shape[1]
+    slots = (start + np.arange(horizon)) % season
+    return np.maximum(level[:, None] + seasonal[:, slots], 0)
+
+
+def _candidates(season):
+    candidates = [lambda data: seasonal_baseline(data, season)]
+    candidates += [lambda data, a=a: smooth(data, season, a) for a in ALPHAS]
+    return candidates
+
+
+def fit_chunk(Y, season):
+    """Pick the best model per row on a held-out final season, then refit it on all of Y."""
+    T = Y.shape[1]
+    train, test = Y[:, :T - season], Y[:, T - season:]
+    candidates = _candidates(season)
+
+    errors = np.stack([
+        np.abs(project(*fit(train), T - season, season) - test).mean(axis=1) for fit in candidates
+    ], axis=1)
+    choice = errors.argmin(axis=1)
+
+    level = np.zeros(len(Y))
+    seasonal = np.zeros((len(Y), season))
+    for model_index, fit in enumerate(candidates):
+        rows = choice == model_index
+        if rows.any():
+            level[rows], seasonal[rows] = fit(Y[rows])
+    return choice, errors[np.arange(len(Y)), choice], level, seasonal
+
+
+def fit_series(Y, season, workers=FORECAST_WORKERS):
+    if len(Y) < PARALLEL_MIN_SERIES or workers <= 1:
+        return fit_chunk(Y, season)
+
+    # spawn rather than fork: fits also run from background threads
+    chunks = np.array_split(Y, workers)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        parts = list(pool.map(fit_chunk, chunks, [season] * len(chunks)))
+    return tuple(np.concatenate([part[i] for part in parts]) for i in range(4))
+
+
+class ForecastModel:
+    def __init__(self, freq='D'):
+        if freq not in FREQUENCIES:
+            raise ValueError(f"freq must be one of {', '.join(FREQUENCIES)}")
+        self.freq = freq
+        self.season = FREQUENCIES[freq]["season"]
+        self.model_path = f'models/forecast_{freq}.joblib'
+        self.fingerprint = None
+        self.state = None
+
+    @metrics.timed('model_fit', model='forecast')
+    def train_from_db(self):
+        import joblib
+
+        columns = crime_store.columns()
+        fingerprint = columns.fingerprint
+        events = load_events(columns)
+
+        keys, Y, index = build_series(events, self.freq)
+        if len(keys) == 0 or Y.shape[1] < 2 * self.season:
+            print("Not enough data to train forecasts.")
+            self.state = None
+            return None
+
+        choice, mae, level, seasonal = fit_series(Y, self.season)
+        self.state = {
+            "rows": {key: i for i, key in enumerate(keys)},
+            "index": index,
+            "history": Y[:, -2 * self.season:],
+            "choice": choice,
+            "mae": mae,
+            "level": level,
+            "seasonal": seasonal,
+        }
+        self.fingerprint = fingerprint
+        os.makedirs('models', exist_ok=True)
+        # Other workers may load() this file while it is being replaced
+        write_atomic(self.model_path, lambda f: joblib.dump({"fingerprint": fingerprint, "state": self.state}, f))
+        print(f"Forecast models ({self.freq}) trained for {len(keys)} series and saved to {self.model_path}")
+        return self.state
+
+    @metrics.timed('model_load', model='forecast')
+    def load(self):
+        if not os.path.exists(self.model_path):
+            return None
+        import joblib
+
+        saved = joblib.load(self.model_path)
+        self.fingerprint = tuple(saved["fingerprint"])
+        self.state = saved["state"]
+        return self.state
+
+    def series(self):
+        return list(self.state["rows"]) if self.state else []
+
+    def forecast(self, area=ALL, crime_type=ALL, horizon=7):
+        """Next `horizon` steps for one series, or None if it is not modelled."""
+        if self.state is None:
+            return None
+        row = self.state["rows"].get((area, crime_type))
+        if row is None:
+            return None
+
+        index = self.state["index"]
+        step = np.timedelta64(1, FREQUENCIES[self.freq]["alias"])
+        values = project(self.state["level"][row:row + 1], self.state["seasonal"][row:row + 1], len(index), horizon)[0]
+        history = self.state["history"][row]
+        return {
+            "area": area,
+            "type": crime_type,
+            "freq": self.freq,
+            "model": MODEL_NAMES[self.state["choice"][row]],
+            "mae": round(float(self.state["mae"][row]), 3),
+            "history": [
+                {"timestamp": ts.isoformat(), "count": int(v)}
+                for ts, v in zip(index[-len(history):], history)
+            ],
+            "forecast": [
+                {"timestamp": (index[-1] + step * (i + 1)).isoformat(), "expected": round(float(v), 2)}
+                for i, v in enumerate(values)
+            ],
+        }
+
+
+class FrequencyRegistry(RefreshingRegistry):
+    """The ForecastModel of one frequency, refit in the background when stale."""
+
+    def __init__(self, freq):
+        super().__init__(f'forecast models ({freq})', FORECAST_CHECK_INTERVAL, FORECAST_MIN_REFIT_INTERVAL)
+        self.freq = freq
+
+    def _fit(self):
+        # A saved model is reused while the crimes fingerprint matches
+        model = ForecastModel(self.freq)
+        if model.load() is None or model.fingerprint != crime_store.columns().fingerprint:
+            model.train_from_db()
+        return model
+
+
+class ForecastRegistry:
+    """
+    Fitted ForecastModels per frequency. A saved model is reused while the
+    crimes fingerprint matches; otherwise models are refit in the background
+    while the previous ones keep answering.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._registries = {}      # freq -> FrequencyRegistry
+
+    @property
+    def stamp(self):
+        return tuple(registry.stamp for registry in self._registries.values())
+
+    def get_model(self, freq):
+        if freq not in FREQUENCIES:
+            raise ValueError(f"freq must be one of {', '.join(FREQUENCIES)}")
+        registry = self._registries.get(freq)
+        if registry is None:
+            with self._lock:
+                registry = self._registries.setdefault(freq, FrequencyRegistry(freq))
+        return registry.get()
+
+
+forecast_registry = ForecastRegistry()
+
+if __name__ == "__main__":
+    freq = sys.argv[1] if len(sys.argv) > 1 else 'D'
+    model = ForecastModel(freq)
+    if model.train_from_db() is not None:
+        print(json.dumps(model.forecast(horizon=FREQUENCIES[freq]["season"]), indent=2))
@@ -0,0 +1,67 @@
+import numpy as np
+
+# ~1.1 km at the equator
+DEFAULT_CELL_SIZE = 0.01
+MIN_CELL_SIZE = 0.001
+MAX_CELL_SIZE = 1.0
+# Kernel radius in cells for the density score
+DEFAULT_BANDWIDTH = 1
+
+
+class GridHotspotModel:
+    """
+    Hotspots as the densest cells of a fixed lat/lng grid.
+
+    Points are binned with vectorized floor division and counted with
+    np.unique, so fitting is a single O(N log N) pass with no iterations and
+    no fixed number of clusters. Each occupied cell also gets a Gaussian
+    kernel-density score from its neighbours within `bandwidth` cells.
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE, bandwidth=DEFAULT_BANDWIDTH):
+        self.cell_size = cell_size
+        self.bandwidth = bandwidth
+        self.n_cols = int(np.ceil(360 / cell_size)) + 1
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.density = np.empty(0, dtype=float)
+
+    def cell_keys(self, lat, lng):
+        rows = np.floor((np.asarray(lat) + 90) / self.cell_size).astype(np.int64)
+        cols = np.floor((np.asarray(lng) + 180) / self.cell_size).astype(np.int64)
+        return rows * self.n_cols + cols
+
+    def cell_center(self, keys):
+        rows, cols = np.divmod(keys, self.n_cols)
+        return (rows + 0.5) * self.cell_size - 90, (cols + 0.5) * self.cell_size - 180
+
+    def fit(self, lat, lng):
+        self.keys, self.counts = np.unique(self.cell_keys(lat, lng), return_counts=True)
+
+        # Kernel density: weighted sum of neighbour counts, looked up by
+        # binary search in the sorted key array (O(cells * window)).
+        density = np.zeros(len(self.keys), dtype=float)
+        sigma = max(self.bandwidth, 1) / 2
+        for dr in range(-self.bandwidth, self.bandwidth + 1):
+            for dc in range(-self.bandwidth, self.bandwidth + 1):
+                weight = np.exp(-(dr * dr + dc * dc) / (2 * sigma * sigma))
+                neighbours = self.keys + dr * self.n_cols + dc
+                idx = np.searchsorted(self.keys, neighbours)
+                idx[idx == len(self.keys)] = 0
+                hit = self.keys[idx] == neighbours if len(self.keys) else np.zeros(0, dtype=bool)
+                density[hit] += weight * self.counts[idx[hit]]
+        self.density = density
+        return self
+
+    def top(self, n=10):
+        order = np.argsort(-self.density, kind='stable')[:n]
+        lat, lng = self.cell_center(self.keys[order])
+        return [
+            {
+                "lat": round(float(lat[i]), 6),
+                "lng": round(float(lng[i]), 6),
+                "count": int(self.counts[j]),
+                "density": round(float(self.density[j]), 3),
+            }
+            for i, j in enumerate(order)
+        ]
@@ -1,53 +1,201 @@
-import pandas as pd
-from sklearn.cluster import KMeans
-import joblib
+import numpy as np
+import json
 import os
-from backend.app.services.database import get_db_connection
+import sys
+import tempfile
+from backend.app.services.column_store import crime_store
+from backend.app.services.metrics import metrics
+
+# Rows folded into the centers per update_centers() call
+INCREMENTAL_CHUNK = 50000
+
+
+def rows_through(columns, last_id):
+    """Number of crimes with id <= last_id (the store is sorted by id)."""
+    return int(np.searchsorted(columns.id, last_id, side='right'))
+
+
+def update_centers(centers, counts, points):
+    """
+    Fold a batch of points into running cluster means (mini-batch k-means step).
+
+    Each point is assigned to its nearest center and every center moves to the
+    exact mean of all points it has absorbed so far, so the cost is O(batch * k)
+    no matter how many points were seen before.
+    """
+    distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    labels = distances.argmin(axis=1)
+    k = len(centers)
+
+    batch_counts = np.bincount(labels, minlength=k)
+    batch_sums = np.stack([
+        np.bincount(labels, weights=points[:, 0], minlength=k),
+        np.bincount(labels, weights=points[:, 1], minlength=k),
+    ], axis=1)
+
+    new_counts = counts + batch_counts
+    touched = batch_counts > 0
+    centers = centers.copy()
+    centers[touched] += (batch_sums[touched] - batch_counts[touched, None] * centers[touched]) / new_counts[touched, None]
+    return centers, new_counts
+
+
+def write_atomic(path, write):
+    """Call write(file) on a temporary file next to `path`, then rename it over `path`."""
+    fd, staging = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(staging, path)
+    except BaseException:
+        os.unlink(staging)
+        raise
+
 
 class HotspotModel:
     def __init__(self, n_clusters=5):
+        # scikit-learn and joblib take over a second to import; they are only
+        # loaded once a model is built, not when the app starts
+        from sklearn.cluster import KMeans
+
         self.n_clusters = n_clusters
         self.model = KMeans(n_clusters=self.n_clusters, random_state=42)
         self.model_path = 'models/hotspot_model.joblib'
+        # Sidecar recording which (row count, max id, generation) the saved model was fit on
+        self.meta_path = 'models/hotspot_model.json'
+        # The model with its per-center counts and the last crime id folded in,
+        # for incremental updates
+        self.state_path = 'models/hotspot_model.state.joblib'
+        self.fingerprint = None
+
+    def _save(self, fingerprint, state):
+        """
+        Write the model, its metadata and then the incremental checkpoint, each
+        through a temporary file renamed into place. A reader never sees a
+        half-written file, and the checkpoint carries its own copy of the model,
+        so a crash between writes cannot pair new centers with old counts.
+        """
+        import joblib
+
+        os.makedirs('models', exist_ok=True)
+        write_atomic(self.model_path, lambda f: joblib.dump(self.model, f))
+        write_atomic(self.meta_path, lambda f: f.write(json.dumps({"fingerprint": list(fingerprint)}).encode()))
+        write_atomic(self.state_path, lambda f: joblib.dump({**state, "model": self.model}, f))
+        self.fingerprint = fingerprint
 
+    @metrics.timed('model_fit', model='kmeans')
     def train_from_db(self):
-        connection = get_db_connection()
-        if not connection:
-            print("Failed to connect to database for training.")
-            return
-        
         try:
-            query = "SELECT latitude, longitude FROM crimes WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
-            df = pd.read_sql(query, connection)
-            
-            if len(df) < self.n_clusters:
+            columns = crime_store.columns()
+            located = columns.located()
+            points = np.column_stack([columns.lat[located], columns.lng[located]])
+
+            if len(points) < self.n_clusters:
                 print("Not enough data to train clusters.")
                 return
-            
+
             # Train model
-            self.model.fit(df[['latitude', 'longitude']])
-            
-            # Save model
-            os.makedirs('models', exist_ok=True)
-            joblib.dump(self.model, self.model_path)
+            self.model.fit(points)
+
+            # Save model, seeding the incremental state from this fit
+            last_id = int(columns.id[located].max())
+            state = {
+                "counts": np.bincount(self.model.labels_, minlength=self.n_clusters),
+                "last_id": last_id,
+                "rows": rows_through(columns, last_id),
+                "generation": columns.generation,
+            }
+            self._save(columns.fingerprint, state)
             print(f"Hotspot model trained and saved to {self.model_path}")
-            
+
             return self.model.cluster_centers_
         except Exception as e:
             print(f"Error training hotspot model: {e}")
-        finally:
-            connection.close()
+
+    @metrics.timed('model_fit', model='kmeans_incremental')
+    def train_incremental(self):
+        """
+        Update the saved centers with crimes inserted since the last checkpoint.
+
+        Falls back to a full refit when there is no saved state yet, when rows
+        the state already covers have been deleted, or when the table has been
+        rebuilt since (a db reset, which can reuse the same ids). A checkpoint
+        ahead of this process's column store (written by another worker) makes
+        the store catch up first rather than counting as a deletion.
+        """
+        if not os.path.exists(self.state_path):
+            return self.train_from_db()
+
+        import joblib
+
+        try:
+            state = joblib.load(self.state_path)
+            columns = crime_store.columns()
+
+            if "model" not in state:
+                print("Hotspot checkpoint predates the combined format; running a full refit.")
+                return self.train_from_db()
+            self.model = state["model"]
+            if state.get("generation") != columns.generation or state["last_id"] > (columns.fingerprint[1] or 0):
+                columns = crime_store.sync()
+            if state.get("generation") == columns.generation and rows_through(columns, state["last_id"]) == state["rows"]:
+                return self._fold_new_rows(columns, state)
+            print("Crimes were removed or the table was rebuilt since the last checkpoint; running a full refit.")
+        except Exception as e:
+            print(f"Error updating hotspot model: {e}")
+            return
+        return self.train_from_db()
+
+    def _fold_new_rows(self, columns, state):
+        centers = np.asarray(self.model.cluster_centers_, dtype=float)
+        counts = np.asarray(state["counts"], dtype=float)
+        start = rows_through(columns, state["last_id"])
+        if start == len(columns):
+            self.fingerprint = columns.fingerprint
+            return self.model.cluster_centers_
+
+        for i in range(start, len(columns), INCREMENTAL_CHUNK):
+            points = np.column_stack([columns.lat[i:i + INCREMENTAL_CHUNK], columns.lng[i:i + INCREMENTAL_CHUNK]])
+            points = points[~np.isnan(points).any(axis=1)]
+            if len(points):
+                centers, counts = update_centers(centers, counts, points)
+
+        self.model.cluster_centers_ = centers
+        last_id = int(columns.id[-1])
+        self._save(columns.fingerprint, {"counts": counts, "last_id": last_id, "rows": len(columns),
+                                         "generation": columns.generation})
+        print(f"Hotspot model updated with {len(columns) - start} new records")
+
+        return self.model.cluster_centers_
+
+    @metrics.timed('model_load', model='kmeans')
+    def load(self):
+        if not os.path.exists(self.model_path):
+            return None
+        import joblib
+
+        self.model = joblib.load(self.model_path)
+        self.fingerprint = None
+        if os.path.exists(self.meta_path):
+            try:
+                with open(self.meta_path) as f:
+                    self.fingerprint = tuple(json.load(f)["fingerprint"])
+            except (ValueError, KeyError) as e:
+                print(f"Ignoring unreadable hotspot model metadata: {e}")
+        return self.model.cluster_centers_
 
     def get_hotspots(self):
         if os.path.exists(self.model_path):
-            self.model = joblib.load(self.model_path)
-            return self.model.cluster_centers_
+            return self.load()
         else:
             return self.train_from_db()
 
 if __name__ == "__main__":
     model = HotspotModel(n_clusters=10)
-    centers = model.train_from_db()
+    if '--incremental' in sys.argv:
+        centers = model.train_incremental()
+    else:
+        centers = model.train_from_db()
     if centers is not None:
         print("Hotspot Centers:")
         print(centers)
@@ -0,0 +1,185 @@
+import math
+import os
+import threading
+import time
+
+from backend.app.models.hotspot_model import HotspotModel
+from backend.app.models.grid_hotspot_model import GridHotspotModel
+from backend.app.services.column_store import crime_store
+from backend.app.services.database import get_data_version
+from backend.app.services.metrics import metrics
+
+# Seconds between checks of the crimes table for writes made outside this
+# process (bulk loaders, other workers). Local writes are seen immediately
+# through the data version counter.
+FINGERPRINT_INTERVAL = float(os.getenv('HOTSPOT_CHECK_INTERVAL', 30))
+
+
+def is_stale(data_version, checked_at, interval, min_interval=0):
+    """
+    True once `interval` seconds have passed, or sooner once a local write
+    moved the data version on and at least `min_interval` seconds have passed.
+    """
+    age = time.monotonic() - checked_at
+    return age >= interval or (data_version != get_data_version() and age >= min_interval)
+
+
+class RefreshingRegistry:
+    """
+    Process-wide holder for one fitted model, refit on a background thread.
+
+    The first caller loads or fits in-line. After that, `interval` seconds
+    since the last check, or a local write (the data version moves on) once
+    `min_interval` seconds have passed, start a single refit in the
+    background while the current model keeps being served. Models that refit
+    from scratch set min_interval so a burst of submits costs one refit, not
+    one each. Subclasses supply _fit(), which returns the new model or None
+    to keep the current one, and may override _cold_start() to load a saved
+    model before fitting.
+    """
+
+    def __init__(self, name, interval, min_interval=0):
+        self.name = name
+        self.interval = interval
+        self.min_interval = min_interval
+        # Re-entrant: _publish takes it while a cold start already holds it
+        self._lock = threading.RLock()
+        self._model = None
+        self._data_version = None
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._published = 0
+
+    @property
+    def stamp(self):
+        """Changes whenever a new model is published; response caches key on it."""
+        return (os.getpid(), self._published)
+
+    def get(self):
+        if self._model is None:
+            self.preload()
+        elif not self._refreshing and is_stale(self._data_version, self._checked_at, self.interval, self.min_interval):
+            with self._lock:
+                if self._refreshing:
+                    return self._model
+                self._refreshing = True
+            threading.Thread(target=self._refresh, args=(get_data_version(),), daemon=True).start()
+        return self._model
+
+    def preload(self):
+        """Load (or with nothing saved, fit) the model in-line without starting a refresh."""
+        with self._lock:
+            if self._model is None:
+                self._cold_start(get_data_version())
+
+    def _cold_start(self, version):
+        self._publish(self._fit(), version)
+
+    def _fit(self):
+        raise NotImplementedError
+
+    def _publish(self, model, version, checked_at=None):
+        with self._lock:
+            if model is not None:
+                self._model = model
+                self._published += 1
+            self._data_version = version
+            self._checked_at = time.monotonic() if checked_at is None else checked_at
+
+    def _refresh(self, version):
+        try:
+            self._publish(self._fit(), version)
+        except Exception as e:
+            print(f"Error refreshing {self.name}: {e}")
+        finally:
+            self._refreshing = False
+
+
+class HotspotRegistry(RefreshingRegistry):
+    """
+    Process-wide holder for the hotspot model.
+
+    Centers stay in memory between requests. When the crimes table changes the
+    model is retrained on a background thread while the previous centers keep
+    being served; only a cold start with no saved model trains in-line.
+    """
+
+    def __init__(self, n_clusters=10):
+        super().__init__('hotspot model', FINGERPRINT_INTERVAL)
+        self.n_clusters = n_clusters
+        self._fingerprint = None
+
+    def get_hotspots(self):
+        return self.get()
+
+    def _cold_start(self, version):
+        model = HotspotModel(n_clusters=self.n_clusters)
+        centers = model.load()
+        if centers is not None:
+            # Saved centers answer at once; the next request checks them against the table
+            self._publish(self._hotspots(centers, model.fingerprint), version, checked_at=0.0)
+            return
+        # Nothing saved yet: the first caller has to wait for a fit
+        centers = model.train_from_db()
+        self._publish(None if centers is None else self._hotspots(centers, model.fingerprint), version)
+
+    def _fit(self):
+        if crime_store.columns().fingerprint == self._fingerprint:
+            return None
+        # Only rows added since the last checkpoint are folded in;
+        # HotspotModel falls back to a full fit when it has to.
+        model = HotspotModel(n_clusters=self.n_clusters)
+        centers = model.train_incremental()
+        return None if centers is None else self._hotspots(centers, model.fingerprint)
+
+    def _hotspots(self, centers, fingerprint):
+        hotspots = []
+        for c in centers:
+            lat = float(c[0])
+            lng = float(c[1])
+            if not (math.isnan(lat) or math.isnan(lng)):
+                hotspots.append({"lat": lat, "lng": lng})
+        self._fingerprint = fingerprint
+        return hotspots
+
+
+class GridHotspotRegistry:
+    """
+    Fitted grid models keyed by cell size.
+
+    A grid fit is a single vectorized pass, so stale models are simply refit
+    on the next request instead of in the background.
+    """
+
+    def __init__(self, max_models=8):
+        self.max_models = max_models
+        self._lock = threading.Lock()
+        self._models = {}
+        self._fits = 0
+
+    @property
+    def stamp(self):
+        """Changes whenever any cell size is refit; response caches key on it."""
+        return (os.getpid(), self._fits)
+
+    def get_hotspots(self, top_n, cell_size):
+        entry = self._models.get(cell_size)
+        version = get_data_version()
+        if entry is None or is_stale(entry[0], entry[1], FINGERPRINT_INTERVAL):
+            entry = self._fit(cell_size, version)
+        return entry[2].top(top_n)
+
+    @metrics.timed('model_fit', model='grid')
+    def _fit(self, cell_size, version):
+        lat, lng = crime_store.columns().points()
+        entry = (version, time.monotonic(), GridHotspotModel(cell_size=cell_size).fit(lat, lng))
+        with self._lock:
+            if cell_size not in self._models and len(self._models) >= self.max_models:
+                self._models.pop(next(iter(self._models)))
+            self._models[cell_size] = entry
+            self._fits += 1
+        return entry
+
+
+hotspot_registry = HotspotRegistry(n_clusters=10)
+grid_registry = GridHotspotRegistry()
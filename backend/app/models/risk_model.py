@@ -0,0 +1,143 @@
+"""
+Local crime-risk index behind the safety score.
+
+Incidents are binned into the same lat/lng grid as GridHotspotModel and
+weighted by recency (weight halves every `half_life_days`). For each cell the
+model keeps the recency-weighted count of its 3x3 neighbourhood, that count's
+percentile among all occupied neighbourhoods, and a 168-bucket hour-of-week
+profile. Scoring a point is then a dict lookup plus a little arithmetic, and
+needs nothing but the crime column store.
+"""
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+
+from backend.app.models.grid_hotspot_model import GridHotspotModel, DEFAULT_CELL_SIZE
+from backend.app.models.hotspot_registry import RefreshingRegistry
+from backend.app.services.column_store import crime_store
+from backend.app.services.metrics import metrics
+
+DEFAULT_HALF_LIFE_DAYS = float(os.getenv('RISK_HALF_LIFE_DAYS', 90))
+RISK_CHECK_INTERVAL = float(os.getenv('RISK_CHECK_INTERVAL', 300))
+# Least time between refits prompted by local writes; every refit is a full fit
+RISK_MIN_REFIT_INTERVAL = float(os.getenv('RISK_MIN_REFIT_INTERVAL', RISK_CHECK_INTERVAL))
+HOURS_PER_WEEK = 168
+# Pseudo-count pulling sparse cells toward the global hour-of-week profile
+HOUR_PRIOR = 5.0
+
+# Area names the safety endpoint can resolve without a geocoder
+AREA_CENTERS = {
+    'Delhi': (28.6139, 77.2090),
+    'New Delhi': (28.6139, 77.2090),
+    'Mumbai': (19.0760, 72.8777),
+    'Bangalore': (12.9716, 77.5946),
+    'Bengaluru': (12.9716, 77.5946),
+    'Chennai': (13.0827, 80.2707),
+    'Kolkata': (22.5726, 88.3639),
+    'Pune': (18.5204, 73.8567),
+    'Hyderabad': (17.3850, 78.4867),
+    'Ahmedabad': (23.0225, 72.5714),
+    'Jaipur': (26.9124, 75.7873),
+    'Lucknow': (26.8467, 80.9462),
+}
+
+
+def load_incidents(columns):
+    """Return (lat, lng, days since 1970) for every dated, located crime in a CrimeColumns snapshot."""
+    keep = columns.located() & columns.dated()
+    return columns.lat[keep], columns.lng[keep], columns.occurred[keep].astype(np.int64) / 86400
+
+
+def hour_of_week(days):
+    """Monday 00:00 = 0 ... Sunday 23:00 = 167, from (fractional) days since 1970."""
+    days = np.asarray(days, dtype=float)
+    weekday = (np.floor(days).astype(np.int64) + 3) % 7
+    hour = np.floor((days % 1) * 24).astype(np.int64) % 24
+    return weekday * 24 + hour
+
+
+def to_days(when):
+    return (when - datetime(1970, 1, 1)).total_seconds() / 86400
+
+
+class RiskModel:
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE, half_life_days=DEFAULT_HALF_LIFE_DAYS):
+        self.grid = GridHotspotModel(cell_size=cell_size)
+        self.half_life_days = half_life_days
+        self.index = {}  # cell key -> (neighbourhood weight, percentile, profile row or -1)
+        self.profiles = np.zeros((0, HOURS_PER_WEEK))
+        self.global_profile = np.full(HOURS_PER_WEEK, 1 / HOURS_PER_WEEK)
+        self.incidents = 0
+
+    def fit(self, lat, lng, days, now=None):
+        now = to_days(datetime.now()) if now is None else now
+        weights = 0.5 ** (np.maximum(now - days, 0) / self.half_life_days)
+        keys, inverse = np.unique(self.grid.cell_keys(lat, lng), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        cell_weight = np.bincount(inverse, weights=weights, minlength=len(keys))
+        profiles = np.bincount(
+            inverse * HOURS_PER_WEEK + hour_of_week(days), weights=weights,
+            minlength=len(keys) * HOURS_PER_WEEK,
+        ).reshape(-1, HOURS_PER_WEEK)
+
+        # Every occupied cell and its neighbours gets the 3x3 neighbourhood sum
+        n_cols = self.grid.n_cols
+        offsets = np.array([dr * n_cols + dc for dr in (-1, 0, 1) for dc in (-1, 0, 1)], dtype=np.int64)
+        spread = (keys[:, None] + offsets[None, :]).reshape(-1)
+        area_keys, area_inverse = np.unique(spread, return_inverse=True)
+        area_weight = np.bincount(area_inverse.reshape(-1), weights=np.repeat(cell_weight, len(offsets)))
+        percentile = (np.argsort(np.argsort(area_weight, kind='stable'), kind='stable') + 1) / max(len(area_weight), 1)
+
+        rows = np.full(len(area_keys), -1, dtype=np.int64)
+        rows[np.searchsorted(area_keys, keys)] = np.arange(len(keys))
+
+        self.index = dict(zip(area_keys.tolist(), zip(area_weight.tolist(), percentile.tolist(), rows.tolist())))
+        self.profiles = profiles
+        total = profiles.sum(axis=0)
+        if total.sum() > 0:
+            self.global_profile = total / total.sum()
+        self.incidents = len(days)
+        return self
+
+    def score(self, lat, lng, when=None):
+        """Risk for a point at a time: 0 (no recent crime nearby) .. 1 (densest area at its busiest hour)."""
+        how = int(hour_of_week(to_days(when or datetime.now())))
+        key = int(self.grid.cell_keys(lat, lng))
+        weight, percentile, row = self.index.get(key, (0.0, 0.0, -1))
+
+        # How much busier this hour of the week is than the cell's average hour
+        profile = self.profiles[row] if row >= 0 else np.zeros(HOURS_PER_WEEK)
+        share = (profile[how] + HOUR_PRIOR * self.global_profile[how]) / (profile.sum() + HOUR_PRIOR)
+        hour_ratio = min(max(share * HOURS_PER_WEEK, 0.5), 2.0)
+
+        return {
+            "risk": round(min(1.0, percentile * math.sqrt(hour_ratio)), 3),
+            "density_percentile": round(percentile, 3),
+            "weighted_incidents": round(weight, 2),
+            "hour_factor": round(hour_ratio, 2),
+        }
+
+
+class RiskRegistry(RefreshingRegistry):
+    """
+    Process-wide RiskModel.
+
+    Like HotspotRegistry, a stale model keeps answering while a replacement
+    is fit on a background thread; only the first request fits in-line.
+    """
+
+    def __init__(self):
+        super().__init__('risk model', RISK_CHECK_INTERVAL, RISK_MIN_REFIT_INTERVAL)
+
+    def get_model(self):
+        return self.get()
+
+    @metrics.timed('model_fit', model='risk')
+    def _fit(self):
+        lat, lng, days = load_incidents(crime_store.columns())
+        return RiskModel().fit(lat, lng, days)
+
+
+risk_registry = RiskRegistry()
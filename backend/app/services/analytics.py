@@ -0,0 +1,89 @@
+"""
+Crime statistics shared by the admin analysis endpoints.
+
+crime_summary() produces totals, open cases, top locations, the type
+distribution and the hour histogram from a single read: the crime_rollups
+table when it exists, otherwise bincounts over the crime column store.
+"""
+from collections import Counter
+
+import numpy as np
+
+from backend.app.services.column_store import crime_store
+from backend.app.services.metrics import metrics
+from backend.app.services.rollups import read_rollups
+
+TIME_BUCKETS = ('Morning (4AM-12PM)', 'Afternoon (12PM-6PM)', 'Evening (6PM-11PM)', 'Night (11PM-4AM)')
+
+
+def _has_rollups(connection):
+    return connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'crime_rollups'"
+    ).fetchone() is not None
+
+
+def _category_counts(names, codes):
+    counts = np.bincount(codes, minlength=len(names))
+    # NULL is stored as '' in the store and reported as None, as read_rollups() does
+    return Counter({(name if name != '' else None): int(count) for name, count in zip(names, counts) if count})
+
+
+def _column_counts(columns):
+    # Vectorized counts over the in-memory columns, every dimension in one pass each
+    dated = columns.occurred[columns.dated()]
+    hours = np.bincount((dated.astype(np.int64) % 86400) // 3600, minlength=24)
+    return (
+        _category_counts(columns.types, columns.type_code),
+        _category_counts(columns.areas, columns.area_code),
+        Counter({f"{hour:02d}": int(count) for hour, count in enumerate(hours) if count}),
+        int(len(columns) - np.count_nonzero(columns.arrested)),
+    )
+
+
+def _rollup_counts(connection):
+    rollups = read_rollups(connection)
+    types = Counter({bucket: count for bucket, count, _ in rollups['type']})
+    locations = Counter({bucket: count for bucket, count, _ in rollups['location']})
+    hours = Counter({bucket: count for bucket, count, _ in rollups['hour'] if bucket})
+    open_cases = sum(open_count for _, _, open_count in rollups['type'])
+    return types, locations, hours, open_cases
+
+
+def time_bucket(hour):
+    if 4 <= hour < 12:
+        return TIME_BUCKETS[0]
+    if 12 <= hour < 18:
+        return TIME_BUCKETS[1]
+    if 18 <= hour < 23:
+        return TIME_BUCKETS[2]
+    return TIME_BUCKETS[3]
+
+
+@metrics.timed('sql', op='crime_summary')
+def crime_summary(connection, top_locations=5):
+    if _has_rollups(connection):
+        types, locations, hours, open_cases = _rollup_counts(connection)
+    else:
+        types, locations, hours, open_cases = _column_counts(crime_store.columns())
+
+    total_crimes = sum(types.values())
+
+    type_distribution = []
+    time_patterns = []
+    if total_crimes > 0:
+        type_distribution = [{"type": t, "percentage": round((c / total_crimes) * 100)} for t, c in types.items()]
+        type_distribution.sort(key=lambda x: x['percentage'], reverse=True)
+
+        time_counts = dict.fromkeys(TIME_BUCKETS, 0)
+        for hour_str, count in hours.items():
+            time_counts[time_bucket(int(hour_str))] += count
+        time_patterns = [{"time": k, "percentage": round((v / total_crimes) * 100)} for k, v in time_counts.items()]
+        time_patterns.sort(key=lambda x: x['percentage'], reverse=True)
+
+    return {
+        "total_crimes": total_crimes,
+        "open_cases": open_cases,
+        "top_locations": [{"area": area, "count": count} for area, count in locations.most_common(top_locations)],
+        "type_distribution": type_distribution,
+        "time_patterns": time_patterns,
+    }
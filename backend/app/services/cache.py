@@ -0,0 +1,201 @@
+"""
+Response cache for read-heavy GET endpoints.
+
+Entries are keyed by path + query args + the data stamp of the crimes table
+(its generation and max id, read from the database on each request), so a
+write from any process, a bulk load or a db reset makes every cached
+response unreachable without tracking what depends on what. Views built
+from a fitted model also pass stamp=, a value that changes whenever the
+model is replaced, so a refit that finishes after the write is not hidden
+behind the response computed from the previous model. Cached responses
+carry an ETag and If-None-Match requests are answered with 304 without
+re-serializing.
+
+Configuration (environment):
+    RESPONSE_CACHE_BACKEND      memory (default) | disk | off
+    RESPONSE_CACHE_TTL          seconds an entry stays valid (default 30)
+    RESPONSE_CACHE_MAX_ENTRIES  entry bound for either backend (default 256)
+    RESPONSE_CACHE_MAX_BYTES    body-size bound for the memory backend (default 64 MB, 0 = none)
+    RESPONSE_CACHE_DIR          directory for the disk backend (default .cache/responses)
+
+The disk backend can be shared by several worker processes: the data stamp
+is the same in all of them. Model stamps include the process id, so model
+responses are only reused by the worker that built them. Updates and
+deletions made outside the app (which leave the max id alone) are picked up
+once the TTL expires.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, make_response, request
+
+from backend.app.services.database import get_db_connection
+from backend.app.services.metrics import metrics
+
+
+class LRUCache:
+    def __init__(self, max_entries=256, ttl=30, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            stored_at, value, size = item
+            if time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size=0):
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+class DiskCache:
+    """One pickle file per entry; expiry is judged from the file's mtime."""
+
+    def __init__(self, directory, max_entries=256, ttl=30):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode()).hexdigest() + '.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+        return value if stored_key == key else None
+
+    def set(self, key, value, size=0):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing response cache entry: {e}")
+            return
+        self._writes += 1
+        if self._writes % 32 == 0:
+            self._prune()
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.directory, name))
+
+    def _prune(self):
+        try:
+            entries = [os.path.join(self.directory, n) for n in os.listdir(self.directory) if n.endswith('.pkl')]
+            entries.sort(key=os.path.getmtime)
+            for path in entries[:max(0, len(entries) - self.max_entries)]:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def create_cache():
+    backend = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    ttl = float(os.getenv('RESPONSE_CACHE_TTL', 30))
+    max_entries = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    if backend == 'off':
+        return None
+    if backend == 'disk':
+        return DiskCache(os.getenv('RESPONSE_CACHE_DIR', '.cache/responses'), max_entries=max_entries, ttl=ttl)
+    max_bytes = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)) or None
+    return LRUCache(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes)
+
+
+response_cache = create_cache()
+
+
+def data_stamp():
+    """(generation, max id) of the crimes table, through the request's pooled connection."""
+    connection = get_db_connection()
+    if not connection:
+        return None
+    try:
+        return tuple(connection.execute(
+            "SELECT (SELECT user_version FROM pragma_user_version), MAX(id) FROM crimes").fetchone())
+    except sqlite3.Error as e:
+        print(f"Error reading the data stamp: {e}")
+        return None
+    finally:
+        connection.close()
+
+
+def cached_response(view=None, stamp=None):
+    """
+    Cache successful responses of a GET view and answer If-None-Match with 304.
+
+    Use as @cached_response, or @cached_response(stamp=fn) for views that
+    answer from a fitted model; fn() is added to the key.
+    """
+    if view is None:
+        return functools.partial(cached_response, stamp=stamp)
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        current = data_stamp() if response_cache is not None else None
+        if current is None:
+            return view(*args, **kwargs)
+
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), current,
+               stamp() if stamp else None)
+        entry = response_cache.get(key)
+        metrics.increment('cache_requests_total', result='miss' if entry is None else 'hit')
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            body = response.get_data()
+            etag = hashlib.sha1(body).hexdigest()
+            entry = (body, response.mimetype, etag)
+            response_cache.set(key, entry, size=len(body))
+
+        body, mimetype, etag = entry
+        response = Response(body, status=200, mimetype=mimetype)
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    return wrapper
@@ -0,0 +1,379 @@
+"""
+Columnar in-memory copy of the crimes table for analytics and model fits.
+
+The columns the analytics paths need are kept as NumPy arrays in id order:
+
+    id          int64
+    lat, lng    float64, NaN where missing
+    occurred    datetime64[s], NaT where missing or unparseable
+    type_code   int32 index into `types` (crime_type)
+    area_code   int32 index into `areas` (location_description)
+    arrested    bool, False only for arrested = 0 (NULL is not an open case)
+
+Text columns are dictionary-encoded; NULL is stored as '' (as in the
+rollups). The table is read once. Crimes submitted through this process are
+appended as they commit, writes from elsewhere are picked up by reading only
+the rows past the last id held, and only deletions or a rebuilt table (a new
+data generation, see get_data_generation) force a full reload.
+
+Readers get an immutable CrimeColumns snapshot, so a fit never sees a
+half-appended row and never waits on a writer.
+
+Snapshot files
+--------------
+`python -m backend.app.services.column_store` writes the columns to
+COLUMN_STORE_SNAPSHOT, a directory with one .npy file per column and a
+manifest.json holding the format version, the (count, max id, generation)
+fingerprint and the string dictionaries. On boot the store maps those files
+read-only instead of reading the table, then syncs as usual: rows added
+since the snapshot are read past its max id, and a snapshot that no longer
+matches (rows deleted since) is discarded for a full read. A snapshot taken
+before the table was rebuilt (db reset) has an older generation and is never
+mapped, even when its row count and ids match. Workers that map the same
+files share their pages until they append their first row, at which point
+each copies its columns into private memory.
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from backend.app.services.database import db_connection, get_data_fingerprint, get_data_version
+from backend.app.services.metrics import metrics
+
+# Seconds between checks for writes made outside this process
+COLUMN_STORE_CHECK_INTERVAL = float(os.getenv('COLUMN_STORE_CHECK_INTERVAL', 30))
+# Snapshot directory mapped on boot when present; empty to always read the table
+COLUMN_STORE_SNAPSHOT = os.getenv('COLUMN_STORE_SNAPSHOT', 'models/crime_columns')
+# 2: the fingerprint carries the data generation
+# 3: arrested is True for NULL, so open cases match arrested = 0
+SNAPSHOT_FORMAT = 3
+LOAD_CHUNK = 100000
+INITIAL_CAPACITY = 1024
+
+COLUMN_DTYPES = {
+    'id': np.int64,
+    'lat': np.float64,
+    'lng': np.float64,
+    'occurred': 'datetime64[s]',
+    'type_code': np.int32,
+    'area_code': np.int32,
+    'arrested': np.bool_,
+}
+
+# Coordinates that are not numbers (text written around the API) read as NaN
+_ROWS_SQL = """
+SELECT id,
+       CASE WHEN typeof(latitude) IN ('real', 'integer') THEN latitude END,
+       CASE WHEN typeof(longitude) IN ('real', 'integer') THEN longitude END,
+       CAST(strftime('%s', occurrence_date) AS INTEGER),
+       COALESCE(crime_type, ''), COALESCE(location_description, ''), NOT IFNULL(arrested = 0, 0)
+FROM crimes
+"""
+# Epoch seconds stored for NULL occurrence dates; reads back as NaT
+NAT_SECONDS = np.iinfo(np.int64).min
+
+
+def fetch_row(connection, crime_id):
+    """One crime in the shape ColumnStore.record() takes; use it in the inserting transaction."""
+    cursor = connection.cursor()
+    cursor.row_factory = None
+    row = cursor.execute(_ROWS_SQL + "WHERE id = ?", (crime_id,)).fetchone()
+    cursor.close()
+    return row
+
+
+class CrimeColumns:
+    """Read-only snapshot of the store. Column arrays share one length and are sorted by id."""
+
+    def __init__(self, arrays, types, areas, generation=0):
+        self.id = arrays['id']
+        self.lat = arrays['lat']
+        self.lng = arrays['lng']
+        self.occurred = arrays['occurred']
+        self.type_code = arrays['type_code']
+        self.area_code = arrays['area_code']
+        self.arrested = arrays['arrested']
+        # Append-only lists shared with the store; codes here never point past their end
+        self.types = types
+        self.areas = areas
+        self.generation = generation
+
+    def __len__(self):
+        return len(self.id)
+
+    @property
+    def fingerprint(self):
+        """(row count, max id, generation), as get_data_fingerprint() reports for the same rows."""
+        return (len(self.id), int(self.id[-1]) if len(self.id) else None, self.generation)
+
+    def located(self):
+        return ~(np.isnan(self.lat) | np.isnan(self.lng))
+
+    def dated(self):
+        return ~np.isnat(self.occurred)
+
+    def points(self):
+        """(lat, lng) of every located crime."""
+        located = self.located()
+        return self.lat[located], self.lng[located]
+
+    def days(self):
+        """Fractional days since 1970-01-01 per row, NaN where undated."""
+        return np.where(self.dated(), self.occurred.astype(np.int64) / 86400, np.nan)
+
+    def type_names(self, rows=slice(None)):
+        return np.asarray(self.types, dtype=object)[self.type_code[rows]]
+
+    def area_names(self, rows=slice(None)):
+        return np.asarray(self.areas, dtype=object)[self.area_code[rows]]
+
+
+def _category(value, categories, lookup):
+    code = lookup.get(value)
+    if code is None:
+        code = lookup[value] = len(categories)
+        categories.append(value)
+    return code
+
+
+def _encode(values, categories, lookup):
+    # Only loads from the table need pandas; booting from a snapshot does not
+    import pandas as pd
+
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    mapping = np.array([_category(value, categories, lookup) for value in uniques], dtype=np.int32)
+    return mapping[codes]
+
+
+def write_snapshot(columns, path=COLUMN_STORE_SNAPSHOT):
+    """
+    Save a CrimeColumns snapshot to `path`. Files are written to a sibling
+    directory and swapped in with renames, so workers that already mapped
+    the previous snapshot keep reading it.
+    """
+    path = os.path.normpath(path)
+    staging = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name in COLUMN_DTYPES:
+        np.save(os.path.join(staging, f"{name}.npy"), getattr(columns, name))
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+        "rows": len(columns),
+        "fingerprint": list(columns.fingerprint),
+        "columns": {name: np.dtype(dtype).str for name, dtype in COLUMN_DTYPES.items()},
+        "types": list(columns.types),
+        "areas": list(columns.areas),
+    }
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+    previous = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, previous)
+    os.replace(staging, path)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+def read_snapshot(path=COLUMN_STORE_SNAPSHOT):
+    """(arrays, manifest) with every column memory-mapped read-only, or None if unusable."""
+    try:
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            print(f"Ignoring crime column snapshot {path}: format {manifest.get('format')}, expected {SNAPSHOT_FORMAT}")
+            return None
+        arrays = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            array = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            if array.dtype != np.dtype(dtype) or len(array) != manifest["rows"]:
+                print(f"Ignoring crime column snapshot {path}: column {name} does not match the manifest")
+                return None
+            # Plain ndarray view; the map stays open as its base
+            arrays[name] = np.asarray(array)
+        return arrays, manifest
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable crime column snapshot {path}: {e}")
+        return None
+
+
+class ColumnStore:
+    def __init__(self, snapshot_path=COLUMN_STORE_SNAPSHOT):
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._arrays = None
+        self._size = 0
+        self._types, self._type_lookup = [], {}
+        self._areas, self._area_lookup = [], {}
+        self._snapshot = None
+        self._generation = 0
+        self._data_version = None
+        self._checked_at = 0.0
+
+    def columns(self):
+        """Current CrimeColumns, catching up with the crimes table first if it may have changed."""
+        if self._snapshot is None or self._is_stale():
+            with self._lock:
+                if self._snapshot is None or self._is_stale():
+                    self._sync(get_data_version())
+        return self._snapshot
+
+    def sync(self):
+        """Catch up with the crimes table now, without waiting for the check interval."""
+        with self._lock:
+            self._sync(get_data_version())
+        return self._snapshot
+
+    def preload(self):
+        try:
+            self.columns()
+        except Exception as e:
+            print(f"Error loading crime column store: {e}")
+
+    def record(self, row, version):
+        """
+        Append one committed crime (from fetch_row); `version` is what
+        bump_data_version() returned for it. Rows that do not directly follow
+        what the store holds are left to the next sync.
+        """
+        with self._lock:
+            if self._snapshot is None or row is None or self._data_version != version - 1:
+                return
+            last_id = self._snapshot.fingerprint[1] or 0
+            if row[0] != last_id + 1:
+                return
+            self._append([row])
+            self._data_version = version
+
+    def _is_stale(self):
+        if get_data_version() != self._data_version:
+            return True
+        return time.monotonic() - self._checked_at >= COLUMN_STORE_CHECK_INTERVAL
+
+    @metrics.timed('store_sync')
+    def _sync(self, version):
+        with db_connection() as connection:
+            # One read transaction, so the count and the rows agree
+            owns_transaction = not connection.in_transaction
+            if owns_transaction:
+                connection.execute("BEGIN")
+            try:
+                count, max_id, generation = get_data_fingerprint(connection)
+                if self._snapshot is None and self.snapshot_path:
+                    self._open_snapshot(generation)
+                if self._snapshot is None or generation != self._generation or count < len(self._snapshot):
+                    # First load, a rebuilt table (db reset) or deletions
+                    self._load(connection, count, generation)
+                elif (count, max_id, generation) != self._snapshot.fingerprint:
+                    added = self._append_from(connection, self._snapshot.fingerprint[1] or 0)
+                    if len(self._snapshot) != count:
+                        # Rows at or below the last id were deleted
+                        print(f"Crime column store missed deletions ({added} rows appended); reloading.")
+                        self._load(connection, count, generation)
+            finally:
+                if owns_transaction:
+                    connection.commit()
+        self._data_version = version
+        self._checked_at = time.monotonic()
+
+    def _open_snapshot(self, generation):
+        snapshot = read_snapshot(self.snapshot_path)
+        if snapshot is None:
+            return
+        arrays, manifest = snapshot
+        if manifest["fingerprint"][2] != generation:
+            print(f"Ignoring crime column snapshot {self.snapshot_path}: written for data generation "
+                  f"{manifest['fingerprint'][2]}, the database is at {generation}")
+            return
+        self._generation = generation
+        # Appends outgrow these (capacity == rows) and copy them into private memory
+        self._arrays = arrays
+        self._size = manifest["rows"]
+        self._types = list(manifest["types"])
+        self._type_lookup = {value: code for code, value in enumerate(self._types)}
+        self._areas = list(manifest["areas"])
+        self._area_lookup = {value: code for code, value in enumerate(self._areas)}
+        self._publish()
+        print(f"Mapped {self._size} crimes from snapshot {self.snapshot_path} ({manifest['created_at']})")
+
+    def _load(self, connection, count, generation):
+        self._generation = generation
+        self._arrays = {name: np.empty(max(count, INITIAL_CAPACITY), dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        self._size = 0
+        self._types, self._type_lookup = [], {}
+        self._areas, self._area_lookup = [], {}
+        self._append_from(connection, 0)
+
+    def _append_from(self, connection, after_id):
+        cursor = connection.cursor()
+        cursor.row_factory = None
+        cursor.execute(_ROWS_SQL + "WHERE id > ? ORDER BY id", (after_id,))
+        added = 0
+        while True:
+            batch = cursor.fetchmany(LOAD_CHUNK)
+            if not batch:
+                break
+            self._append(batch)
+            added += len(batch)
+        cursor.close()
+        if not added:
+            self._publish()
+        return added
+
+    def _append(self, rows):
+        ids, lat, lng, seconds, types, areas, arrested = zip(*rows)
+        seconds = np.array([NAT_SECONDS if s is None else s for s in seconds], dtype=np.int64)
+        chunk = {
+            'id': np.array(ids, dtype=np.int64),
+            'lat': np.array(lat, dtype=np.float64),
+            'lng': np.array(lng, dtype=np.float64),
+            'occurred': seconds.view('datetime64[s]'),
+            'type_code': _encode(types, self._types, self._type_lookup),
+            'area_code': _encode(areas, self._areas, self._area_lookup),
+            'arrested': np.array(arrested, dtype=np.bool_),
+        }
+
+        start, end = self._size, self._size + len(rows)
+        if self._arrays is None or end > len(self._arrays['id']):
+            # New buffers: snapshots already handed out keep the old ones
+            capacity = max(INITIAL_CAPACITY, end, 2 * self._size)
+            grown = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+            if self._arrays is not None:
+                for name, array in grown.items():
+                    array[:start] = self._arrays[name][:start]
+            self._arrays = grown
+        for name, values in chunk.items():
+            self._arrays[name][start:end] = values
+        self._size = end
+        self._publish()
+
+    def _publish(self):
+        arrays = {name: array[:self._size] for name, array in (self._arrays or {}).items()}
+        if not arrays:
+            arrays = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        self._snapshot = CrimeColumns(arrays, self._types, self._areas, self._generation)
+
+
+crime_store = ColumnStore()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a memory-mappable snapshot of the crimes table.")
+    parser.add_argument('--output', default=COLUMN_STORE_SNAPSHOT or 'models/crime_columns')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # Read the table itself rather than an older snapshot
+    columns = ColumnStore(snapshot_path=None).columns()
+    manifest = write_snapshot(columns, args.output)
+    print(f"Wrote {manifest['rows']} crimes ({len(manifest['types'])} types, {len(manifest['areas'])} areas) "
+          f"to {args.output} in {time.perf_counter() - start:.2f}s")
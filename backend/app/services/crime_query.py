@@ -0,0 +1,316 @@
+import base64
+import json
+import math
+from datetime import datetime
+
+import numpy as np
+
+from backend.app.services.metrics import metrics
+
+# Columns that may be requested through ?fields=. Selecting them by name (rather
+# than SELECT *) also normalizes the legacy 'arrestED' spelling to 'arrested'.
+CRIME_FIELDS = (
+    'id', 'crime_id', 'crime_type', 'description', 'occurrence_date',
+    'latitude', 'longitude', 'location_description', 'arrested', 'domestic',
+    'district', 'ward', 'community_area', 'updated_on'
+)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+
+DEFAULT_RADIUS_KM = 2
+MAX_RADIUS_KM = 50
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+# Candidates read per /near request, as a multiple of limit; the extra rows
+# absorb the flat-earth ordering's error near the cut
+NEAR_OVERFETCH = 2
+
+# Query arguments that switch /api/crimes into paginated mode
+PAGE_ARGS = ('limit', 'cursor', 'fields', 'type', 'start', 'end', 'bbox')
+
+
+def parse_fields(raw):
+    if not raw:
+        return CRIME_FIELDS
+    fields = tuple(f.strip() for f in raw.split(',') if f.strip())
+    unknown = [f for f in fields if f not in CRIME_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields or CRIME_FIELDS
+
+
+def parse_limit(raw):
+    if raw is None or raw == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _parse_date(raw, name):
+    try:
+        datetime.fromisoformat(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date (YYYY-MM-DD[ HH:MM:SS])")
+    return raw
+
+
+def parse_bbox(raw):
+    # GeoJSON order: min_lng,min_lat,max_lng,max_lat
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in raw.split(','))
+    except ValueError:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    # NaN would slip past every comparison below
+    if not all(map(math.isfinite, (min_lng, min_lat, max_lng, max_lat))):
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    if min_lng > max_lng or min_lat > max_lat:
+        raise ValueError("bbox minimums must not exceed maximums")
+    return (min_lng, min_lat, max_lng, max_lat)
+
+
+def parse_coordinates(lat, lng):
+    """Return (lat, lng) as floats, raising ValueError unless both are numbers in range."""
+    try:
+        lat = float(lat)
+        lng = float(lng)
+    except (TypeError, ValueError):
+        raise ValueError("lat and lng are required numbers")
+    # NaN fails these comparisons too
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat/lng out of range")
+    return lat, lng
+
+
+def parse_submission(data):
+    """Return (crime_type, description, date, lat, lng, location) from a submitted report.
+
+    Raises ValueError for a missing or malformed field, so nothing is queued for writing.
+    """
+    for name in ('type', 'description', 'date', 'location'):
+        if not isinstance(data.get(name), str):
+            raise ValueError(f"{name} is required and must be a string")
+    if not data['type'].strip():
+        raise ValueError("type must not be empty")
+    occurred = _parse_date(data['date'], 'date')
+    lat, lng = parse_coordinates(data.get('lat'), data.get('lng'))
+    return data['type'], data['description'], occurred, lat, lng, data['location']
+
+
+def parse_point(args):
+    """Return (lat, lng, radius_km) from request args."""
+    lat, lng = parse_coordinates(args.get('lat'), args.get('lng'))
+    try:
+        radius_km = float(args.get('radius_km') or DEFAULT_RADIUS_KM)
+    except ValueError:
+        raise ValueError("radius_km must be a number")
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValueError(f"radius_km must be between 0 and {MAX_RADIUS_KM}")
+    return lat, lng, radius_km
+
+
+def parse_filters(args):
+    """Build the filter dict from request args: type, start (inclusive), end (exclusive), bbox."""
+    filters = {}
+
+    if args.get('type'):
+        filters['types'] = [t.strip() for t in args['type'].split(',') if t.strip()]
+    if args.get('start'):
+        filters['start'] = _parse_date(args['start'], 'start')
+    if args.get('end'):
+        filters['end'] = _parse_date(args['end'], 'end')
+    if args.get('bbox'):
+        filters['bbox'] = parse_bbox(args['bbox'])
+
+    return filters
+
+
+def build_where(filters):
+    clauses = []
+    params = []
+
+    if filters.get('types'):
+        clauses.append(f"crime_type IN ({', '.join('?' * len(filters['types']))})")
+        params.extend(filters['types'])
+    if filters.get('start'):
+        clauses.append("occurrence_date >= ?")
+        params.append(filters['start'])
+    if filters.get('end'):
+        clauses.append("occurrence_date < ?")
+        params.append(filters['end'])
+    if filters.get('bbox'):
+        min_lng, min_lat, max_lng, max_lat = filters['bbox']
+        clauses.append("latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+        params.extend([min_lat, max_lat, min_lng, max_lng])
+
+    return clauses, params
+
+
+def encode_cursor(occurrence_date, row_id):
+    raw = json.dumps([occurrence_date, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError
+        occurrence_date, row_id = value
+        if not isinstance(row_id, int) or isinstance(row_id, bool) or \
+                not (occurrence_date is None or isinstance(occurrence_date, str)):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return occurrence_date, row_id
+
+
+@metrics.timed('sql', op='crimes_page')
+def fetch_crimes_page(connection, fields=CRIME_FIELDS, filters=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page ordered by occurrence_date DESC, id DESC.
+
+    Pages are addressed by keyset rather than OFFSET so every page is an index
+    seek on (occurrence_date, id). Rows without a date sort last, as in the
+    unpaginated listing, and are paged by id alone.
+    """
+    filters = filters or {}
+    select_cols = list(fields) + [c for c in ('occurrence_date', 'id') if c not in fields]
+    columns = ', '.join(select_cols)
+    base_clauses, base_params = build_where(filters)
+
+    rows = []
+    after = decode_cursor(cursor) if cursor else None
+
+    # 1. Dated rows
+    if after is None or after[0] is not None:
+        clauses = base_clauses + ["occurrence_date IS NOT NULL"]
+        params = list(base_params)
+        if after is not None:
+            clauses.append("(occurrence_date, id) < (?, ?)")
+            params.extend(after)
+        query = f"SELECT {columns} FROM crimes WHERE {' AND '.join(clauses)} ORDER BY occurrence_date DESC, id DESC LIMIT ?"
+        rows.extend(connection.execute(query, params + [limit + 1]).fetchall())
+
+    # 2. Undated rows, once the dated ones are exhausted
+    if len(rows) <= limit:
+        clauses = base_clauses + ["occurrence_date IS NULL"]
+        params = list(base_params)
+        if after is not None and after[0] is None:
+            clauses.append("id < ?")
+            params.append(after[1])
+        query = f"SELECT {columns} FROM crimes WHERE {' AND '.join(clauses)} ORDER BY id DESC LIMIT ?"
+        rows.extend(connection.execute(query, params + [limit + 1 - len(rows)]).fetchall())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['occurrence_date'], last['id'])
+
+    return [{f: row[f] for f in fields} for row in rows], next_cursor
+
+
+def iter_crime_batches(connection, fields=CRIME_FIELDS, filters=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of row dicts straight off the sqlite cursor, batch_size at a time."""
+    clauses, params = build_where(filters or {})
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = f"SELECT {', '.join(fields)} FROM crimes {where} ORDER BY occurrence_date DESC, id DESC"
+
+    cursor = connection.execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [dict(zip(fields, row)) for row in rows]
+    finally:
+        cursor.close()
+
+
+def _rtree_clause(bbox):
+    # Candidate ids from the R*Tree; build_where's exact BETWEEN re-checks them
+    min_lng, min_lat, max_lng, max_lat = bbox
+    clause = ("id IN (SELECT id FROM crimes_rtree "
+              "WHERE min_lat <= ? AND max_lat >= ? AND min_lng <= ? AND max_lng >= ?)")
+    return clause, [max_lat, min_lat, max_lng, min_lng]
+
+
+@metrics.timed('sql', op='crimes_bbox')
+def fetch_crimes_bbox(connection, bbox, fields=CRIME_FIELDS, filters=None, limit=MAX_PAGE_SIZE):
+    """Return (rows, truncated): up to limit crimes inside bbox, newest first."""
+    filters = dict(filters or {}, bbox=bbox)
+    clauses, params = build_where(filters)
+    rtree_clause, rtree_params = _rtree_clause(bbox)
+    # Unary + keeps the planner from walking the whole date index in order
+    query = (f"SELECT {', '.join(fields)} FROM crimes WHERE {rtree_clause} AND {' AND '.join(clauses)} "
+             f"ORDER BY +occurrence_date DESC, id DESC LIMIT ?")
+    rows = connection.execute(query, rtree_params + params + [limit + 1]).fetchall()
+    return [{f: row[f] for f in fields} for row in rows[:limit]], len(rows) > limit
+
+
+def radius_bbox(lat, lng, radius_km):
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return (max(lng - dlng, -180), max(lat - dlat, -90), min(lng + dlng, 180), min(lat + dlat, 90))
+
+
+def haversine_km(lat, lng, lats, lngs):
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def flat_distance_sq(lat, lng, bbox):
+    """
+    SQL for a squared flat-earth distance to (lat, lng) in degrees, and its params.
+
+    Longitude is scaled by the smallest cos(lat) in the box, so the value
+    never exceeds the true (haversine) distance: cutting at the radius keeps
+    every row inside the circle, and the ordering is off by well under 1% at
+    the radii served.
+    """
+    scale = min(math.cos(math.radians(bbox[1])), math.cos(math.radians(bbox[3])))
+    sql = "((latitude - ?) * (latitude - ?) + (longitude - ?) * (longitude - ?) * ?)"
+    return sql, [lat, lat, lng, lng, scale * scale]
+
+
+@metrics.timed('sql', op='crimes_near')
+def fetch_crimes_near(connection, lat, lng, radius_km, fields=CRIME_FIELDS, filters=None, limit=DEFAULT_PAGE_SIZE):
+    """Return up to limit crimes within radius_km of (lat, lng), nearest first, with distance_km."""
+    bbox = radius_bbox(lat, lng, radius_km)
+    filters = dict(filters or {}, bbox=bbox)
+    clauses, params = build_where(filters)
+    rtree_clause, rtree_params = _rtree_clause(bbox)
+    distance_sql, distance_params = flat_distance_sq(lat, lng, bbox)
+    # Radius in degrees of latitude on the haversine sphere, with room for rounding
+    reach = math.degrees(radius_km / EARTH_RADIUS_KM) * 1.001
+    select_cols = list(fields) + [c for c in ('latitude', 'longitude') if c not in fields]
+    # SQLite keeps only the nearest candidates (a top-N sort), so a dense area
+    # costs Python limit * NEAR_OVERFETCH rows instead of every R*Tree match
+    query = (f"SELECT {', '.join(select_cols)} FROM crimes "
+             f"WHERE {rtree_clause} AND {' AND '.join(clauses)} AND {distance_sql} <= ? "
+             f"ORDER BY {distance_sql} LIMIT ?")
+    rows = connection.execute(query, rtree_params + params + distance_params + [reach * reach]
+                              + distance_params + [limit * NEAR_OVERFETCH]).fetchall()
+    if not rows:
+        return []
+
+    # Exact distances for the candidates: cut to the circle and sort
+    distances = haversine_km(lat, lng, [r['latitude'] for r in rows], [r['longitude'] for r in rows])
+    inside = np.flatnonzero(distances <= radius_km)
+    nearest = inside[np.argsort(distances[inside], kind='stable')][:limit]
+    results = []
+    for i in nearest:
+        row = {f: rows[i][f] for f in fields}
+        row['distance_km'] = round(float(distances[i]), 3)
+        results.append(row)
+    return results
@@ -1,28 +1,268 @@
 import sqlite3
 import os
+import re
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from flask import g, has_app_context
 
 load_dotenv()
 
 DB_PATH = os.getenv('SQLITE_DB_PATH', 'crime_data.db')
 
-def get_db_connection():
-    try:
-        connection = sqlite3.connect(DB_PATH)
+# Idle connections kept open per process; extra ones are opened on demand and
+# closed when released, so callers never wait on the pool.
+DB_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', 8))
+
+# PRAGMAs applied to every new connection. SQLITE_PRAGMAS="name=value;..."
+# overrides or extends these.
+#   journal_mode=WAL     readers no longer block on (or block) the writer
+#   synchronous=NORMAL   fsync at checkpoints instead of every commit; safe with WAL
+#   cache_size=-20000    ~20 MB page cache per connection
+#   mmap_size            read pages through a 256 MB memory map
+#   busy_timeout         wait up to 5 s for the write lock instead of failing
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': '-20000',
+    'mmap_size': '268435456',
+    'busy_timeout': '5000',
+    'temp_store': 'MEMORY',
+}
+
+# Indexes backing the keyset-paginated and filtered crime queries.
+# (occurrence_date, id) matches the ORDER BY of /api/crimes so a page is an
+# index seek instead of a full sort; the others serve the type/bbox filters.
+CRIME_INDEXES = {
+    'idx_crimes_occurrence': "CREATE INDEX IF NOT EXISTS idx_crimes_occurrence ON crimes (occurrence_date, id)",
+    'idx_crimes_type_occurrence': "CREATE INDEX IF NOT EXISTS idx_crimes_type_occurrence ON crimes (crime_type, occurrence_date, id)",
+    'idx_crimes_lat_lng': "CREATE INDEX IF NOT EXISTS idx_crimes_lat_lng ON crimes (latitude, longitude)",
+}
+
+# R*Tree over crime coordinates for radius and viewport queries, kept in sync
+# with crimes by triggers. Points are stored as zero-size boxes; the R*Tree
+# rounds to 32-bit floats, so callers re-check the exact columns.
+SPATIAL_INDEX_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS crimes_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+    """CREATE TRIGGER IF NOT EXISTS crimes_rtree_insert AFTER INSERT ON crimes
+       WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL
+       BEGIN
+           INSERT INTO crimes_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS crimes_rtree_update AFTER UPDATE OF latitude, longitude ON crimes
+       BEGIN
+           DELETE FROM crimes_rtree WHERE id = old.id;
+           INSERT INTO crimes_rtree SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+           WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS crimes_rtree_delete AFTER DELETE ON crimes
+       BEGIN
+           DELETE FROM crimes_rtree WHERE id = old.id;
+       END""",
+]
+
+def parse_pragmas(raw):
+    pragmas = {}
+    for item in (raw or '').split(';'):
+        if not item.strip():
+            continue
+        name, _, value = item.partition('=')
+        name, value = name.strip(), value.strip()
+        if not re.fullmatch(r'[a-z_]+', name) or not re.fullmatch(r'[A-Za-z0-9_-]+', value):
+            raise ValueError(f"Invalid SQLite PRAGMA setting: {item!r}")
+        pragmas[name] = value
+    return pragmas
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool."""
+    pool = None
+    request_bound = False
+
+    def close(self):
+        if self.request_bound:
+            # Released by the Flask teardown at the end of the request
+            return
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+class ConnectionPool:
+    def __init__(self, path, size=DB_POOL_SIZE, pragmas=None):
+        self.path = path
+        self.size = size
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, factory=PooledConnection, check_same_thread=False)
         connection.row_factory = sqlite3.Row  # This allows accessing columns by name
+        for name, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+        connection.pool = self
         return connection
+
+    def acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connections must not cross a fork; start over in the child
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, connection):
+        if connection.in_transaction:
+            connection.rollback()
+        connection.row_factory = sqlite3.Row
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.size:
+                self._idle.append(connection)
+                return
+        sqlite3.Connection.close(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            sqlite3.Connection.close(connection)
+
+_pool = ConnectionPool(DB_PATH, pragmas={**DEFAULT_PRAGMAS, **parse_pragmas(os.getenv('SQLITE_PRAGMAS'))})
+
+def get_db_connection():
+    """
+    Return a pooled connection; close() gives it back to the pool.
+
+    Inside a Flask request every call returns the same connection, which is
+    released by the app-context teardown registered in init_app().
+    """
+    try:
+        if has_app_context():
+            connection = g.get('_db_connection')
+            if connection is None:
+                connection = _pool.acquire()
+                connection.request_bound = True
+                g._db_connection = connection
+            return connection
+        return _pool.acquire()
     except Exception as e:
         print(f"Error connecting to SQLite: {e}")
         return None
 
+@contextmanager
+def db_connection():
+    connection = get_db_connection()
+    if not connection:
+        raise sqlite3.OperationalError("Database connection failed")
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+def release_request_connection(exception=None):
+    connection = g.pop('_db_connection', None)
+    if connection is not None:
+        connection.request_bound = False
+        connection.close()
+
+def init_app(app):
+    app.teardown_appcontext(release_request_connection)
+
+# Materialized counts maintained by backend/app/services/rollups.py. Kept out
+# of schema.sql because init_db's MySQL-to-SQLite rewrites would mangle the
+# composite primary key.
+ROLLUP_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crime_rollups (
+    dimension TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    open_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, bucket)
+)
+"""
+
+# In-process write counter. Write endpoints bump it after committing so caches
+# and models can tell their view of the crimes table is out of date without
+# querying the database.
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+def bump_data_version():
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+        return _data_version
+
+def get_data_version():
+    return _data_version
+
+def get_data_generation(connection):
+    # Bumped by init_db. It lives in the database header (user_version), so
+    # every process sees it and a rebuilt table with the same row count and
+    # ids 1..N is still told apart from the one it replaced.
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+def get_data_fingerprint(connection):
+    # Catches writes made by other processes (loaders, other workers, db resets)
+    row = connection.execute("SELECT COUNT(*), MAX(id) FROM crimes").fetchone()
+    return (row[0], row[1], get_data_generation(connection))
+
+def ensure_indexes(connection=None):
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_db_connection()
+        if not connection:
+            return
+    try:
+        for statement in CRIME_INDEXES.values():
+            connection.execute(statement)
+        connection.commit()
+    except Exception as e:
+        print(f"Error creating crime indexes: {e}")
+    finally:
+        if owns_connection:
+            connection.close()
+
+def ensure_spatial_index(connection=None):
+    # Creates the R*Tree on first use and backfills it from existing rows
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_db_connection()
+        if not connection:
+            return
+    try:
+        exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'crimes_rtree'"
+        ).fetchone()
+        for statement in SPATIAL_INDEX_SQL:
+            connection.execute(statement)
+        if not exists:
+            connection.execute(
+                "INSERT INTO crimes_rtree SELECT id, latitude, latitude, longitude, longitude FROM crimes "
+                "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+            )
+        connection.commit()
+    except Exception as e:
+        print(f"Error creating crime spatial index: {e}")
+    finally:
+        if owns_connection:
+            connection.close()
+
 def init_db():
     connection = get_db_connection()
     if connection:
         cursor = connection.cursor()
         try:
+            generation = get_data_generation(connection)
+
             # Drop existing tables if they exist to ensure schema is fresh
             cursor.execute("DROP TABLE IF EXISTS crimes")
             cursor.execute("DROP TABLE IF EXISTS users")
+            cursor.execute("DROP TABLE IF EXISTS crime_rollups")
+            cursor.execute("DROP TABLE IF EXISTS crimes_rtree")
             
             # Read schema.sql and execute
             # Note: SQLite doesn't support 'AUTO_INCREMENT' (uses AUTOINCREMENT) 
@@ -51,6 +291,11 @@ def init_db():
                 for clause in schema_sql.split(';'):
                     if clause.strip():
                         cursor.execute(clause)
+            cursor.execute(ROLLUP_TABLE_SQL)
+            # PRAGMA takes no bound parameters; generation is an int from the header
+            cursor.execute(f"PRAGMA user_version = {int(generation) + 1}")
+            ensure_indexes(connection)
+            ensure_spatial_index(connection)
             connection.commit()
             print(f"SQLite Database initialized at {DB_PATH}.")
         except Exception as e:
@@ -0,0 +1,133 @@
+"""
+JSON encoding for large query results.
+
+Row payloads are encoded a column at a time rather than as a list of dicts:
+numeric columns go through the C encoder in one call and are split back into
+per-row tokens, string columns through json's C string escaper, and the rows
+are stitched together with their keys in a single join. NaN and infinities
+become null while a column is encoded, so nothing walks the payload
+beforehand to clean it.
+
+    fragment = encode_cursor(connection.execute(query))
+    body = dumps({"crimes": fragment, "count": fragment.rows})
+
+encode_rows() takes sqlite3 rows, encode_frame() a DataFrame and
+encode_columns() names plus any sequences or NumPy arrays. They return a
+RawJSON fragment that dumps() (simplejson, like the app's JSON provider)
+embeds as is.
+"""
+import json
+from itertools import chain, repeat
+from json.encoder import encode_basestring_ascii
+
+import numpy as np
+import simplejson
+
+# Tokens the C encoder writes for non-finite floats
+NON_FINITE = frozenset(('NaN', 'Infinity', '-Infinity'))
+NUMBER_TYPES = frozenset((int, float, bool, type(None)))
+STRING_TYPES = frozenset((str, type(None)))
+
+
+class RawJSON(simplejson.RawJSON):
+    """An encoded list of row objects; `rows` is its length."""
+
+    def __init__(self, encoded_json, rows):
+        super().__init__(encoded_json)
+        self.rows = rows
+
+
+def dumps(obj):
+    """Compact UTF-8 JSON for `obj`; RawJSON fragments are copied in, NaN becomes null.
+
+    Values JSON has no type for (dates, Decimal, bytes) are written as their str().
+    """
+    return simplejson.dumps(obj, ignore_nan=True, separators=(',', ':'), default=str).encode()
+
+
+def _encode_value(value):
+    return simplejson.dumps(value, ignore_nan=True, separators=(',', ':'), default=str)
+
+
+def _encode_numbers(values):
+    # Numbers, booleans and null never contain a comma, so one encoder call
+    # for the whole column can be split back into per-row tokens
+    text = json.dumps(values, separators=(',', ':'))
+    tokens = text[1:-1].split(',')
+    if 'NaN' in text or 'Infinity' in text:
+        tokens = ['null' if token in NON_FINITE else token for token in tokens]
+    return tokens
+
+
+def _encode_strings(values, has_null):
+    if not has_null:
+        return list(map(encode_basestring_ascii, values))
+    return ['null' if v is None else encode_basestring_ascii(v) for v in values]
+
+
+def _encode_array(values):
+    kind = values.dtype.kind
+    if kind == 'b':
+        return np.where(values, 'true', 'false').tolist()
+    if kind in 'iuf':
+        return _encode_numbers(values.tolist())
+    if kind == 'M':
+        text = np.datetime_as_string(values, unit='s')
+        return ['null' if v == 'NaT' else '"' + v + '"' for v in text.tolist()]
+    return _encode_sequence(values.tolist())
+
+
+def _encode_sequence(values):
+    types = set(map(type, values))
+    if types <= NUMBER_TYPES:
+        return _encode_numbers(values)
+    if types <= STRING_TYPES:
+        return _encode_strings(values, type(None) in types)
+    return list(map(_encode_value, values))
+
+
+def encode_column(values):
+    """JSON tokens, one per value, for a list/tuple of Python values or a NumPy array."""
+    if len(values) == 0:
+        return []
+    if isinstance(values, np.ndarray):
+        return _encode_array(values)
+    return _encode_sequence(values)
+
+
+def encode_columns(names, columns):
+    """Encode equal-length columns as a JSON list of {name: value} objects."""
+    names = list(names)
+    columns = list(columns)
+    rows = len(columns[0]) if columns else 0
+    if rows == 0:
+        return RawJSON('[]', 0)
+    if not names:
+        return RawJSON('[' + ','.join(['{}'] * rows) + ']', rows)
+
+    # Interleave '{"a":', a-token, ',"b":', b-token, ..., '},' row by row
+    parts = []
+    for i, (name, values) in enumerate(zip(names, columns)):
+        parts.append(repeat(('{' if i == 0 else ',') + encode_basestring_ascii(str(name)) + ':'))
+        parts.append(encode_column(values))
+    parts.append(repeat('},'))
+    body = ''.join(chain.from_iterable(zip(*parts)))
+    return RawJSON('[' + body[:-1] + ']', rows)
+
+
+def encode_rows(names, rows):
+    """Encode a list of row tuples (or sqlite3.Row) with the given column names."""
+    if not rows:
+        return RawJSON('[]', 0)
+    return encode_columns(names, zip(*rows))
+
+
+def encode_cursor(cursor):
+    """Fetch everything left on a sqlite3 cursor and encode it."""
+    names = [column[0] for column in cursor.description]
+    return encode_rows(names, cursor.fetchall())
+
+
+def encode_frame(df):
+    """Encode a DataFrame column-wise, as to_dict(orient='records') would be."""
+    return encode_columns(df.columns, (df[name].to_numpy() for name in df.columns))
@@ -0,0 +1,267 @@
+"""
+Request and hot-path metrics, exposed in Prometheus text format at /api/metrics.
+
+init_app() times every request and records the response size, labelled by
+route rule, method and status. Inside the handlers, timer() / timed() split
+that time into sections: SQL, serialization, model loads and fits and
+column store syncs.
+
+    with metrics.timer('sql', op='crimes_all'):
+        rows = connection.execute(query).fetchall()
+
+Every series is a summary: a count, a sum and p50/p95/p99 over its last
+METRICS_RESERVOIR observations. Values are per process, so with several
+workers each scrape sees the worker that answered it.
+
+Slow-request profiling is opt-in. With METRICS_SLOW_REQUEST_MS set, a sampled
+share (METRICS_PROFILE_SAMPLE) of requests has its thread's stack sampled
+every METRICS_PROFILE_INTERVAL_MS; requests that end up slower than the
+threshold print their hottest stacks in collapsed (flamegraph) format.
+"""
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+METRICS_RESERVOIR = int(os.getenv('METRICS_RESERVOIR', 1024))
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = 'crime_api'
+SLOW_REQUEST_MS = float(os.getenv('METRICS_SLOW_REQUEST_MS', 0))
+PROFILE_SAMPLE = float(os.getenv('METRICS_PROFILE_SAMPLE', 1.0))
+PROFILE_INTERVAL_MS = float(os.getenv('METRICS_PROFILE_INTERVAL_MS', 5))
+PROFILE_TOP_STACKS = 15
+
+FAMILIES = {
+    'request_duration_seconds': ('summary', "Request latency by route, method and status."),
+    'response_bytes': ('summary', "Response body size by route, method and status."),
+    'section_duration_seconds': ('summary', "Time spent in instrumented sections of request handling and model upkeep."),
+    'cache_requests_total': ('counter', "Response cache lookups by result."),
+}
+
+
+class Summary:
+    def __init__(self, reservoir=METRICS_RESERVOIR):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=reservoir)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in items) + '}'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._summaries = {}   # (family, sorted label items) -> Summary
+        self._counters = Counter()
+
+    def observe(self, family, value, **labels):
+        key = (family, tuple(sorted(labels.items())))
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = Summary()
+            summary.observe(value)
+
+    def increment(self, family, amount=1, **labels):
+        with self._lock:
+            self._counters[(family, tuple(sorted(labels.items())))] += amount
+
+    @contextmanager
+    def timer(self, section, **labels):
+        """Time a block into section_duration_seconds, tagged with the current route."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('section_duration_seconds', time.perf_counter() - start,
+                         section=section, endpoint=current_endpoint(), **labels)
+
+    def timed(self, section, **labels):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(section, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self):
+        with self._lock:
+            summaries = [(key, s.count, s.total, s.quantiles()) for key, s in self._summaries.items()]
+            counters = list(self._counters.items())
+
+        lines = []
+        for family, (kind, help_text) in FAMILIES.items():
+            name = f'{PREFIX}_{family}'
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            if kind == 'summary':
+                for (series, labels), count, total, quantiles in sorted(summaries):
+                    if series != family:
+                        continue
+                    for q, value in quantiles.items():
+                        lines.append(f'{name}{_labels(labels, quantile=q)} {value:.6g}')
+                    lines.append(f'{name}_sum{_labels(labels)} {total:.6g}')
+                    lines.append(f'{name}_count{_labels(labels)} {count}')
+            else:
+                for (series, labels), value in sorted(counters):
+                    if series == family:
+                        lines.append(f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._summaries.clear()
+            self._counters.clear()
+
+
+def current_endpoint():
+    if not has_request_context():
+        return 'background'
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of registered request threads from one background thread."""
+
+    def __init__(self, threshold_ms=SLOW_REQUEST_MS, interval_ms=PROFILE_INTERVAL_MS, sample=PROFILE_SAMPLE):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.sample = sample
+        self._lock = threading.Lock()
+        self._active = {}   # thread id -> Counter of collapsed stacks
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def start(self):
+        if not self.enabled or random.random() >= self.sample:
+            return False
+        self._ensure_thread()
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+        self._wake.set()
+        return True
+
+    def finish(self, duration, label):
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if stacks is None or duration < self.threshold:
+            return
+        total = sum(stacks.values())
+        print(f"Slow request: {label} took {duration * 1000:.0f} ms ({total} stack samples)")
+        for stack, count in stacks.most_common(PROFILE_TOP_STACKS):
+            print(f"  {stack} {count}")
+
+    def _ensure_thread(self):
+        # One sampler per process; a forked worker starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._active = {}
+                self._thread = threading.Thread(target=self._loop, name='slow-request-profiler', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                idle = not self._active
+            if idle:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, stacks in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[collapse(frame)] += 1
+            time.sleep(self.interval)
+
+
+def collapse(frame):
+    """Stack of a frame as 'outer;...;inner' of file:function:line entries."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+
+metrics = MetricsRegistry()
+profiler = SlowRequestProfiler()
+
+
+def _start_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_profiled = profiler.start()
+
+
+def _finish_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return response
+    duration = time.perf_counter() - start
+    labels = {"endpoint": current_endpoint(), "method": request.method, "status": response.status_code}
+    metrics.observe('request_duration_seconds', duration, **labels)
+    if response.content_length is not None:
+        metrics.observe('response_bytes', response.content_length, **labels)
+    elif response.is_streamed:
+        response.response = _counting(response.response, labels)
+    if g.pop('_metrics_profiled', False):
+        profiler.finish(duration, f"{request.method} {request.full_path}")
+    return response
+
+
+def _counting(chunks, labels):
+    # Streamed bodies are only sized once the last chunk has gone out
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk) if isinstance(chunk, bytes) else len(chunk.encode())
+            yield chunk
+    finally:
+        metrics.observe('response_bytes', size, **labels)
+
+
+def metrics_view():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/api/metrics', 'metrics', metrics_view)
@@ -0,0 +1,181 @@
+"""
+Background news fetcher behind /api/predict/safety.
+
+Feeds are fetched on a small thread pool and cached per area:
+
+- a fresh entry (younger than NEWS_FEED_TTL) is returned straight from memory;
+- a stale entry (younger than NEWS_FEED_MAX_STALE) is returned immediately
+  while one background refresh runs (stale-while-revalidate);
+- a missing entry starts a fetch and waits at most NEWS_FEED_COLD_WAIT seconds
+  for it, otherwise the caller gets FALLBACK_SUMMARY.
+
+Only one fetch per area is ever in flight; concurrent callers share it.
+
+The feed source is pluggable. NEWS_FEED_SOURCE=google (default) queries Google
+News RSS; any other value is treated as a local RSS file, or a directory of
+<Area>.xml files, which lets the app run offline or against a stub feed.
+"""
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+NEWS_FEED_TTL = float(os.getenv('NEWS_FEED_TTL', 600))
+NEWS_FEED_MAX_STALE = float(os.getenv('NEWS_FEED_MAX_STALE', 6 * 3600))
+NEWS_FEED_ERROR_TTL = float(os.getenv('NEWS_FEED_ERROR_TTL', 60))
+NEWS_FEED_COLD_WAIT = float(os.getenv('NEWS_FEED_COLD_WAIT', 2))
+NEWS_FEED_WORKERS = int(os.getenv('NEWS_FEED_WORKERS', 4))
+NEWS_FEED_MAX_AREAS = int(os.getenv('NEWS_FEED_MAX_AREAS', 1024))
+
+HIGH_RISK_KEYWORDS = ['murder', 'arrest', 'killed', 'theft', 'robbery', 'scam', 'fraud', 'rape', 'death']
+ANALYZED_ITEMS = 15
+
+# Used while a feed cannot be fetched (same guess the endpoint made offline)
+FALLBACK_SUMMARY = {"news_count": 5, "sentiment_score": 0, "fallback": True}
+
+
+def parse_rss_titles(text):
+    root = ET.fromstring(text)
+    return [(item.findtext('title') or '') for item in root.findall('.//item')]
+
+
+class GoogleNewsSource:
+    label = "Live Google News (Real-time)"
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+
+    def fetch(self, area):
+        import requests
+
+        rss_url = f"https://news.google.com/rss/search?q={area}+crime+india&hl=en-IN&gl=IN&ceid=IN:en"
+        response = requests.get(rss_url, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_rss_titles(response.text)
+
+
+class FileNewsSource:
+    """RSS read from disk: one file for every area, or <Area>.xml inside a directory."""
+
+    label = "Local news feed"
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, area):
+        path = self.path
+        if os.path.isdir(path):
+            path = os.path.join(path, f"{area}.xml")
+        with open(path, encoding='utf-8') as f:
+            return parse_rss_titles(f.read())
+
+
+def create_source():
+    source = os.getenv('NEWS_FEED_SOURCE', 'google')
+    if source == 'google':
+        return GoogleNewsSource()
+    return FileNewsSource(source)
+
+
+def summarize(titles):
+    """Feed statistics used by the safety score."""
+    sentiment_score = 0
+    for title in titles[:ANALYZED_ITEMS]:
+        title = title.lower()
+        if any(word in title for word in HIGH_RISK_KEYWORDS):
+            sentiment_score += 1
+    return {"news_count": len(titles), "sentiment_score": sentiment_score, "fallback": False}
+
+
+class NewsFeedCache:
+    def __init__(self, source=None, ttl=NEWS_FEED_TTL, max_stale=NEWS_FEED_MAX_STALE,
+                 error_ttl=NEWS_FEED_ERROR_TTL, workers=NEWS_FEED_WORKERS, max_areas=NEWS_FEED_MAX_AREAS):
+        self.source = source if source is not None else create_source()
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.error_ttl = error_ttl
+        self.workers = workers
+        self.max_areas = max_areas
+        self._entries = OrderedDict()   # area -> (fetched_at, expires_at, summary)
+        self._inflight = {}             # area -> Future
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def get(self, area, wait=NEWS_FEED_COLD_WAIT):
+        """Return (summary, stale) for area; FALLBACK_SUMMARY if nothing arrived within wait seconds."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(area)
+            if entry is not None and now - entry[0] <= self.max_stale:
+                self._entries.move_to_end(area)
+                stale = now > entry[1]
+                if stale:
+                    self._refresh(area)
+                return entry[2], stale
+            future = self._refresh(area)
+
+        try:
+            return future.result(wait), False
+        except Exception:
+            return FALLBACK_SUMMARY, False
+
+    def prefetch(self, areas, wait=NEWS_FEED_COLD_WAIT):
+        """Start fetches for every area that needs one and wait for them together."""
+        with self._lock:
+            futures = [self._refresh(area) for area in areas if self._needs_fetch(area)]
+        if futures:
+            wait_futures(futures, timeout=wait)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _needs_fetch(self, area):
+        entry = self._entries.get(area)
+        return entry is None or time.monotonic() > entry[1]
+
+    def _refresh(self, area):
+        # Caller holds self._lock; coalesces onto the fetch already running for area
+        future = self._inflight.get(area)
+        if future is None:
+            future = self._pool().submit(self._fetch, area)
+            self._inflight[area] = future
+        return future
+
+    def _pool(self):
+        # Recreated after fork so pre-forked workers get their own threads
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='news-feed')
+            self._inflight = {}
+            self._pid = os.getpid()
+        return self._executor
+
+    def _fetch(self, area):
+        try:
+            summary = summarize(self.source.fetch(area))
+        except Exception as e:
+            print(f"Internet fetching error: {e}")
+            summary = None
+
+        now = time.monotonic()
+        with self._lock:
+            self._inflight.pop(area, None)
+            previous = self._entries.get(area)
+            if summary is not None:
+                entry = (now, now + self.ttl, summary)
+            elif previous is not None and not previous[2].get('fallback'):
+                # Keep serving the last good feed and retry after error_ttl
+                entry = (previous[0], now + self.error_ttl, previous[2])
+            else:
+                entry = (now, now + self.error_ttl, FALLBACK_SUMMARY)
+            self._entries[area] = entry
+            self._entries.move_to_end(area)
+            while len(self._entries) > self.max_areas:
+                self._entries.popitem(last=False)
+        return entry[2]
+
+
+news_feed = NewsFeedCache()
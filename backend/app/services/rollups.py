@@ -0,0 +1,108 @@
+"""
+Materialized crime counts for the admin analytics endpoints.
+
+crime_rollups holds one row per (dimension, bucket) with the number of crimes
+and open crimes (arrested = 0, as the original COUNT query had it; NULL is
+not open) in it:
+
+    type      crime_type
+    location  location_description
+    hour      strftime('%H', occurrence_date)
+
+A ('version', ROLLUPS_VERSION) row marks what the counts mean; tables from
+an older version are rebuilt at start-up.
+
+Writers call apply_inserted() inside the transaction that inserted the crimes,
+so the dashboards read O(categories) rows instead of scanning crimes.
+
+Rebuild from scratch with: python -m backend.app.services.rollups
+"""
+from backend.app.services.database import get_db_connection, ROLLUP_TABLE_SQL
+
+DIMENSIONS = {
+    'type': "crime_type",
+    'location': "location_description",
+    'hour': "strftime('%H', occurrence_date)",
+}
+# 2: open_count is arrested = 0 again (NULL not open); no 'day' dimension
+ROLLUPS_VERSION = '2'
+
+# NULL can't take part in the (dimension, bucket) primary key, so it is stored as ''
+_AGGREGATE_SQL = """
+INSERT INTO crime_rollups (dimension, bucket, count, open_count)
+SELECT dimension, bucket, COUNT(*), SUM(is_open) FROM (
+    {selects}
+) WHERE true
+GROUP BY dimension, bucket
+ON CONFLICT (dimension, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    open_count = open_count + excluded.open_count
+""".format(selects="\n    UNION ALL ".join(
+    f"SELECT '{name}' AS dimension, COALESCE({expr}, '') AS bucket, IFNULL(arrested = 0, 0) AS is_open FROM crimes WHERE id > :after_id"
+    for name, expr in DIMENSIONS.items()
+))
+
+
+def apply_inserted(connection, after_id):
+    """
+    Add every crime with id > after_id to the rollups. Does not commit.
+
+    Call it in the inserting transaction with after_id = first new rowid - 1.
+    """
+    connection.execute(_AGGREGATE_SQL, {"after_id": after_id})
+
+
+def rebuild_rollups(connection=None):
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_db_connection()
+        if not connection:
+            return
+    try:
+        connection.execute(ROLLUP_TABLE_SQL)
+        connection.execute("DELETE FROM crime_rollups")
+        apply_inserted(connection, 0)
+        connection.execute("INSERT INTO crime_rollups (dimension, bucket) VALUES ('version', ?)", (ROLLUPS_VERSION,))
+        connection.commit()
+    finally:
+        if owns_connection:
+            connection.close()
+
+
+def ensure_rollups():
+    # Databases created before the rollups existed, or by an older version of
+    # them, get them built once
+    connection = get_db_connection()
+    if not connection:
+        return
+    try:
+        exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'crime_rollups'"
+        ).fetchone()
+        current = exists and connection.execute(
+            "SELECT 1 FROM crime_rollups WHERE dimension = 'version' AND bucket = ?", (ROLLUPS_VERSION,)
+        ).fetchone()
+        if not current:
+            rebuild_rollups(connection)
+    except Exception as e:
+        print(f"Error preparing crime rollups: {e}")
+    finally:
+        connection.close()
+
+
+def read_rollups(connection):
+    """Return {dimension: [(bucket, count, open_count), ...]} sorted by count descending."""
+    rollups = {name: [] for name in DIMENSIONS}
+    cursor = connection.execute(
+        "SELECT dimension, bucket, count, open_count FROM crime_rollups WHERE count > 0 ORDER BY count DESC"
+    )
+    for dimension, bucket, count, open_count in cursor.fetchall():
+        if dimension in rollups:
+            rollups[dimension].append((bucket if bucket != '' else None, count, open_count))
+    return rollups
+
+
+if __name__ == "__main__":
+    print("Rebuilding crime rollups...")
+    rebuild_rollups()
+    print("Crime rollups rebuilt.")
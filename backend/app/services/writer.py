@@ -0,0 +1,132 @@
+"""
+Single-writer queue for SQLite.
+
+SQLite allows one writer at a time, so concurrent request threads that each
+open their own write transaction just queue up on the file lock (and give up
+with "database is locked" once busy_timeout runs out). Routing writes through
+one thread removes that contention inside a process, and lets several queued
+writes share a single transaction and fsync.
+
+Each job is a callable taking the writer's connection. Jobs in a batch run in
+their own SAVEPOINT, so one failing job only rolls back itself. A caller that
+gives up waiting (run()'s timeout) cancels its job if the writer has not taken
+it yet and gets WriteTimeout, so nothing is written behind its back; a job
+already taken is waited for, since it will commit.
+
+    crime_id = write_queue.run(lambda connection: insert_crime(connection, data))
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from backend.app.services.database import get_db_connection
+
+# Most jobs committed together, and how long to linger for more once one
+# arrives. The default of 0 only batches what queued up during the previous
+# commit, which keeps single writes fast when the process is busy.
+WRITE_BATCH_SIZE = int(os.getenv('SQLITE_WRITE_BATCH_SIZE', 64))
+WRITE_BATCH_WAIT = float(os.getenv('SQLITE_WRITE_BATCH_WAIT', 0))
+WRITE_TIMEOUT = float(os.getenv('SQLITE_WRITE_TIMEOUT', 30))
+
+
+class WriteTimeout(Exception):
+    """The write was cancelled before it ran; nothing was written."""
+
+
+class WriteQueue:
+    def __init__(self, connect=get_db_connection, max_batch=WRITE_BATCH_SIZE, max_wait=WRITE_BATCH_WAIT):
+        self.connect = connect
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, job):
+        future = Future()
+        self._ensure_thread()
+        self._jobs.put((job, future))
+        return future
+
+    def run(self, job, timeout=WRITE_TIMEOUT):
+        future = self.submit(job)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise WriteTimeout(f"Write not started within {timeout:g}s; nothing was written")
+            # Already taken by the writer: it commits or fails shortly
+            return future.result()
+
+    def _ensure_thread(self):
+        # Started lazily so a pre-forking server gets one writer per worker
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._jobs = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._jobs.get()]
+        while len(batch) < self.max_batch:
+            try:
+                if self.max_wait > 0:
+                    batch.append(self._jobs.get(timeout=self.max_wait))
+                else:
+                    batch.append(self._jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            # Jobs whose callers timed out and cancelled them are dropped here
+            batch = [(job, future) for job, future in self._next_batch() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            connection = self.connect()
+            if not connection:
+                for _, future in batch:
+                    future.set_exception(RuntimeError("Database connection failed"))
+                continue
+            try:
+                self._run_batch(connection, batch)
+            finally:
+                connection.close()
+
+    def _run_batch(self, connection, batch):
+        results = []
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for job, future in batch:
+                connection.execute("SAVEPOINT job")
+                try:
+                    results.append((future, job(connection), None))
+                    connection.execute("RELEASE job")
+                except Exception as e:
+                    connection.execute("ROLLBACK TO job")
+                    connection.execute("RELEASE job")
+                    results.append((future, None, e))
+            connection.commit()
+        except Exception as e:
+            if connection.in_transaction:
+                connection.rollback()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+write_queue = WriteQueue()
@@ -0,0 +1,67 @@
+"""
+Compare hotspot retrain cost: full KMeans refit vs. incremental center updates.
+
+Usage: python -m benchmarks.bench_hotspot_training [--sizes 100000 1000000] [--delta 0.01]
+
+For each table size N the full refit clusters all N points (what
+HotspotModel.train_from_db does), while the incremental path only folds in
+the newly inserted rows (delta * N) via update_centers.
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+from backend.app.models.hotspot_model import INCREMENTAL_CHUNK, update_centers
+
+CITY_CENTERS = np.array([
+    (28.6139, 77.2090),
+    (19.0760, 72.8777),
+    (12.9716, 77.5946),
+    (13.0827, 80.2707),
+    (22.5726, 88.3639),
+])
+
+
+def synthetic_points(n, rng):
+    cities = CITY_CENTERS[rng.integers(0, len(CITY_CENTERS), n)]
+    return cities + rng.uniform(-0.05, 0.05, size=(n, 2))
+
+
+def run(n, delta, n_clusters=10, seed=42):
+    rng = np.random.default_rng(seed)
+    points = synthetic_points(n, rng)
+    new_points = synthetic_points(max(1, int(n * delta)), rng)
+
+    start = time.perf_counter()
+    model = KMeans(n_clusters=n_clusters, random_state=42).fit(points)
+    full_seconds = time.perf_counter() - start
+
+    centers = model.cluster_centers_
+    counts = np.bincount(model.labels_, minlength=n_clusters).astype(float)
+
+    start = time.perf_counter()
+    for i in range(0, len(new_points), INCREMENTAL_CHUNK):
+        centers, counts = update_centers(centers, counts, new_points[i:i + INCREMENTAL_CHUNK])
+    incremental_seconds = time.perf_counter() - start
+
+    return {
+        "rows": n,
+        "new_rows": len(new_points),
+        "full_refit_s": round(full_seconds, 4),
+        "incremental_s": round(incremental_seconds, 4),
+        "speedup": round(full_seconds / incremental_seconds, 1) if incremental_seconds else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--delta', type=float, default=0.01, help="fraction of new rows since the last checkpoint")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'new rows':>10} {'full refit (s)':>15} {'incremental (s)':>16} {'speedup':>8}")
+    for size in args.sizes:
+        r = run(size, args.delta)
+        print(f"{r['rows']:>10} {r['new_rows']:>10} {r['full_refit_s']:>15} {r['incremental_s']:>16} {r['speedup']:>7}x")
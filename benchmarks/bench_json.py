@@ -0,0 +1,157 @@
+"""
+Serialization of the full crime listing: per-row cost, old path vs. json_encoder.
+
+Usage: python -m benchmarks.bench_json [--rows 100000] [--repeat 3] [--null-share 0.05]
+
+Seeds a scratch database with synthetic crimes, clears a share of the
+nullable columns (district, ward, community_area, coordinates) so the
+payload carries NULLs, and encodes the same rows three ways:
+
+    legacy  what GET /api/crimes did: pd.read_sql, to_dict(orient='records'),
+            a recursive clean_nans pass, then simplejson with ignore_nan
+    rows    what it does now: cursor rows encoded column-wise by
+            json_encoder.encode_rows and wrapped by json_encoder.dumps
+    frame   an already loaded DataFrame, to_dict + clean_nans + simplejson
+            vs. json_encoder.encode_frame (the DataFrame path on its own)
+
+Each stage reports its best time over --repeat runs and the cost per row.
+The outputs are parsed back once and checked to hold the same crimes.
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import simplejson
+
+_scratch = tempfile.mkdtemp(prefix='crime-json-')
+os.environ['SQLITE_DB_PATH'] = os.path.join(_scratch, 'json.db')
+
+from backend.app.services import database, json_encoder  # noqa: E402
+from scripts.load_data import bulk_load, iter_sample_frames  # noqa: E402
+
+QUERY = "SELECT * FROM crimes ORDER BY occurrence_date DESC"
+NULLABLE = ('district', 'ward', 'community_area', 'latitude', 'longitude')
+
+
+def clean_nans(data):
+    # The pass GET /api/crimes ran before json_encoder
+    if isinstance(data, float):
+        if math.isnan(data) or np.isnan(data):
+            return None
+    elif isinstance(data, dict):
+        return {k: clean_nans(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [clean_nans(v) for v in data]
+    return data
+
+
+def seed(rows, null_share, seed=42):
+    database.init_db()
+    bulk_load(iter_sample_frames(rows, 100000, seed=seed))
+    rng = np.random.default_rng(seed)
+    with database.db_connection() as connection:
+        for column in NULLABLE:
+            ids = rng.choice(np.arange(1, rows + 1), int(rows * null_share), replace=False)
+            connection.executemany(f"UPDATE crimes SET {column} = NULL WHERE id = ?", [(int(i),) for i in ids])
+        connection.commit()
+
+
+def legacy(connection, stages):
+    df = stages('read_sql', pd.read_sql, QUERY, connection)
+    records = stages('to_dict', df.to_dict, orient='records')
+    crimes = stages('clean_nans', clean_nans, records)
+    return stages('dumps', lambda: simplejson.dumps({"crimes": crimes, "count": len(crimes)}, ignore_nan=True).encode())
+
+
+def encoded_rows(connection, stages):
+    cursor = connection.execute(QUERY)
+    rows = stages('fetchall', cursor.fetchall)
+    crimes = stages('encode_rows', json_encoder.encode_rows, [c[0] for c in cursor.description], rows)
+    return stages('dumps', json_encoder.dumps, {"crimes": crimes, "count": crimes.rows})
+
+
+def frame_legacy(df, stages):
+    crimes = stages('to_dict', lambda: clean_nans(df.to_dict(orient='records')))
+    return stages('dumps', lambda: simplejson.dumps({"crimes": crimes, "count": len(crimes)}, ignore_nan=True).encode())
+
+
+def frame_encoded(df, stages):
+    crimes = stages('encode_frame', json_encoder.encode_frame, df)
+    return stages('dumps', json_encoder.dumps, {"crimes": crimes, "count": crimes.rows})
+
+
+class Stages:
+    """Times named steps of one method, keeping each step's best run."""
+
+    def __init__(self):
+        self.best = {}
+        self._run = {}
+
+    def __call__(self, name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self._run[name] = time.perf_counter() - start
+        return result
+
+    def finish(self):
+        for name, seconds in self._run.items():
+            self.best[name] = min(seconds, self.best.get(name, seconds))
+        self.best['total'] = min(sum(self._run.values()), self.best.get('total', math.inf))
+        self._run = {}
+
+
+def same_crimes(a, b):
+    def by_id(body):
+        return {crime['id']: crime for crime in json.loads(body)['crimes']}
+    # legacy writes float-typed NULL-able integers (8.0), which compare equal to 8
+    return by_id(a) == by_id(b)
+
+
+def run(rows, repeat, null_share):
+    seed(rows, null_share)
+    connection = sqlite3.connect(os.environ['SQLITE_DB_PATH'])
+    connection.row_factory = sqlite3.Row
+    df = pd.read_sql(QUERY, connection)
+
+    methods = {
+        'legacy': lambda s: legacy(connection, s),
+        'rows': lambda s: encoded_rows(connection, s),
+        'frame legacy': lambda s: frame_legacy(df, s),
+        'frame': lambda s: frame_encoded(df, s),
+    }
+    report, bodies = {}, {}
+    for name, method in methods.items():
+        stages = Stages()
+        for _ in range(repeat):
+            bodies[name] = method(stages)
+            stages.finish()
+        report[name] = stages.best
+
+    if not (same_crimes(bodies['legacy'], bodies['rows']) and same_crimes(bodies['frame legacy'], bodies['frame'])):
+        raise SystemExit("Encoded payloads differ from the legacy output")
+    connection.close()
+    return report, {name: len(body) for name, body in bodies.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--null-share', type=float, default=0.05)
+    args = parser.parse_args()
+
+    report, sizes = run(args.rows, args.repeat, args.null_share)
+    print(f"\n{args.rows:,} rows, best of {args.repeat}, {args.null_share:.0%} NULLs in {', '.join(NULLABLE)}")
+    print(f"{'method':>13} {'stage':>12} {'ms':>10} {'us/row':>8}")
+    for name, stages in report.items():
+        for stage, seconds in stages.items():
+            print(f"{name:>13} {stage:>12} {seconds * 1000:>10.1f} {seconds * 1e6 / args.rows:>8.2f}")
+        print(f"{'':>13} {'bytes':>12} {sizes[name]:>10,}")
+    for new, old in (('rows', 'legacy'), ('frame', 'frame legacy')):
+        print(f"{new} vs {old}: {report[old]['total'] / report[new]['total']:.1f}x faster per row")
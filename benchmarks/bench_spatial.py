@@ -0,0 +1,122 @@
+"""
+Radius and viewport crime queries: R*Tree vs. B-tree vs. full scan.
+
+Usage: python -m benchmarks.bench_spatial [--rows 1000000] [--queries 200] [--radius-km 2] [--layout cities national]
+
+Seeds a scratch database with synthetic crimes and times three ways of
+answering the same random queries. Two layouts are tried: 'cities' packs
+every crime into the five sample cities (load_data's generator), 'national'
+spreads them uniformly over India, where a latitude band is much wider than
+the query box.
+
+    full_scan  filter every row on latitude/longitude (NOT INDEXED)
+    btree      the (latitude, longitude) index: a latitude range scan that
+               still reads every row in the band
+    rtree      crimes_rtree, as used by /api/crimes/near and /api/crimes/bbox
+
+Radius queries take the bounding box and cut it to the circle with the same
+haversine step for every method, so only the candidate lookup differs.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+_scratch = tempfile.mkdtemp(prefix='crime-spatial-')
+os.environ['SQLITE_DB_PATH'] = os.path.join(_scratch, 'spatial.db')
+
+from backend.app.services import crime_query, database  # noqa: E402
+from scripts.load_data import LOCATIONS, bulk_load, iter_sample_frames  # noqa: E402
+
+FIELDS = ('id', 'crime_type', 'occurrence_date', 'latitude', 'longitude')
+SCAN_SQL = {
+    'full_scan': "SELECT {cols} FROM crimes NOT INDEXED WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?",
+    'btree': "SELECT {cols} FROM crimes INDEXED BY idx_crimes_lat_lng WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?",
+}
+# Rough bounding box of India for the 'national' layout
+NATIONAL_BOUNDS = ((8.0, 35.0), (68.0, 97.0))
+
+
+def scan_bbox(connection, method, bbox):
+    min_lng, min_lat, max_lng, max_lat = bbox
+    query = SCAN_SQL[method].format(cols=', '.join(FIELDS))
+    rows = connection.execute(query, (min_lat, max_lat, min_lng, max_lng)).fetchall()
+    return [{f: row[f] for f in FIELDS} for row in rows]
+
+
+def scan_near(connection, method, lat, lng, radius_km):
+    rows = scan_bbox(connection, method, crime_query.radius_bbox(lat, lng, radius_km))
+    if not rows:
+        return []
+    distances = crime_query.haversine_km(lat, lng, [r['latitude'] for r in rows], [r['longitude'] for r in rows])
+    return [rows[i] for i in np.flatnonzero(distances <= radius_km)]
+
+
+def national_frames(frames, rng):
+    (min_lat, max_lat), (min_lng, max_lng) = NATIONAL_BOUNDS
+    for frame in frames:
+        frame['latitude'] = rng.uniform(min_lat, max_lat, len(frame))
+        frame['longitude'] = rng.uniform(min_lng, max_lng, len(frame))
+        yield frame
+
+
+def random_points(n, layout, rng):
+    if layout == 'national':
+        (min_lat, max_lat), (min_lng, max_lng) = NATIONAL_BOUNDS
+        return np.column_stack([rng.uniform(min_lat, max_lat, n), rng.uniform(min_lng, max_lng, n)])
+    centers = np.array(LOCATIONS)[rng.integers(0, len(LOCATIONS), n)]
+    return centers + rng.uniform(-0.06, 0.06, size=(n, 2))
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    arr = np.array(samples) * 1000
+    return round(float(np.percentile(arr, 50)), 2), round(float(np.percentile(arr, 99)), 2)
+
+
+def run(rows, queries, radius_km, layout, seed=42):
+    rng = np.random.default_rng(seed)
+    database.init_db()
+    frames = iter_sample_frames(rows, 100000, seed=seed)
+    bulk_load(national_frames(frames, rng) if layout == 'national' else frames)
+
+    points = random_points(queries, layout, rng)
+    # ~1 km viewports, the size of a zoomed-in map
+    boxes = [(lng - 0.005, lat - 0.005, lng + 0.005, lat + 0.005) for lat, lng in points]
+
+    results = []
+    with database.db_connection() as connection:
+        near_args = [(connection, lat, lng, radius_km) for lat, lng in points]
+        for method in ('full_scan', 'btree'):
+            results.append(('near', method) + timed(lambda c, la, ln, r: scan_near(c, method, la, ln, r), near_args))
+        results.append(('near', 'rtree') + timed(
+            lambda c, la, ln, r: crime_query.fetch_crimes_near(c, la, ln, r, FIELDS, limit=10 ** 9), near_args))
+
+        bbox_args = [(connection, box) for box in boxes]
+        for method in ('full_scan', 'btree'):
+            results.append(('bbox', method) + timed(lambda c, b: scan_bbox(c, method, b), bbox_args))
+        results.append(('bbox', 'rtree') + timed(
+            lambda c, b: crime_query.fetch_crimes_bbox(c, b, FIELDS, limit=10 ** 9), bbox_args))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--radius-km', type=float, default=2)
+    parser.add_argument('--layout', nargs='+', choices=('cities', 'national'), default=['cities', 'national'])
+    args = parser.parse_args()
+
+    report = {layout: run(args.rows, args.queries, args.radius_km, layout) for layout in args.layout}
+    print(f"\n{args.rows:,} rows, {args.queries} queries each (radius {args.radius_km} km, 1 km viewports)")
+    print(f"{'layout':>9} {'query':>6} {'method':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for layout, results in report.items():
+        for query, method, p50, p99 in results:
+            print(f"{layout:>9} {query:>6} {method:>10} {p50:>10} {p99:>10}")
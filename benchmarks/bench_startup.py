@@ -0,0 +1,166 @@
+"""
+Cold start of the API: import-time report and first-request latency.
+
+Usage: python -m benchmarks.bench_startup [--rows 100000] [--repeat 5] [--top 20] [--no-snapshot] [--output startup.json]
+
+Seeds a scratch database (with the admin account) and, unless
+--no-snapshot, writes the column store snapshot the server maps at start-up,
+as a deployment would. Then, each in a fresh interpreter:
+
+    1. `python -X importtime -c "import app"` once. The report lists the
+       modules with the largest cumulative import time and the self time
+       summed per top-level package.
+    2. --repeat times: import app and answer GET /api/health and
+       POST /api/auth/login through the test client. Medians are reported
+       for the whole process (interpreter start to exit), `import app` and
+       each first request.
+
+Run it on two commits and compare the medians to see what a change to the
+import graph buys.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.bench_suite import REPO_ROOT, SEED_USERS, STUB_FEED
+
+# Runs in the fresh interpreter; prints its timings as the last stdout line
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+health = client.get('/api/health')
+after_health = time.perf_counter()
+login = client.post('/api/auth/login', json={"email": "admin@police.gov", "password": "admin123"})
+after_login = time.perf_counter()
+print(json.dumps({
+    "import_app_s": imported - start,
+    "first_health_s": after_health - imported,
+    "first_login_s": after_login - after_health,
+    "ready_s": after_login - start,
+    "status": [health.status_code, login.status_code],
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def seed(scratch, rows, snapshot):
+    os.environ['SQLITE_DB_PATH'] = os.path.join(scratch, 'startup.db')
+    from backend.app.services import database
+    from backend.app.services.column_store import ColumnStore, write_snapshot
+    from scripts.load_data import bulk_load, iter_sample_frames
+
+    # init_db reads schema.sql relative to the repo root
+    os.chdir(REPO_ROOT)
+    database.init_db()
+    with database.db_connection() as connection:
+        connection.execute(SEED_USERS)
+        connection.commit()
+    bulk_load(iter_sample_frames(rows, seed=42))
+    if snapshot:
+        write_snapshot(ColumnStore(snapshot_path=None).columns(), os.path.join(scratch, 'models', 'crime_columns'))
+
+
+def child_env(scratch):
+    feed_path = os.path.join(scratch, 'feed.xml')
+    with open(feed_path, 'w') as f:
+        f.write(STUB_FEED)
+    return dict(os.environ, PYTHONPATH=REPO_ROOT, NEWS_FEED_SOURCE=feed_path,
+                SQLITE_DB_PATH=os.path.join(scratch, 'startup.db'))
+
+
+def parse_importtime(stderr):
+    """[(module, self us, cumulative us)] from `python -X importtime` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            modules.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+        except (IndexError, ValueError):
+            continue   # the header line
+    return modules
+
+
+def import_report(scratch, env, top):
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                             cwd=scratch, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise SystemExit(f"import app failed:\n{process.stderr[-2000:]}")
+    modules = parse_importtime(process.stderr)
+    by_package = Counter()
+    for name, self_us, _ in modules:
+        by_package[name.split('.')[0]] += self_us
+    app_us = next((cumulative for name, _, cumulative in modules if name == 'app'), None)
+    return {
+        "import_app_ms": round(app_us / 1000, 1) if app_us else None,
+        "modules": len(modules),
+        "top_cumulative": [(name, round(cumulative / 1000, 1))
+                           for name, _, cumulative in sorted(modules, key=lambda m: -m[2])
+                           if name != 'app'][:top],
+        "top_packages": [(name, round(us / 1000, 1)) for name, us in by_package.most_common(top)],
+    }
+
+
+def cold_starts(scratch, env, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', CHILD], cwd=scratch, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if process.returncode != 0:
+            raise SystemExit(f"Cold start failed:\n{process.stderr[-2000:]}")
+        runs.append({**json.loads(process.stdout.strip().splitlines()[-1]), "process_s": elapsed})
+
+    summary = {key: round(statistics.median(run[key] for run in runs) * 1000, 1)
+               for key in ('process_s', 'import_app_s', 'first_health_s', 'first_login_s', 'ready_s')}
+    summary = {key[:-2] + '_ms': value for key, value in summary.items()}
+    summary["status"] = runs[-1]["status"]
+    summary["modules"] = runs[-1]["modules"]
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--no-snapshot', action='store_true', help="load the column store from the table")
+    parser.add_argument('--output', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='crime-startup-')
+    try:
+        seed(scratch, args.rows, snapshot=not args.no_snapshot)
+        env = child_env(scratch)
+        report = import_report(scratch, env, args.top)
+        starts = cold_starts(scratch, env, args.repeat)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"\nimport app: {report['import_app_ms']} ms cumulative, {report['modules']} modules imported")
+    print(f"\n{'slowest imports (cumulative)':<48} {'ms':>8}")
+    for name, ms in report["top_cumulative"]:
+        print(f"{name:<48} {ms:>8}")
+    print(f"\n{'self time by top-level package':<48} {'ms':>8}")
+    for name, ms in report["top_packages"]:
+        print(f"{name:<48} {ms:>8}")
+
+    print(f"\nCold start, median of {args.repeat} ({args.rows:,} rows, "
+          f"{'table load' if args.no_snapshot else 'snapshot'}; status {starts['status']}, {starts['modules']} modules)")
+    for key in ('process_ms', 'import_app_ms', 'first_health_ms', 'first_login_ms', 'ready_ms'):
+        print(f"{key:<48} {starts[key]:>8}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"rows": args.rows, "snapshot": not args.no_snapshot, "imports": report,
+                       "cold_start": starts}, f, indent=2)
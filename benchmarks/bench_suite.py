@@ -0,0 +1,296 @@
+"""
+End-to-end benchmark suite: API endpoints, model training and ingest at scale.
+
+Usage:
+    python -m benchmarks.bench_suite [--sizes 10000 100000 1000000] [--requests 20] [--output bench_results.json]
+    python -m benchmarks.bench_suite --compare before.json after.json [--threshold 0.1] [--min-delta 1]
+
+Each size runs in its own subprocess so module-level state (registries,
+caches, the column store) starts cold and peak RSS is per size. A worker:
+
+    1. seeds a scratch database with scripts/load_data (bulk ingest rows/s)
+    2. imports app (cold start, including the column store load)
+    3. times HotspotModel.train_from_db and get_hotspots
+    4. calls every read endpoint through the Flask test client; the first
+       call is reported separately, the rest give latency percentiles
+    5. posts crimes to /api/crimes/submit (single-row ingest)
+
+The response cache is off so repeated calls measure the work, not a cache
+hit; pass --cache to keep it. Destructive endpoints (db-reset, user
+delete) are left out. Results are one JSON file; --compare prints the
+ratio of every shared metric between two runs and flags regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = (10000, 100000, 1000000)
+SUBMITS = 200
+
+# (name, method, url, json body, repeat cap); a cap keeps full-table endpoints affordable at 1M rows
+ENDPOINTS = [
+    ('health', 'GET', '/api/health', None, None),
+    ('crimes_all', 'GET', '/api/crimes', None, 3),
+    ('crimes_page', 'GET', '/api/crimes?limit=100', None, None),
+    ('crimes_page_type', 'GET', '/api/crimes?limit=100&type=THEFT', None, None),
+    ('crimes_near', 'GET', '/api/crimes/near?lat=28.6139&lng=77.2090&radius_km=2', None, None),
+    ('crimes_bbox', 'GET', '/api/crimes/bbox?bbox=77.19,28.60,77.23,28.63', None, None),
+    ('crimes_export', 'GET', '/api/crimes/export?fields=id,crime_type,occurrence_date,latitude,longitude', None, 3),
+    ('map_clusters_country', 'GET', '/api/map/clusters?zoom=5', None, None),
+    ('map_clusters_city', 'GET', '/api/map/clusters?zoom=12&bbox=77.0,28.4,77.4,28.8', None, None),
+    ('hotspots_kmeans', 'GET', '/api/hotspots', None, None),
+    ('hotspots_grid', 'GET', '/api/hotspots?engine=grid', None, None),
+    ('hotspots_emerging', 'GET', '/api/hotspots/emerging', None, None),
+    ('admin_analysis', 'GET', '/api/admin/analysis', None, None),
+    ('admin_detailed_analysis', 'GET', '/api/admin/detailed-analysis', None, None),
+    ('admin_users', 'GET', '/api/admin/users', None, None),
+    ('forecast_daily', 'GET', '/api/forecast?freq=D', None, None),
+    ('forecast_hourly', 'GET', '/api/forecast?freq=H', None, None),
+    ('predict_safety', 'GET', '/api/predict/safety?area=Delhi', None, None),
+    ('predict_safety_point', 'GET', '/api/predict/safety?lat=28.6139&lng=77.2090', None, None),
+    ('predict_safety_batch', 'POST', '/api/predict/safety/batch', {"areas": ["Delhi", "Mumbai", "Chennai", "Kolkata"]}, None),
+    ('auth_login', 'POST', '/api/auth/login', {"email": "admin@police.gov", "password": "admin123"}, None),
+    ('metrics', 'GET', '/api/metrics', None, None),
+]
+
+STUB_FEED = """<?xml version="1.0"?><rss><channel>
+<item><title>Police arrest two in theft case</title></item>
+<item><title>City marathon draws record crowd</title></item>
+<item><title>Fraud ring busted by cyber cell</title></item>
+</channel></rss>"""
+
+SEED_USERS = """
+INSERT INTO users (username, full_name, email, password, role, station, badge_number)
+VALUES ('admin', 'System Administrator', 'admin@police.gov', 'admin123', 'admin', 'Headquarters', 'ADM-001')
+"""
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def latency_stats(samples):
+    arr = np.array(samples) * 1000
+    return {
+        "n": len(arr),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "per_s": round(len(arr) / arr.sum() * 1000, 1) if arr.sum() else None,
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run_worker(size, requests, scratch, keep_cache):
+    # Environment first: the services read it at import time
+    os.environ['SQLITE_DB_PATH'] = os.path.join(scratch, 'bench.db')
+    os.environ['COLUMN_STORE_SNAPSHOT'] = ''
+    os.environ['RESPONSE_CACHE_BACKEND'] = 'memory' if keep_cache else 'off'
+    feed_path = os.path.join(scratch, 'feed.xml')
+    with open(feed_path, 'w') as f:
+        f.write(STUB_FEED)
+    os.environ['NEWS_FEED_SOURCE'] = feed_path
+
+    from backend.app.services import database
+    from scripts.load_data import bulk_load, iter_sample_frames
+
+    result = {"rows": size, "stages": {}}
+
+    # 1. Seed (init_db reads schema.sql relative to the repo root)
+    os.chdir(REPO_ROOT)
+    database.init_db()
+    with database.db_connection() as connection:
+        connection.execute(SEED_USERS)
+        connection.commit()
+    (rows, seconds), _ = timed(bulk_load, iter_sample_frames(size, seed=42))
+    result["stages"]["bulk_ingest"] = {"rows": rows, "seconds": round(seconds, 3),
+                                       "rows_per_s": round(rows / seconds) if seconds else None,
+                                       "peak_rss_mb": peak_rss_mb()}
+
+    # Model files are written under ./models; keep them in the scratch directory
+    os.chdir(scratch)
+
+    # 2. Cold start
+    _, seconds = timed(__import__, 'app')
+    app_module = sys.modules['app']
+    result["stages"]["import_app"] = {"seconds": round(seconds, 3), "peak_rss_mb": peak_rss_mb()}
+
+    # 3. Hotspot model
+    from backend.app.models.hotspot_model import HotspotModel
+    _, seconds = timed(HotspotModel(n_clusters=10).train_from_db)
+    result["stages"]["hotspot_train_from_db"] = {"seconds": round(seconds, 3), "peak_rss_mb": peak_rss_mb()}
+    _, seconds = timed(HotspotModel(n_clusters=10).get_hotspots)
+    result["stages"]["hotspot_get_hotspots"] = {"seconds": round(seconds, 3), "peak_rss_mb": peak_rss_mb()}
+
+    # 4. Endpoints
+    client = app_module.app.test_client()
+    endpoints = {}
+    for name, method, url, body, cap in ENDPOINTS:
+        samples, statuses, size_bytes, first = [], {}, 0, None
+        for i in range(min(requests, cap) if cap else requests):
+            start = time.perf_counter()
+            response = client.open(url, method=method, json=body)
+            data = response.get_data()   # drains streamed bodies
+            elapsed = time.perf_counter() - start
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            size_bytes = len(data)
+            if i == 0:
+                first = elapsed
+            else:
+                samples.append(elapsed)
+        endpoints[name] = {
+            "first_ms": round(first * 1000, 3),
+            **(latency_stats(samples) if samples else {}),
+            "status": {str(k): v for k, v in statuses.items()},
+            "bytes": size_bytes,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        print(f"  [{size:,}] {name}: first {endpoints[name]['first_ms']} ms, "
+              f"p50 {endpoints[name].get('p50_ms')} ms, status {endpoints[name]['status']}", file=sys.stderr)
+    result["endpoints"] = endpoints
+
+    # 5. Single-row ingest through the API
+    samples, errors = [], 0
+    for i in range(SUBMITS):
+        crime = {"type": 'THEFT', "description": 'benchmark', "date": '2026-01-01 12:00:00',
+                 "lat": 28.6 + i * 1e-5, "lng": 77.2, "location": 'STREET'}
+        start = time.perf_counter()
+        response = client.post('/api/crimes/submit', json=crime)
+        samples.append(time.perf_counter() - start)
+        errors += response.status_code != 201
+    result["stages"]["api_submit"] = {**latency_stats(samples), "errors": errors, "peak_rss_mb": peak_rss_mb()}
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, requests, output, keep_cache):
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "requests": requests,
+            "cache": keep_cache,
+        },
+        "sizes": {},
+    }
+    for size in sizes:
+        scratch = tempfile.mkdtemp(prefix=f'crime-bench-{size}-')
+        result_path = os.path.join(scratch, 'result.json')
+        command = [sys.executable, '-m', 'benchmarks.bench_suite', '--worker', str(size),
+                   '--requests', str(requests), '--scratch', scratch, '--result', result_path]
+        if keep_cache:
+            command.append('--cache')
+        print(f"Benchmarking {size:,} crimes...", file=sys.stderr)
+        try:
+            subprocess.run(command, cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL)
+            with open(result_path) as f:
+                report["sizes"][str(size)] = json.load(f)
+        except subprocess.CalledProcessError as e:
+            print(f"Benchmark for {size:,} crimes failed with exit code {e.returncode}", file=sys.stderr)
+            report["sizes"][str(size)] = {"rows": size, "error": f"exit code {e.returncode}"}
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+    return report
+
+
+def flatten(result):
+    """{metric name: value} in ms or MB for the figures worth comparing; lower is better for all of them."""
+    metrics = {"peak_rss_mb": result.get("peak_rss_mb")}
+    for stage, values in result.get("stages", {}).items():
+        if 'seconds' in values:
+            metrics[f"{stage}.ms"] = round(values['seconds'] * 1000, 3)
+        for key in ('p50_ms', 'p95_ms', 'peak_rss_mb'):
+            if key in values:
+                metrics[f"{stage}.{key}"] = values[key]
+    for name, values in result.get("endpoints", {}).items():
+        for key in ('first_ms', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if key in values:
+                metrics[f"{name}.{key}"] = values[key]
+    return metrics
+
+
+def compare(before_path, after_path, threshold, min_delta):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before['meta'].get('commit')} -> {after['meta'].get('commit')}")
+    regressions = 0
+    for size in sorted(set(before["sizes"]) & set(after["sizes"]), key=int):
+        old, new = flatten(before["sizes"][size]), flatten(after["sizes"][size])
+        print(f"\n{int(size):,} crimes")
+        print(f"{'metric':<44} {'before':>12} {'after':>12} {'ratio':>8}")
+        for metric in sorted(set(old) & set(new)):
+            a, b = old[metric], new[metric]
+            if not a or b is None:
+                continue
+            ratio = b / a
+            flag = ''
+            if abs(b - a) < min_delta:
+                pass
+            elif ratio > 1 + threshold:
+                flag, regressions = '  REGRESSION', regressions + 1
+            elif ratio < 1 - threshold:
+                flag = '  faster'
+            print(f"{metric:<44} {a:>12} {b:>12} {ratio:>8.2f}{flag}")
+    print(f"\n{regressions} metric(s) worse by more than {threshold:.0%} and {min_delta} ms/MB")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--requests', type=int, default=20, help="calls per endpoint (the first is reported separately)")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--cache', action='store_true', help="leave the response cache on")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative slowdown reported as a regression")
+    parser.add_argument('--min-delta', type=float, default=1.0, help="ignore changes smaller than this many ms (or MB)")
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--scratch', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold, args.min_delta) else 0)
+    elif args.worker:
+        result = run_worker(args.worker, args.requests, args.scratch, args.cache)
+        with open(args.result, 'w') as f:
+            json.dump(result, f)
+    else:
+        run_suite(args.sizes, args.requests, args.output, args.cache)
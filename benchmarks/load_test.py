@@ -0,0 +1,224 @@
+"""
+Load test of the gunicorn setup: throughput and memory per worker count.
+
+Usage: python -m benchmarks.load_test [--workers 1 2 4] [--threads 4] [--concurrency 16] [--duration 20] [--rows 100000]
+
+Seeds a scratch database (or uses --db), then for each worker count starts
+`gunicorn -c gunicorn.conf.py wsgi:app` on it, waits for /api/health and
+keeps --concurrency client threads on keep-alive connections cycling
+through a mix of read endpoints for --duration seconds. Reported per worker
+count: boot time (preload and warm-up included), requests/s, latency
+percentiles, errors, and the server's summed RSS and PSS; PSS counts pages
+shared copy-on-write once, so RSS minus PSS is what preloading saves.
+
+The response cache is off so every request does its work; pass --cache to
+measure cache hits instead. Full-table endpoints (/api/crimes without
+paging, exports) are left out of the mix. The client runs on the same
+machine, so on few cores it competes with the workers for CPU.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_suite import REPO_ROOT, STUB_FEED, latency_stats
+
+MIX = [
+    '/api/health',
+    '/api/crimes?limit=100',
+    '/api/crimes?limit=100&type=THEFT',
+    '/api/crimes/near?lat=28.6139&lng=77.2090&radius_km=2',
+    '/api/crimes/bbox?bbox=77.19,28.60,77.23,28.63',
+    '/api/map/clusters?zoom=5',
+    '/api/map/clusters?zoom=12&bbox=77.0,28.4,77.4,28.8',
+    '/api/hotspots',
+    '/api/hotspots?engine=grid',
+    '/api/hotspots/emerging',
+    '/api/admin/analysis',
+    '/api/forecast?freq=D',
+    '/api/predict/safety?area=Delhi',
+]
+BOOT_TIMEOUT = 300
+
+
+def seed(scratch, rows):
+    os.environ['SQLITE_DB_PATH'] = os.path.join(scratch, 'load.db')
+    from backend.app.services import database
+    from scripts.load_data import bulk_load, iter_sample_frames
+
+    # init_db reads schema.sql relative to the repo root
+    os.chdir(REPO_ROOT)
+    database.init_db()
+    bulk_load(iter_sample_frames(rows, seed=42))
+    return os.environ['SQLITE_DB_PATH']
+
+
+def server_env(db_path, scratch, workers, threads, port, keep_cache):
+    feed_path = os.path.join(scratch, 'feed.xml')
+    with open(feed_path, 'w') as f:
+        f.write(STUB_FEED)
+    return dict(
+        os.environ,
+        PYTHONPATH=REPO_ROOT,
+        SQLITE_DB_PATH=db_path,
+        COLUMN_STORE_SNAPSHOT='',
+        RESPONSE_CACHE_BACKEND='memory' if keep_cache else 'off',
+        NEWS_FEED_SOURCE=feed_path,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        PORT=str(port),
+    )
+
+
+def request(connection, path):
+    connection.request('GET', path)
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def wait_for_health(process, port):
+    deadline = time.monotonic() + BOOT_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            if request(connection, '/api/health') == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("gunicorn did not become healthy in time")
+
+
+def memory_mb(pid):
+    """(RSS, PSS) in MB summed over a process and its children; PSS is None off Linux."""
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        return None, None
+    rss = pss = 0
+    for p in pids:
+        with open(f'/proc/{p}/smaps_rollup') as f:
+            for line in f:
+                name, value = line.split(':', 1)
+                if name in ('Rss', 'Pss'):
+                    kb = int(value.split()[0])
+                    rss += kb if name == 'Rss' else 0
+                    pss += kb if name == 'Pss' else 0
+    return round(rss / 1024, 1), round(pss / 1024, 1)
+
+
+def run_clients(port, concurrency, duration):
+    samples, statuses = [], {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local, local_statuses, i = [], {}, offset
+        while time.monotonic() < deadline:
+            path = MIX[i % len(MIX)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                status = request(connection, path)
+            except (OSError, http.client.HTTPException):
+                status = 'error'
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            local.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            samples.extend(local)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, statuses, time.perf_counter() - start
+
+
+def run(db_path, scratch, workers, threads, concurrency, duration, port, keep_cache):
+    env = server_env(db_path, scratch, workers, threads, port, keep_cache)
+    command = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_ROOT, 'gunicorn.conf.py'),
+               '--chdir', scratch, 'wsgi:app']
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_health(process, port)
+        boot = time.perf_counter() - start
+
+        # One untimed pass so each worker's first requests are not counted
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        for _ in range(workers):
+            for path in MIX:
+                request(connection, path)
+        samples, statuses, elapsed = run_clients(port, concurrency, duration)
+        rss, pss = memory_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    errors = sum(count for status, count in statuses.items() if status != 200)
+    return {
+        "workers": workers,
+        "threads": threads,
+        "boot_s": round(boot, 2),
+        "requests": len(samples),
+        "requests_per_s": round(len(samples) / elapsed, 1),
+        **{k: v for k, v in latency_stats(samples).items() if k.startswith('p')},
+        "errors": errors,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "rss_mb": rss,
+        "pss_mb": pss,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--db', help="existing database to serve instead of a seeded scratch copy")
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--cache', action='store_true', help="keep the response cache on")
+    parser.add_argument('--output', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='crime-load-')
+    try:
+        db_path = os.path.abspath(args.db) if args.db else seed(scratch, args.rows)
+        results = []
+        for workers in args.workers:
+            print(f"Serving with {workers} worker(s) x {args.threads} thread(s)...", file=sys.stderr)
+            results.append(run(db_path, scratch, workers, args.threads, args.concurrency,
+                               args.duration, args.port, args.cache))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"\n{args.db or f'{args.rows:,} seeded rows'}, {args.concurrency} clients for {args.duration:g}s, "
+          f"{os.cpu_count()} CPU(s), cache {'on' if args.cache else 'off'}")
+    print(f"{'workers':>7} {'threads':>7} {'boot s':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>6} {'RSS MB':>8} {'PSS MB':>8}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['threads']:>7} {r['boot_s']:>7} {r['requests_per_s']:>8} {r['p50_ms']:>8} "
+              f"{r['p95_ms']:>8} {r['p99_ms']:>8} {r['errors']:>6} {str(r['rss_mb']):>8} {str(r['pss_mb']):>8}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
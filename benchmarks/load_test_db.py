@@ -0,0 +1,140 @@
+"""
+Concurrent read/write load test for the SQLite configuration.
+
+Usage: python -m benchmarks.load_test_db [--rows 20000] [--readers 8] [--writers 4] [--seconds 5]
+
+Runs the same mixed workload twice against a scratch database:
+
+    baseline  rollback journal, synchronous=FULL, every writer thread opens
+              its own transaction (how the app behaved before)
+    tuned     DEFAULT_PRAGMAS (WAL etc.) with writes funnelled through
+              WriteQueue
+
+Readers page through /api/crimes-style keyset queries; writers insert crimes.
+Reported: operations completed, latency percentiles and "database is locked"
+errors for each side.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+_scratch = tempfile.mkdtemp(prefix='crime-load-')
+os.environ['SQLITE_DB_PATH'] = os.path.join(_scratch, 'load_test.db')
+
+from backend.app.services import database  # noqa: E402
+from backend.app.services.crime_query import fetch_crimes_page  # noqa: E402
+from backend.app.services.writer import WriteQueue  # noqa: E402
+from scripts.load_data import generate_sample_data, insert_to_mysql  # noqa: E402
+
+INSERT_SQL = """
+INSERT INTO crimes (crime_id, crime_type, description, occurrence_date, latitude, longitude, location_description, arrested)
+VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+"""
+
+CONFIGS = {
+    'baseline': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'tuned': database.DEFAULT_PRAGMAS,
+}
+
+
+def percentiles(samples):
+    if not samples:
+        return {"p50_ms": None, "p99_ms": None}
+    arr = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(arr, 50)), 2), "p99_ms": round(float(np.percentile(arr, 99)), 2)}
+
+
+def run_workload(name, readers, writers, seconds):
+    pool = database.ConnectionPool(database.DB_PATH, size=readers + writers + 1, pragmas=CONFIGS[name])
+    queue = WriteQueue(connect=pool.acquire) if name == 'tuned' else None
+    # Open one connection up front so the journal mode switch happens alone
+    pool.acquire().close()
+    stop = time.monotonic() + seconds
+    stats = {"reads": [], "writes": [], "read_errors": 0, "write_errors": 0}
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+
+    def reader():
+        latencies, errors = [], 0
+        cursor = None
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                connection = pool.acquire()
+            except sqlite3.OperationalError:
+                errors += 1
+                continue
+            try:
+                _, cursor = fetch_crimes_page(connection, ('id', 'crime_type', 'occurrence_date'), cursor=cursor, limit=100)
+                latencies.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                errors += 1
+            finally:
+                connection.close()
+        with lock:
+            stats["reads"].extend(latencies)
+            stats["read_errors"] += errors
+
+    def writer():
+        latencies, errors = [], 0
+        while time.monotonic() < stop:
+            values = (f"L{next(counter)}-{name}", 'THEFT', 'load test', '2026-01-01 12:00:00', 28.6, 77.2, 'STREET')
+            start = time.perf_counter()
+            try:
+                if queue is not None:
+                    queue.run(lambda connection: connection.execute(INSERT_SQL, values))
+                else:
+                    connection = pool.acquire()
+                    try:
+                        connection.execute(INSERT_SQL, values)
+                        connection.commit()
+                    finally:
+                        connection.close()
+                latencies.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                errors += 1
+        with lock:
+            stats["writes"].extend(latencies)
+            stats["write_errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.close_all()
+
+    return {
+        "config": name,
+        "reads_per_s": round(len(stats["reads"]) / seconds),
+        "read": percentiles(stats["reads"]),
+        "read_errors": stats["read_errors"],
+        "writes_per_s": round(len(stats["writes"]) / seconds),
+        "write": percentiles(stats["writes"]),
+        "write_errors": stats["write_errors"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    database.init_db()
+    insert_to_mysql(generate_sample_data(args.rows))
+    database._pool.close_all()
+
+    for config in ('baseline', 'tuned'):
+        r = run_workload(config, args.readers, args.writers, args.seconds)
+        print(f"{r['config']:>9}: reads {r['reads_per_s']}/s p50 {r['read']['p50_ms']}ms p99 {r['read']['p99_ms']}ms "
+              f"errors {r['read_errors']} | writes {r['writes_per_s']}/s p50 {r['write']['p50_ms']}ms "
+              f"p99 {r['write']['p99_ms']}ms errors {r['write_errors']}")
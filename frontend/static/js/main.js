@@ -404,61 +404,61 @@ function initCharts() {
     });
 }
 
+// Rows shown in the records table; totals and charts come from the summary
+const RECORDS_PAGE_SIZE = 100;
+const RECORD_FIELDS = 'crime_id,crime_type,occurrence_date,latitude,longitude,description,arrested';
+
 async function fetchStats() {
     try {
-        const response = await fetch('/api/crimes');
-        if (!response.ok) throw new Error('API Error');
-
-        // Manual fix for NaN values if they slip through
-        const text = await response.text();
-        const safeText = text.replace(/:\s*NaN/g, ': null');
-        const data = JSON.parse(safeText);
-
-        if (data && data.crimes) {
-            window.allCrimes = data.crimes;
-
-            // Update Dashboard Stats
-            if (document.getElementById('crime-records-count'))
-                document.getElementById('crime-records-count').innerText = data.count.toLocaleString();
-            if (document.getElementById('open-cases-count'))
-                document.getElementById('open-cases-count').innerText = data.crimes.filter(c => !c.arrested).length;
-
-            if (document.getElementById('total-officers'))
-                document.getElementById('total-officers').innerText = "42";
-            if (document.getElementById('hotspots-count'))
-                document.getElementById('hotspots-count').innerText = "14";
-
-            renderRecordsTable(data.crimes);
-
-            // Update charts
-            const types = data.crimes.reduce((acc, crime) => {
-                acc[crime.crime_type] = (acc[crime.crime_type] || 0) + 1;
-                return acc;
-            }, {});
-
-            updateTypeChart(Object.keys(types), Object.values(types));
-
-            // Setup filter listener
-            const filterEl = document.getElementById('crime-filter');
-            if (filterEl) {
-                const newFilter = filterEl.cloneNode(true);
-                filterEl.parentNode.replaceChild(newFilter, filterEl);
-
-                newFilter.addEventListener('change', (e) => {
-                    const filterValue = e.target.value;
-                    const filtered = filterValue === 'ALL'
-                        ? window.allCrimes
-                        : window.allCrimes.filter(c => c.crime_type.trim().toUpperCase() === filterValue);
-                    renderRecordsTable(filtered);
-                });
-            }
-        } else {
-            console.warn('Empty data');
-            renderRecordsTable([]);
+        const [summaryResponse] = await Promise.all([
+            fetch('/api/analytics/summary'),
+            fetchRecords('ALL')
+        ]);
+        if (!summaryResponse.ok) throw new Error('API Error');
+        const summary = await summaryResponse.json();
+        window.crimeSummary = summary;
+
+        // Update Dashboard Stats
+        if (document.getElementById('crime-records-count'))
+            document.getElementById('crime-records-count').innerText = summary.total_crimes.toLocaleString();
+        if (document.getElementById('open-cases-count'))
+            document.getElementById('open-cases-count').innerText = summary.open_cases.toLocaleString();
+
+        if (document.getElementById('total-officers'))
+            document.getElementById('total-officers').innerText = "42";
+        if (document.getElementById('hotspots-count'))
+            document.getElementById('hotspots-count').innerText = "14";
+
+        // Update charts (share of all crimes by type)
+        const types = summary.type_distribution;
+        updateTypeChart(types.map(t => t.type), types.map(t => t.percentage));
+
+        // Setup filter listener
+        const filterEl = document.getElementById('crime-filter');
+        if (filterEl) {
+            const newFilter = filterEl.cloneNode(true);
+            filterEl.parentNode.replaceChild(newFilter, filterEl);
+
+            newFilter.addEventListener('change', (e) => fetchRecords(e.target.value));
         }
     } catch (error) {
         console.error('Error fetching stats:', error);
         alert('Error fetching data: ' + error.message);
+    }
+}
+
+async function fetchRecords(type) {
+    // The latest page of crimes, filtered by type on the server
+    let url = `/api/crimes?limit=${RECORDS_PAGE_SIZE}&fields=${RECORD_FIELDS}`;
+    if (type && type !== 'ALL') url += `&type=${encodeURIComponent(type)}`;
+    try {
+        const response = await fetch(url);
+        if (!response.ok) throw new Error('API Error');
+        const data = await response.json();
+        window.allCrimes = data.crimes;
+        renderRecordsTable(data.crimes);
+    } catch (error) {
+        console.error('Error fetching records:', error);
         renderRecordsTable([]);
     }
 }
@@ -509,11 +509,42 @@ function initFullMap() {
         attribution: '&copy; OpenStreetMap contributors &copy; CARTO'
     }).addTo(map);
 
-    // Fetch and show markers
-    fetch('/api/crimes')
-        .then(res => res.json())
-        .then(data => {
-            if (data.crimes) {
+    // Zoomed out: server-side clusters for the viewport. Zoomed in: the
+    // individual crimes in view. Either way only what is visible is fetched.
+    const markers = L.layerGroup().addTo(map);
+    const POINTS_ZOOM = 15;
+    const loadViewport = () => {
+        const b = map.getBounds();
+        const bbox = [b.getWest(), b.getSouth(), b.getEast(), b.getNorth()].map(v => v.toFixed(5)).join(',');
+        const zoom = map.getZoom();
+
+        if (zoom < POINTS_ZOOM) {
+            fetch(`/api/map/clusters?zoom=${zoom}&bbox=${bbox}`)
+                .then(res => res.json())
+                .then(data => {
+                    if (!data.clusters) return;
+                    markers.clearLayers();
+                    data.clusters.forEach(cluster => {
+                        L.circleMarker([cluster.lat, cluster.lng], {
+                            radius: Math.min(8 + Math.log2(cluster.count) * 3, 30),
+                            fillColor: "#3b82f6",
+                            color: "#fff",
+                            weight: 2,
+                            opacity: 1,
+                            fillOpacity: 0.6
+                        }).addTo(markers)
+                            .bindTooltip(`${cluster.count}`, { permanent: cluster.count > 1, direction: 'center', className: 'cluster-label' })
+                            .on('click', () => map.setView([cluster.lat, cluster.lng], Math.min(zoom + 2, POINTS_ZOOM)));
+                    });
+                });
+            return;
+        }
+
+        fetch(`/api/crimes/bbox?bbox=${bbox}&fields=crime_type,occurrence_date,description,latitude,longitude`)
+            .then(res => res.json())
+            .then(data => {
+                if (!data.crimes) return;
+                markers.clearLayers();
                 data.crimes.forEach(crime => {
                     L.circleMarker([crime.latitude, crime.longitude], {
                         radius: 8,
@@ -522,7 +553,7 @@ function initFullMap() {
                         weight: 2,
                         opacity: 1,
                         fillOpacity: 0.8
-                    }).addTo(map)
+                    }).addTo(markers)
                         .bindPopup(`
                             <div style="font-family: 'Inter';">
                                 <b style="color: #3b82f6;">${crime.crime_type}</b><br>
@@ -531,8 +562,10 @@ function initFullMap() {
                             </div>
                         `);
                 });
-            }
-        });
+            });
+    };
+    map.on('moveend', loadViewport);
+    loadViewport();
 }
 
 function initPredictionMap() {
@@ -623,7 +656,7 @@ function generateReport() {
         <body>
             <h1>Crime Pattern Analysis Summary Report</h1>
             <p>Generated on: ${new Date().toLocaleString()}</p>
-            <p>Total Records Analyzed: ${crimes.length}</p>
+            <p>Total Records Analyzed: ${window.crimeSummary ? window.crimeSummary.total_crimes : crimes.length}</p>
             <hr>
             <table>
                 <thead>
@@ -862,8 +895,16 @@ function startLiveFeed() {
     }, 4000);
 }
 
-function exportToCSV() {
-    const crimes = window.allCrimes || [];
+async function exportToCSV() {
+    // The table only holds the latest page, so download every row on demand
+    let crimes = [];
+    try {
+        const response = await fetch(`/api/crimes/export?format=json&fields=${RECORD_FIELDS}`);
+        if (!response.ok) throw new Error('API Error');
+        crimes = await response.json();
+    } catch (error) {
+        console.error('Export error:', error);
+    }
     if (crimes.length === 0) return alert('No data to export.');
 
     const headers = ['Crime ID', 'Type', 'Date', 'Lat', 'Lng', 'Description', 'Arrested'];
@@ -873,7 +914,7 @@ function exportToCSV() {
         c.occurrence_date,
         c.latitude,
         c.longitude,
-        `"${c.description.replace(/"/g, '""')}"`,
+        `"${(c.description || '').replace(/"/g, '""')}"`,
         c.arrested ? 'YES' : 'NO'
     ]);
 
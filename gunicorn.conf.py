@@ -0,0 +1,47 @@
+"""
+Gunicorn settings for serving the API in production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is imported and warmed up once in the master (preload_app, see
+wsgi.py) and then forked, so the column store and the fitted models are
+shared copy-on-write between workers. Debug mode and the reloader are never
+on here.
+
+Environment:
+    PORT / GUNICORN_BIND   listen address (default 0.0.0.0:$PORT, port 5000)
+    WEB_CONCURRENCY        worker processes (default: one per CPU)
+    GUNICORN_THREADS       threads per worker (default 4)
+    GUNICORN_TIMEOUT       seconds before a silent worker is restarted (default 120)
+    GUNICORN_ACCESS_LOG    access log path, '-' for stdout (default off)
+
+Each worker has its own data version, response cache (unless
+RESPONSE_CACHE_BACKEND=disk) and models. Cached responses are keyed on the
+table itself, so a crime submitted to one worker is never hidden by another
+worker's cache; the models of the other workers pick it up once their
+periodic checks see the table change (COLUMN_STORE_CHECK_INTERVAL,
+HOTSPOT_CHECK_INTERVAL, ...).
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', 5000)}")
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# More than one thread selects the gthread worker: SQLite reads, news feed
+# waits and NumPy work release the GIL, so a worker can overlap requests
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+# Full-table endpoints (/api/crimes, exports) can take seconds on large data
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+preload_app = True
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def when_ready(server):
+    # Everything built while preloading is long-lived; freezing it keeps the
+    # workers' garbage collector from writing to (and so copying) those pages
+    gc.freeze()
+    server.log.info("App preloaded; forking %s worker(s) x %s thread(s)", server.cfg.workers, server.cfg.threads)
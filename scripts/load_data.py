@@ -1,30 +1,69 @@
+"""
+Crime data loading tools.
+
+    python -m scripts.load_data                                  # reset and seed 200 sample crimes
+    python -m scripts.load_data --source crimes.csv              # bulk load a CSV (or .parquet) file
+    python -m scripts.load_data --generate 10000000 --reset      # 10M synthetic crimes for benchmarks
+
+Bulk loads stream the input in chunks, insert each chunk with executemany in
+its own transaction, drop the secondary crime indexes while loading and
+rebuild them at the end, and report rows/sec.
+"""
+import argparse
+import time
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
-from backend.app.services.database import get_db_connection
+from backend.app.services.database import get_db_connection, CRIME_INDEXES, ensure_indexes
+from backend.app.services.rollups import apply_inserted
+
+CRIME_TYPES = ['THEFT', 'ROBBERY', 'BURGLARY', 'ASSAULT', 'CYBER CRIME', 'FRAUD', 'PROPERTY DAMAGE']
+LOCATIONS = [
+    (28.6139, 77.2090), # Delhi
+    (19.0760, 72.8777), # Mumbai
+    (12.9716, 77.5946), # Bangalore
+    (13.0827, 80.2707), # Chennai
+    (22.5726, 88.3639)  # Kolkata
+]
+
+# Column order of INSERT_QUERY; sample records and source files use 'arrest'
+INSERT_COLUMNS = [
+    'crime_id', 'crime_type', 'description', 'occurrence_date', 'latitude', 'longitude',
+    'location_description', 'arrest', 'domestic', 'district', 'ward', 'community_area'
+]
+
+INSERT_QUERY = """
+INSERT INTO crimes
+(crime_id, crime_type, description, occurrence_date, latitude, longitude, location_description, arrested, domestic, district, ward, community_area)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Column names used by city open-data exports (e.g. the Chicago crimes dataset)
+SOURCE_COLUMN_ALIASES = {
+    'case number': 'crime_id',
+    'primary type': 'crime_type',
+    'date': 'occurrence_date',
+    'location description': 'location_description',
+    'arrested': 'arrest',
+    'community area': 'community_area',
+}
+
+DEFAULT_CHUNK_SIZE = 50000
 
 def generate_sample_data(num_records=100):
-    crime_types = ['THEFT', 'ROBBERY', 'BURGLARY', 'ASSAULT', 'CYBER CRIME', 'FRAUD', 'PROPERTY DAMAGE']
-    locations = [
-        (28.6139, 77.2090), # Delhi
-        (19.0760, 72.8777), # Mumbai
-        (12.9716, 77.5946), # Bangalore
-        (13.0827, 80.2707), # Chennai
-        (22.5726, 88.3639)  # Kolkata
-    ]
-    
     data = []
     start_date = datetime.now() - timedelta(days=365)
-    
+
     for i in range(num_records):
-        loc = random.choice(locations)
+        loc = random.choice(LOCATIONS)
         lat = loc[0] + random.uniform(-0.05, 0.05)
         lng = loc[1] + random.uniform(-0.05, 0.05)
-        
+
         crime = {
             'crime_id': f'C{100000 + i}',
-            'crime_type': random.choice(crime_types),
+            'crime_type': random.choice(CRIME_TYPES),
             'description': 'Sample crime description for testing.',
             'occurrence_date': (start_date + timedelta(days=random.randint(0, 365))).strftime('%Y-%m-%d %H:%M:%S'),
             'latitude': lat,
@@ -37,44 +76,164 @@ def generate_sample_data(num_records=100):
             'community_area': random.randint(1, 77)
         }
         data.append(crime)
-    
+
     return data
 
+def generate_sample_frame(num_records, id_offset=0, rng=None):
+    """Vectorized counterpart of generate_sample_data, returning a DataFrame."""
+    rng = rng if rng is not None else np.random.default_rng()
+    locations = np.array(LOCATIONS)
+    loc = locations[rng.integers(0, len(locations), num_records)]
+    start = np.datetime64(datetime.now() - timedelta(days=365), 's')
+    offsets = rng.integers(0, 366 * 86400, num_records).astype('timedelta64[s]')
+    dates = np.char.replace(np.datetime_as_string(start + offsets, unit='s'), 'T', ' ')
+    ids = 100000 + id_offset + np.arange(num_records)
+
+    return pd.DataFrame({
+        'crime_id': np.char.add('C', ids.astype(str)),
+        'crime_type': np.array(CRIME_TYPES)[rng.integers(0, len(CRIME_TYPES), num_records)],
+        'description': 'Sample crime description for testing.',
+        'occurrence_date': dates,
+        'latitude': loc[:, 0] + rng.uniform(-0.05, 0.05, num_records),
+        'longitude': loc[:, 1] + rng.uniform(-0.05, 0.05, num_records),
+        'location_description': 'STREET',
+        'arrest': rng.integers(0, 2, num_records),
+        'domestic': rng.integers(0, 2, num_records),
+        'district': rng.integers(1, 26, num_records),
+        'ward': rng.integers(1, 51, num_records),
+        'community_area': rng.integers(1, 78, num_records),
+    })
+
+def iter_sample_frames(num_records, chunk_size=DEFAULT_CHUNK_SIZE, id_offset=0, seed=None):
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_records, chunk_size):
+        yield generate_sample_frame(min(chunk_size, num_records - start), id_offset + start, rng)
+
+def normalize_frame(frame):
+    """Map a source chunk onto INSERT_COLUMNS, coercing dates and flags."""
+    frame = frame.rename(columns=lambda c: SOURCE_COLUMN_ALIASES.get(c.strip().lower(), c.strip().lower().replace(' ', '_')))
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    if 'crime_type' not in frame:
+        raise ValueError("Source data needs a crime_type (or 'Primary Type') column")
+    for column in INSERT_COLUMNS:
+        if column not in frame:
+            frame[column] = None
+
+    dates = pd.to_datetime(frame['occurrence_date'], errors='coerce', format='mixed')
+    frame['occurrence_date'] = dates.dt.strftime('%Y-%m-%d %H:%M:%S').where(dates.notna(), None)
+    for flag in ('arrest', 'domestic'):
+        values = frame[flag]
+        # Text flags arrive as object or (pandas 3) str dtype: parse Y/N, true/false...
+        if not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values)):
+            values = values.astype(str).str.strip().str.lower().isin(['true', '1', 'y', 'yes'])
+        frame[flag] = values.fillna(0).astype(int)
+    return frame[INSERT_COLUMNS]
+
+def read_source(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrame chunks from a CSV or Parquet file without loading it whole."""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Reading Parquet needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield normalize_frame(batch.to_pandas())
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_size, low_memory=False):
+            yield normalize_frame(chunk)
+
+def frame_rows(frame):
+    # tolist() turns NumPy scalars into Python values sqlite3 can bind; NaN becomes NULL
+    columns = [frame[c].tolist() for c in INSERT_COLUMNS]
+    return list(zip(*columns))
+
+def insert_rows(connection, rows):
+    """Insert row tuples (INSERT_COLUMNS order) in one transaction and update the rollups."""
+    if not connection.in_transaction:
+        connection.execute("BEGIN IMMEDIATE")
+    after_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM crimes").fetchone()[0]
+    connection.executemany(INSERT_QUERY, rows)
+    apply_inserted(connection, after_id)
+    connection.commit()
+
 def insert_to_mysql(data):
     connection = get_db_connection()
     if not connection:
         return
-    
-    cursor = connection.cursor()
-    query = """
-    INSERT INTO crimes 
-    (crime_id, crime_type, description, occurrence_date, latitude, longitude, location_description, arrested, domestic, district, ward, community_area)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """
-    
+
     try:
-        for crime in data:
-            values = (
-                crime['crime_id'], crime['crime_type'], crime['description'], 
+        rows = [
+            (
+                crime['crime_id'], crime['crime_type'], crime['description'],
                 crime['occurrence_date'], crime['latitude'], crime['longitude'],
                 crime['location_description'], int(crime['arrest']), int(crime['domestic']),
                 crime['district'], crime['ward'], crime['community_area']
             )
-            cursor.execute(query, values)
-        
-        connection.commit()
+            for crime in data
+        ]
+        insert_rows(connection, rows)
         print(f"Successfully inserted {len(data)} records.")
     except Exception as e:
         print(f"Error inserting data: {e}")
     finally:
-        cursor.close()
         connection.close()
 
+def bulk_load(frames, defer_indexes=True):
+    """Insert DataFrame chunks, one transaction each. Returns (rows, seconds)."""
+    connection = get_db_connection()
+    if not connection:
+        return 0, 0.0
+
+    total = 0
+    start = time.perf_counter()
+    try:
+        if defer_indexes:
+            for name in CRIME_INDEXES:
+                connection.execute(f"DROP INDEX IF EXISTS {name}")
+        for frame in frames:
+            insert_rows(connection, frame_rows(frame))
+            total += len(frame)
+            elapsed = time.perf_counter() - start
+            print(f"  {total:,} rows ({total / elapsed:,.0f} rows/sec)")
+    finally:
+        if defer_indexes:
+            print("Rebuilding crime indexes...")
+            ensure_indexes(connection)
+        connection.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/sec)")
+    return total, elapsed
+
 if __name__ == "__main__":
     from backend.app.services.database import init_db
-    print("Initializing database...")
-    init_db()
-    print("Generating sample crime data...")
-    sample_data = generate_sample_data(200)
-    print("Inserting data into MySQL...")
-    insert_to_mysql(sample_data)
+
+    parser = argparse.ArgumentParser(description="Load crime data into the SQLite database.")
+    parser.add_argument('--source', help="CSV or Parquet file to bulk load")
+    parser.add_argument('--generate', type=int, metavar='N', help="bulk load N synthetic crimes")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--reset', action='store_true', help="drop and recreate the tables first")
+    parser.add_argument('--no-defer-indexes', action='store_true', help="keep indexes in place while loading")
+    args = parser.parse_args()
+
+    if args.source or args.generate:
+        if args.reset:
+            init_db()
+        if args.source:
+            frames = read_source(args.source, args.chunk_size)
+        else:
+            id_offset = 0
+            connection = get_db_connection()
+            if connection:
+                # Keep synthetic crime_ids clear of rows already in the table
+                id_offset = connection.execute("SELECT COALESCE(MAX(id), 0) FROM crimes").fetchone()[0]
+                connection.close()
+            frames = iter_sample_frames(args.generate, args.chunk_size, id_offset)
+        bulk_load(frames, defer_indexes=not args.no_defer_indexes)
+    else:
+        print("Initializing database...")
+        init_db()
+        print("Generating sample crime data...")
+        sample_data = generate_sample_data(200)
+        print("Inserting data into MySQL...")
+        insert_to_mysql(sample_data)
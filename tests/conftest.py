@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The services read these at import time, so set them before any test imports one
+_scratch = tempfile.mkdtemp(prefix='crime-tests-')
+os.environ['SQLITE_DB_PATH'] = os.path.join(_scratch, 'test.db')
+os.environ['COLUMN_STORE_SNAPSHOT'] = ''
+os.environ['RESPONSE_CACHE_BACKEND'] = 'off'
+sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture
+def fresh_db(monkeypatch):
+    """An empty, freshly initialized database (init_db reads schema.sql from the repo root)."""
+    from backend.app.services import database
+
+    monkeypatch.chdir(REPO_ROOT)
+    database.init_db()
+    return database
+
+
+@pytest.fixture
+def client(fresh_db):
+    """Flask test client over the fresh database."""
+    from app import app
+
+    return app.test_client()
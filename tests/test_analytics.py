@@ -0,0 +1,75 @@
+import pytest
+
+from backend.app.services import analytics
+from backend.app.services.analytics import TIME_BUCKETS, crime_summary, time_bucket
+from backend.app.services.column_store import crime_store
+from backend.app.services.rollups import rebuild_rollups
+from scripts.load_data import bulk_load, iter_sample_frames
+
+
+def expected_summary(connection):
+    """The summary recomputed with plain queries over crimes."""
+    total = connection.execute("SELECT COUNT(*) FROM crimes").fetchone()[0]
+    open_cases = connection.execute("SELECT COUNT(*) FROM crimes WHERE arrested = 0").fetchone()[0]
+    locations = dict(connection.execute(
+        "SELECT location_description, COUNT(*) FROM crimes GROUP BY 1").fetchall())
+    types = {crime_type: round(count / total * 100) for crime_type, count in connection.execute(
+        "SELECT crime_type, COUNT(*) FROM crimes GROUP BY 1")}
+    times = dict.fromkeys(TIME_BUCKETS, 0)
+    for hour, count in connection.execute(
+            "SELECT CAST(strftime('%H', occurrence_date) AS INTEGER), COUNT(*) FROM crimes "
+            "WHERE occurrence_date IS NOT NULL GROUP BY 1"):
+        times[time_bucket(hour)] += count
+    return total, open_cases, locations, types, {k: round(v / total * 100) for k, v in times.items()}
+
+
+@pytest.mark.parametrize('source', ['rollups', 'columns'])
+def test_summary_matches_the_table(fresh_db, monkeypatch, source):
+    bulk_load(iter_sample_frames(800, seed=8), defer_indexes=False)
+    with fresh_db.db_connection() as connection:
+        connection.execute("UPDATE crimes SET arrested = 1 WHERE id % 3 = 0")
+        connection.commit()
+        # A direct UPDATE bypasses the incremental rollups
+        rebuild_rollups(connection)
+    crime_store.sync()
+    if source == 'columns':
+        monkeypatch.setattr(analytics, '_has_rollups', lambda connection: False)
+
+    with fresh_db.db_connection() as connection:
+        total, open_cases, locations, types, times = expected_summary(connection)
+        summary = crime_summary(connection, top_locations=3)
+
+    assert summary["total_crimes"] == total == 800
+    assert 0 < summary["open_cases"] == open_cases < total
+    top = summary["top_locations"]
+    assert [spot["count"] for spot in top] == sorted(locations.values(), reverse=True)[:3]
+    assert all(locations[spot["area"]] == spot["count"] for spot in top)
+    assert {row["type"]: row["percentage"] for row in summary["type_distribution"]} == types
+    assert {row["time"]: row["percentage"] for row in summary["time_patterns"]} == times
+
+
+def test_admin_analysis_reports_the_summary(client, fresh_db):
+    assert client.get('/api/admin/analysis').get_json()["total_crimes"] == 0
+    bulk_load(iter_sample_frames(300, seed=9), defer_indexes=False)
+    crime_store.sync()
+    with fresh_db.db_connection() as connection:
+        total, open_cases, locations, _, _ = expected_summary(connection)
+
+    body = client.get('/api/admin/analysis').get_json()
+    assert (body["total_crimes"], body["open_cases"]) == (total, open_cases)
+    assert body["hotspot_count"] == 1
+    assert str(max(locations.values())) in body["latest_analysis"]["text"]
+
+
+def test_summary_endpoint_follows_new_crimes(client, fresh_db):
+    bulk_load(iter_sample_frames(300, seed=10), defer_indexes=False)
+    crime_store.sync()
+    with fresh_db.db_connection() as connection:
+        expected = crime_summary(connection)
+    assert client.get('/api/analytics/summary').get_json() == expected
+
+    crime = {"type": 'THEFT', "description": 'test', "date": '2026-01-01 12:00:00',
+             "lat": 28.61, "lng": 77.21, "location": 'STREET'}
+    assert client.post('/api/crimes/submit', json=crime).status_code == 201
+    body = client.get('/api/analytics/summary').get_json()
+    assert (body["total_crimes"], body["open_cases"]) == (expected["total_crimes"] + 1, expected["open_cases"] + 1)
@@ -0,0 +1,161 @@
+import json
+
+from backend.app.services.column_store import crime_store
+from backend.app.services.news_feed import NewsFeedCache
+from scripts.load_data import bulk_load, iter_sample_frames
+
+CRIME = {"type": 'THEFT', "description": 'test', "date": '2026-01-01 12:00:00',
+         "lat": 28.61, "lng": 77.21, "location": 'STREET'}
+
+
+def test_submit_rejects_non_numeric_coordinates(client):
+    response = client.post('/api/crimes/submit', json={**CRIME, "lat": 'abc'})
+    assert response.status_code == 400
+    assert response.get_json()["status"] == 'error'
+
+    response = client.post('/api/crimes/submit', json={**CRIME, "lng": 500})
+    assert response.status_code == 400
+
+
+def test_submit_rejects_missing_fields_without_writing(client):
+    for name in ('type', 'description', 'date', 'location'):
+        body = {key: value for key, value in CRIME.items() if key != name}
+        response = client.post('/api/crimes/submit', json=body)
+        assert response.status_code == 400, name
+        assert name in response.get_json()["message"]
+
+    for bad in ({"type": ''}, {"type": 5}, {"date": 'yesterday'}):
+        response = client.post('/api/crimes/submit', json={**CRIME, **bad})
+        assert response.status_code == 400, bad
+
+    assert client.get('/api/admin/analysis').get_json()["total_crimes"] == 0
+
+
+def test_submit_then_analytics(client):
+    assert client.post('/api/crimes/submit', json=CRIME).status_code == 201
+    assert client.post('/api/crimes/submit', json={**CRIME, "lat": '28.62'}).status_code == 201
+    assert client.get('/api/admin/detailed-analysis').status_code == 200
+    assert client.get('/api/map/clusters?zoom=5').status_code == 200
+
+
+def test_malformed_cursor_is_a_bad_request(client):
+    # null, 7, a three-item list and a bare string
+    for cursor in ('bnVsbA', 'Nw', 'WzEsMiwzXQ', 'ImFiIg', 'not-base64!'):
+        response = client.get(f'/api/crimes?cursor={cursor}')
+        assert response.status_code == 400, cursor
+
+    for _ in range(2):
+        assert client.post('/api/crimes/submit', json=CRIME).status_code == 201
+    page = client.get('/api/crimes?limit=1').get_json()
+    assert client.get(f"/api/crimes?limit=1&cursor={page['next_cursor']}").status_code == 200
+
+
+def test_map_clusters_need_a_bounded_view(client):
+    assert client.post('/api/crimes/submit', json=CRIME).status_code == 201
+    assert client.get('/api/map/clusters?zoom=5').status_code == 200
+
+    response = client.get('/api/map/clusters?zoom=14')
+    assert response.status_code == 400
+    assert 'bbox is required' in response.get_json()["message"]
+
+    response = client.get('/api/map/clusters?zoom=14&bbox=-180,-85,180,85')
+    assert response.status_code == 400
+    assert 'too large' in response.get_json()["message"]
+
+    response = client.get('/api/map/clusters?zoom=14&bbox=77.19,28.59,77.23,28.63')
+    assert response.status_code == 200
+    assert response.get_json()["level"] == 16
+
+
+def test_non_finite_bbox_is_rejected(client):
+    for bbox in ('nan,nan,nan,nan', '-inf,28,inf,29', '77,28,77.5,nan'):
+        for path in (f'/api/crimes/bbox?bbox={bbox}', f'/api/map/clusters?zoom=12&bbox={bbox}'):
+            response = client.get(path)
+            assert response.status_code == 400, path
+            assert response.get_json()["message"] == "bbox must be min_lng,min_lat,max_lng,max_lat"
+
+
+def test_export_streams_every_matching_row(client, fresh_db):
+    # More rows than EXPORT_BATCH_SIZE, so the stream spans several batches
+    bulk_load(iter_sample_frames(2500, seed=2), defer_indexes=False)
+    with fresh_db.db_connection() as connection:
+        expected = [row[0] for row in connection.execute(
+            "SELECT crime_id FROM crimes ORDER BY occurrence_date DESC, id DESC")]
+        thefts = [row[0] for row in connection.execute(
+            "SELECT crime_id FROM crimes WHERE crime_type = 'THEFT' ORDER BY occurrence_date DESC, id DESC")]
+
+    response = client.get('/api/crimes/export?format=ndjson&fields=crime_id,latitude')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["crime_id"] for line in lines] == expected
+    assert set(json.loads(lines[0])) == {"crime_id", "latitude"}
+
+    response = client.get('/api/crimes/export?format=json&fields=crime_id&type=THEFT')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert [row["crime_id"] for row in json.loads(response.get_data())] == thefts
+    assert 0 < len(thefts) < len(expected)
+
+    assert client.get('/api/crimes/export?format=csv').status_code == 400
+    assert client.get('/api/crimes/export?fields=password').status_code == 400
+
+
+def test_empty_export_is_valid_json(client):
+    response = client.get('/api/crimes/export?format=json')
+    assert json.loads(response.get_data()) == []
+    assert client.get('/api/crimes/export').get_data() == b''
+
+
+def test_grid_hotspots_endpoint(client):
+    bulk_load(iter_sample_frames(500, seed=6), defer_indexes=False)
+    crime_store.sync()
+
+    body = client.get('/api/hotspots?engine=grid&top=3&cell=0.02').get_json()
+    assert body["engine"] == 'grid' and body["cell_size"] == 0.02
+    assert len(body["hotspots"]) == 3
+    densities = [spot["density"] for spot in body["hotspots"]]
+    assert densities == sorted(densities, reverse=True)
+
+    for query in ('top=0', 'top=101', 'top=x', 'cell=0', 'cell=5'):
+        assert client.get(f'/api/hotspots?engine=grid&{query}').status_code == 400, query
+    assert client.get('/api/hotspots?engine=dbscan').status_code == 400
+
+
+class CountingSource:
+    label = "Stub feed"
+
+    def __init__(self):
+        self.fetched = []
+
+    def fetch(self, area):
+        self.fetched.append(area)
+        if area == 'Nowhere':
+            raise TimeoutError('feed timed out')
+        return ['Theft reported downtown']
+
+
+def test_safety_batch_isolates_failures_and_reuses_the_cache(client, monkeypatch):
+    source = CountingSource()
+    monkeypatch.setattr('app.news_feed', NewsFeedCache(source=source))
+    areas = ['delhi', ' Delhi ', 'Nowhere', 'Mumbai', '  ']
+
+    response = client.post('/api/predict/safety/batch', json={"areas": areas})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    # Normalized, de-duplicated and in the caller's order
+    assert [r["area"] for r in results] == ['Delhi', 'Nowhere', 'Mumbai']
+    by_area = {r["area"]: r for r in results}
+    assert "Stub feed" in by_area['Delhi']["source"]
+    assert by_area['Nowhere']["source"] == "Offline estimate"
+    assert sorted(source.fetched) == ['Delhi', 'Mumbai', 'Nowhere']
+
+    # A bare list works too, and cached areas are not fetched again
+    response = client.post('/api/predict/safety/batch', json=['Mumbai', 'Delhi'])
+    assert [r["area"] for r in response.get_json()["results"]] == ['Mumbai', 'Delhi']
+    assert len(source.fetched) == 3
+    assert client.get('/api/predict/safety?area=delhi').get_json() == by_area['Delhi']
+    assert len(source.fetched) == 3
+
+    for body in ({}, {"areas": []}, {"areas": ['Delhi', 5]}, {"areas": ['x'] * 101}):
+        assert client.post('/api/predict/safety/batch', json=body).status_code == 400, body
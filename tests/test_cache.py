@@ -0,0 +1,70 @@
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from backend.app.services import cache
+from backend.app.services.cache import DiskCache, LRUCache, cached_response
+from scripts.load_data import bulk_load, iter_sample_frames
+
+CRIME = {"type": 'THEFT', "description": 'test', "date": '2026-01-01 12:00:00',
+         "lat": 28.61, "lng": 77.21, "location": 'STREET'}
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def cached_client(request, client, monkeypatch, tmp_path):
+    backend = LRUCache() if request.param == 'memory' else DiskCache(str(tmp_path / 'responses'))
+    monkeypatch.setattr(cache, 'response_cache', backend)
+    return client
+
+
+def test_hit_and_304(cached_client):
+    first = cached_client.get('/api/crimes?limit=5')
+    assert first.status_code == 200 and first.headers['ETag']
+    again = cached_client.get('/api/crimes?limit=5')
+    assert again.get_data() == first.get_data()
+    assert again.headers['ETag'] == first.headers['ETag']
+
+    response = cached_client.get('/api/crimes?limit=5', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_submit_invalidates(cached_client):
+    before = cached_client.get('/api/crimes?limit=5').get_json()['count']
+    assert cached_client.post('/api/crimes/submit', json=CRIME).status_code == 201
+    assert cached_client.get('/api/crimes?limit=5').get_json()['count'] == min(before + 1, 5)
+
+
+def test_write_from_another_process_invalidates(cached_client):
+    # bulk_load does not touch this process's data version, like a loader or another worker
+    before = cached_client.get('/api/crimes?limit=1000').get_json()['count']
+    bulk_load(iter_sample_frames(20, seed=9), defer_indexes=False)
+    assert cached_client.get('/api/crimes?limit=1000').get_json()['count'] == before + 20
+
+
+def test_disk_entries_are_shared_and_expire(tmp_path):
+    worker_a = DiskCache(str(tmp_path), ttl=0.2)
+    worker_b = DiskCache(str(tmp_path), ttl=0.2)
+    worker_a.set(('/api/x', (), (1, 5), None), (b'body', 'application/json', 'etag'))
+    assert worker_b.get(('/api/x', (), (1, 5), None)) == (b'body', 'application/json', 'etag')
+    assert worker_b.get(('/api/x', (), (1, 6), None)) is None
+    time.sleep(0.3)
+    assert worker_b.get(('/api/x', (), (1, 5), None)) is None
+
+
+def test_model_stamp_is_part_of_the_key(fresh_db, monkeypatch):
+    monkeypatch.setattr(cache, 'response_cache', LRUCache())
+    model = {"version": 1}
+    app = Flask(__name__)
+
+    @app.route('/model')
+    @cached_response(stamp=lambda: model["version"])
+    def view():
+        return jsonify(model)
+
+    client = app.test_client()
+    assert client.get('/model').get_json() == {"version": 1}
+    # A refit published without any new crimes
+    model["version"] = 2
+    assert client.get('/model').get_json() == {"version": 2}
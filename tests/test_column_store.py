@@ -0,0 +1,47 @@
+import numpy as np
+
+from backend.app.services.column_store import ColumnStore
+from scripts.load_data import bulk_load, iter_sample_frames
+
+
+def reset_and_seed(database, seed):
+    database.init_db()
+    bulk_load(iter_sample_frames(50, seed=seed), defer_indexes=False)
+    with database.db_connection() as connection:
+        return [row[0] for row in connection.execute("SELECT latitude FROM crimes ORDER BY id")]
+
+
+def test_store_reloads_after_reset_with_same_ids(fresh_db):
+    store = ColumnStore(snapshot_path=None)
+    for seed in (1, 2, 3):
+        lat = reset_and_seed(fresh_db, seed)
+        # Force a sync as the periodic check would, without waiting for it
+        store._checked_at = 0.0
+        columns = store.columns()
+        assert len(columns) == 50 and int(columns.id[-1]) == 50
+        np.testing.assert_array_equal(columns.lat, lat)
+
+
+def test_non_numeric_coordinates_read_as_nan(fresh_db):
+    bulk_load(iter_sample_frames(5, seed=1), defer_indexes=False)
+    with fresh_db.db_connection() as connection:
+        connection.execute("UPDATE crimes SET latitude = 'abc' WHERE id = 2")
+        connection.commit()
+
+    columns = ColumnStore(snapshot_path=None).columns()
+    assert len(columns) == 5
+    assert np.isnan(columns.lat[1]) and not columns.located()[1]
+    assert columns.located().sum() == 4
+
+
+def test_snapshot_from_before_a_reset_is_not_mapped(fresh_db, tmp_path):
+    from backend.app.services.column_store import write_snapshot
+
+    reset_and_seed(fresh_db, 1)
+    path = str(tmp_path / 'columns')
+    write_snapshot(ColumnStore(snapshot_path=None).columns(), path)
+    assert ColumnStore(snapshot_path=path).columns().generation == ColumnStore(snapshot_path=None).columns().generation
+
+    lat = reset_and_seed(fresh_db, 2)
+    columns = ColumnStore(snapshot_path=path).columns()
+    np.testing.assert_array_equal(columns.lat, lat)
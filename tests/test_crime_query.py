@@ -0,0 +1,26 @@
+import numpy as np
+
+from backend.app.services import crime_query
+from scripts.load_data import bulk_load, iter_sample_frames
+
+
+def test_near_matches_a_full_scan(fresh_db):
+    bulk_load(iter_sample_frames(3000, seed=5), defer_indexes=False)
+    with fresh_db.db_connection() as connection:
+        rows = connection.execute("SELECT id, latitude, longitude FROM crimes WHERE latitude IS NOT NULL").fetchall()
+        ids = np.array([r[0] for r in rows])
+        lat, lng = np.array([r[1] for r in rows]), np.array([r[2] for r in rows])
+
+        for (point_lat, point_lng), radius_km, limit in [((lat[0], lng[0]), 2, 10), ((28.61, 77.21), 50, 25)]:
+            distances = crime_query.haversine_km(point_lat, point_lng, lat, lng)
+            inside = np.flatnonzero(distances <= radius_km)
+            expected = ids[inside[np.argsort(distances[inside], kind='stable')][:limit]]
+
+            found = crime_query.fetch_crimes_near(connection, point_lat, point_lng, radius_km, fields=['id'], limit=limit)
+            assert len(found) == min(limit, len(inside))
+            assert [row['distance_km'] for row in found] == sorted(row['distance_km'] for row in found)
+            # Ties may come back in either order, so compare the distances
+            assert np.allclose([row['distance_km'] for row in found],
+                               np.round(np.sort(distances[inside])[:limit], 3))
+            assert set(row['id'] for row in found) <= set(ids[inside])
+            assert len(expected) == len(found)
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from backend.app.models import emergence
+from backend.app.models.emergence import EmergenceDetector, epoch_day
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable date.today() for the emergence module."""
+    class FakeDate(date):
+        current = date(2026, 3, 1)
+
+        @classmethod
+        def today(cls):
+            return cls.current
+
+    monkeypatch.setattr(emergence, 'date', FakeDate)
+    return FakeDate
+
+
+def windows(detector):
+    # Cell key -> (recent, baseline), leaving out cells that have emptied
+    return {
+        int(key): (int(recent), int(baseline))
+        for key, recent, baseline in zip(detector.keys, detector.recent, detector.baseline)
+        if recent or baseline
+    }
+
+
+def sample(start, days, n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = 28.6 + rng.integers(0, 6, n) * 0.01 + 0.001
+    lng = 77.2 + rng.integers(0, 6, n) * 0.01 + 0.001
+    occurred = [start + timedelta(days=int(d)) for d in np.sort(rng.integers(0, days, n))]
+    return lat, lng, occurred
+
+
+def fresh_fit(lat, lng, occurred):
+    days = np.array([epoch_day(d) for d in occurred], dtype=np.int64)
+    return EmergenceDetector(recent_days=7, baseline_days=30).fit(lat, lng, days)
+
+
+@pytest.mark.parametrize('final_gap', [0, 5, 60])
+def test_adding_day_by_day_matches_a_fresh_fit(clock, final_gap):
+    start = clock.current
+    lat, lng, occurred = sample(start, 80)
+    detector = EmergenceDetector(recent_days=7, baseline_days=30)
+    detector.fit(np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64))
+
+    # Each crime arrives on its own day, so add() keeps rolling the windows over
+    for i in range(len(occurred)):
+        clock.current = occurred[i]
+        detector.add(lat[i], lng[i], occurred[i].isoformat())
+
+    # Then some quiet days (past the whole window for the last case)
+    clock.current = occurred[-1] + timedelta(days=final_gap)
+    detector.emerging()
+    assert detector.today == epoch_day(clock.current)
+
+    expected = fresh_fit(lat, lng, occurred)
+    assert windows(detector) == windows(expected)
+    # Only a gap longer than the whole window leaves nothing to compare
+    assert bool(windows(expected)) == (final_gap < 37)
+
+
+def test_add_after_fit_matches_fitting_everything(clock):
+    clock.current = date(2026, 3, 20)
+    lat, lng, occurred = sample(date(2026, 1, 1), 90, seed=1)
+    past = np.array([d <= clock.current for d in occurred])
+    occurred_past = [d for d, p in zip(occurred, past) if p]
+
+    detector = fresh_fit(lat[past], lng[past], occurred_past)
+    for i in np.flatnonzero(~past):
+        # Dated after today when they arrive: ignored until the clock catches up
+        detector.add(lat[i], lng[i], occurred[i])
+    assert windows(detector) == windows(fresh_fit(lat[past], lng[past], occurred_past))
+
+    for i in np.flatnonzero(~past):
+        clock.current = occurred[i]
+        detector.add(lat[i], lng[i], occurred[i])
+    assert windows(detector) == windows(fresh_fit(lat, lng, occurred))
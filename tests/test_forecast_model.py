@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.app.models.forecast_model import ALL, MIN_EVENTS, build_series
+
+
+def test_series_keys_are_upper_cased():
+    days = pd.date_range(end=pd.Timestamp.now().floor('D') - pd.Timedelta(days=1), periods=MIN_EVENTS, freq='D')
+    events = pd.DataFrame({
+        'occurrence_date': np.repeat(days.values, 2),
+        'area': ['Delhi', ' DELHI '] * len(days),
+        'type': ['Theft', 'THEFT'] * len(days),
+    })
+    keys, counts, _ = build_series(events, 'D')
+    assert ('DELHI', 'THEFT') in keys
+    assert ('Delhi', 'Theft') not in keys
+    assert counts[keys.index(('DELHI', 'THEFT'))].sum() == 2 * len(days)
+    assert {('DELHI', ALL), (ALL, 'THEFT'), (ALL, ALL)} <= set(keys)
+
+
+def test_saved_model_round_trips(fresh_db, tmp_path, monkeypatch):
+    from backend.app.models.forecast_model import ForecastModel
+    from backend.app.services.column_store import crime_store
+    from scripts.load_data import bulk_load, iter_sample_frames
+
+    bulk_load(iter_sample_frames(3000, seed=4), defer_indexes=False)
+    crime_store._checked_at = 0.0
+    monkeypatch.chdir(tmp_path)
+    model = ForecastModel('D')
+    assert model.train_from_db() is not None
+    assert [name for name in os.listdir('models')] == ['forecast_D.joblib']
+
+    loaded = ForecastModel('D')
+    loaded.load()
+    assert loaded.fingerprint == model.fingerprint
+    assert loaded.forecast(horizon=3) == model.forecast(horizon=3)
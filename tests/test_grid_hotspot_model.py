@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+from backend.app.models.grid_hotspot_model import GridHotspotModel
+
+
+def brute_force_density(lat, lng, cell_size, bandwidth):
+    # Count per (row, col) cell, then sum Gaussian-weighted neighbour counts
+    counts = {}
+    for y, x in zip(lat, lng):
+        cell = (math.floor((y + 90) / cell_size), math.floor((x + 180) / cell_size))
+        counts[cell] = counts.get(cell, 0) + 1
+    sigma = max(bandwidth, 1) / 2
+    density = {}
+    for (row, col) in counts:
+        density[(row, col)] = sum(
+            math.exp(-(dr * dr + dc * dc) / (2 * sigma * sigma)) * counts.get((row + dr, col + dc), 0)
+            for dr in range(-bandwidth, bandwidth + 1)
+            for dc in range(-bandwidth, bandwidth + 1)
+        )
+    return counts, density
+
+
+def test_kernel_density_matches_brute_force():
+    rng = np.random.default_rng(3)
+    lat = np.concatenate([rng.normal(28.61, 0.01, 300), rng.uniform(28.4, 28.9, 200)])
+    lng = np.concatenate([rng.normal(77.21, 0.01, 300), rng.uniform(77.0, 77.4, 200)])
+
+    for cell_size, bandwidth in [(0.01, 1), (0.005, 2), (0.05, 0)]:
+        model = GridHotspotModel(cell_size=cell_size, bandwidth=bandwidth).fit(lat, lng)
+        counts, density = brute_force_density(lat, lng, cell_size, bandwidth)
+
+        rows, cols = np.divmod(model.keys, model.n_cols)
+        cells = list(zip(rows.tolist(), cols.tolist()))
+        assert sorted(cells) == sorted(counts)
+        assert model.counts.tolist() == [counts[cell] for cell in cells]
+        assert np.allclose(model.density, [density[cell] for cell in cells])
+
+
+def test_top_returns_the_densest_cells_first():
+    rng = np.random.default_rng(4)
+    lat = rng.normal(28.61, 0.03, 2000)
+    lng = rng.normal(77.21, 0.03, 2000)
+    model = GridHotspotModel(cell_size=0.01).fit(lat, lng)
+
+    top = model.top(5)
+    assert len(top) == 5
+    assert [spot["density"] for spot in top] == sorted((spot["density"] for spot in top), reverse=True)
+    assert top[0]["density"] == round(float(model.density.max()), 3)
+    # Each centre lies in a cell holding the reported count
+    for spot in top:
+        key = model.cell_keys(spot["lat"], spot["lng"])
+        assert model.counts[np.searchsorted(model.keys, key)] == spot["count"]
+
+    assert len(model.top(10 ** 6)) == len(model.keys)
+    assert GridHotspotModel().fit(np.zeros(0), np.zeros(0)).top(3) == []
@@ -0,0 +1,76 @@
+import os
+
+import joblib
+import pytest
+
+from backend.app.models.hotspot_model import HotspotModel, write_atomic
+from backend.app.services.column_store import crime_store
+from scripts.load_data import bulk_load, iter_sample_frames
+
+
+def test_failed_write_leaves_the_old_file(tmp_path):
+    path = str(tmp_path / 'model.joblib')
+    write_atomic(path, lambda f: f.write(b'old'))
+
+    def fail(f):
+        f.write(b'half')
+        raise RuntimeError('disk full')
+
+    with pytest.raises(RuntimeError):
+        write_atomic(path, fail)
+    with open(path, 'rb') as f:
+        assert f.read() == b'old'
+    assert os.listdir(tmp_path) == ['model.joblib']
+
+
+def test_checkpoint_carries_the_model(fresh_db, tmp_path, monkeypatch):
+    bulk_load(iter_sample_frames(200, seed=1), defer_indexes=False)
+    crime_store._checked_at = 0.0
+    monkeypatch.chdir(tmp_path)
+
+    model = HotspotModel(n_clusters=3)
+    centers = model.train_from_db()
+    state = joblib.load(model.state_path)
+    assert (state["model"].cluster_centers_ == centers).all()
+
+    more = (frame.assign(crime_id=frame['crime_id'].astype(str) + '-b') for frame in iter_sample_frames(50, seed=2))
+    bulk_load(more, defer_indexes=False)
+    crime_store._checked_at = 0.0
+    updated = HotspotModel(n_clusters=3).train_incremental()
+    state = joblib.load(model.state_path)
+    assert state["rows"] == 250
+    assert (state["model"].cluster_centers_ == updated).all()
+    assert (joblib.load(model.model_path).cluster_centers_ == updated).all()
+
+
+def test_checkpoint_from_another_worker_is_caught_up(fresh_db, tmp_path, monkeypatch, capsys):
+    from backend.app.models import hotspot_model
+    from backend.app.services.column_store import ColumnStore
+
+    def load_more(n, tag):
+        bulk_load((frame.assign(crime_id=frame['crime_id'].astype(str) + tag)
+                   for frame in iter_sample_frames(n, seed=len(tag))), defer_indexes=False)
+
+    bulk_load(iter_sample_frames(200, seed=1), defer_indexes=False)
+    monkeypatch.chdir(tmp_path)
+    # Two workers, each with its own store
+    worker_a, worker_b = ColumnStore(snapshot_path=None), ColumnStore(snapshot_path=None)
+    worker_a.columns()
+    worker_b.columns()
+
+    monkeypatch.setattr(hotspot_model, 'crime_store', worker_a)
+    HotspotModel(n_clusters=3).train_from_db()
+    load_more(50, '-a')
+    worker_a.sync()
+    HotspotModel(n_clusters=3).train_incremental()
+    assert joblib.load('models/hotspot_model.state.joblib')["rows"] == 250
+
+    # Worker B has not looked at the table since 200 rows
+    load_more(30, '-bb')
+    monkeypatch.setattr(hotspot_model, 'crime_store', worker_b)
+    capsys.readouterr()
+    HotspotModel(n_clusters=3).train_incremental()
+    out = capsys.readouterr().out
+    assert 'full refit' not in out
+    assert 'updated with 30 new records' in out
+    assert joblib.load('models/hotspot_model.state.joblib')["rows"] == 280
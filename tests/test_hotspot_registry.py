@@ -0,0 +1,71 @@
+import threading
+import time
+
+from backend.app.models.hotspot_registry import RefreshingRegistry
+from backend.app.services.database import bump_data_version
+
+
+class CountingRegistry(RefreshingRegistry):
+    def __init__(self, fail=False):
+        super().__init__('counter', interval=3600)
+        self.fits = 0
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def _fit(self):
+        self.release.wait(5)
+        self.fits += 1
+        if self.fits > 1 and self.fail:
+            raise RuntimeError('boom')
+        return self.fits
+
+
+def wait_for_refresh(registry):
+    deadline = time.monotonic() + 5
+    while registry._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_refits_in_background_after_a_write():
+    registry = CountingRegistry()
+    assert registry.get() == 1
+    assert registry.get() == 1
+
+    bump_data_version()
+    registry.release.clear()
+    # The current model answers while the refit runs
+    assert registry.get() == 1
+    assert registry.get() == 1
+    registry.release.set()
+    wait_for_refresh(registry)
+    assert registry.get() == 2
+    assert registry.fits == 2
+
+
+def test_failed_refresh_keeps_serving_the_current_model(capsys):
+    registry = CountingRegistry(fail=True)
+    assert registry.get() == 1
+    bump_data_version()
+    registry.get()
+    wait_for_refresh(registry)
+    assert registry.get() == 1
+    assert 'Error refreshing counter: boom' in capsys.readouterr().out
+
+
+def test_writes_do_not_refit_before_min_interval():
+    registry = CountingRegistry()
+    registry.min_interval = 3600
+    assert registry.get() == 1
+    for _ in range(5):
+        bump_data_version()
+        assert registry.get() == 1
+    assert not registry._refreshing
+    assert registry.fits == 1
+
+    # Once min_interval has passed a write does start one refit
+    registry._checked_at -= 3600
+    bump_data_version()
+    registry.get()
+    wait_for_refresh(registry)
+    assert registry.fits == 2
@@ -0,0 +1,67 @@
+import json
+import math
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+import simplejson
+
+from backend.app.services import json_encoder
+
+NAMES = ['id', 'score', 'label', 'mixed', 'flag', 'note']
+ROWS = [
+    (1, 1.5, 'THEFT', 7, True, None),
+    (2, math.nan, 'Délhi – “quoted” \\ slash', 'seven', False, 'tab\there'),
+    (3, math.inf, None, None, None, '日本語 😀'),
+    (4, -math.inf, 'line\nbreak', 2.25, True, ''),
+    (5, None, '"', -3, False, ' '),
+]
+
+
+def reference(names, rows):
+    """What simplejson makes of the same rows as a list of dicts."""
+    return json.loads(simplejson.dumps([dict(zip(names, row)) for row in rows], ignore_nan=True, default=str))
+
+
+def decoded(fragment):
+    return json.loads(json_encoder.dumps({"rows": fragment, "count": fragment.rows}))
+
+
+@pytest.mark.parametrize('rows', [ROWS, ROWS[:1], []])
+def test_rows_match_simplejson(rows):
+    result = decoded(json_encoder.encode_rows(NAMES, rows))
+    assert result == {"rows": reference(NAMES, rows), "count": len(rows)}
+
+
+def test_sqlite_cursor_matches_simplejson():
+    connection = sqlite3.connect(':memory:')
+    connection.execute("CREATE TABLE t (id INTEGER, score REAL, label TEXT, mixed, flag INTEGER, note TEXT)")
+    connection.executemany("INSERT INTO t VALUES (?, ?, ?, ?, ?, ?)", [r for r in ROWS if r[1] is None or math.isfinite(r[1])])
+    expected = reference(NAMES, connection.execute("SELECT * FROM t").fetchall())
+    assert decoded(json_encoder.encode_cursor(connection.execute("SELECT * FROM t")))["rows"] == expected
+
+    assert decoded(json_encoder.encode_cursor(connection.execute("SELECT * FROM t WHERE id < 0"))) == {"rows": [], "count": 0}
+
+
+def test_frame_matches_records():
+    frame = pd.DataFrame({
+        'count': np.array([1, 2, 3], dtype=np.int64),
+        'share': np.array([0.5, np.nan, np.inf]),
+        'seen': np.array(['2024-01-05T10:00:00', 'NaT', '2024-02-01T00:00:00'], dtype='datetime64[s]'),
+        'name': ['Ünïcode', None, 'x'],
+        'ok': np.array([True, False, True]),
+    })
+    expected = [
+        {"count": 1, "share": 0.5, "seen": '2024-01-05T10:00:00', "name": 'Ünïcode', "ok": True},
+        {"count": 2, "share": None, "seen": None, "name": None, "ok": False},
+        {"count": 3, "share": None, "seen": '2024-02-01T00:00:00', "name": 'x', "ok": True},
+    ]
+    assert decoded(json_encoder.encode_frame(frame))["rows"] == expected
+    assert decoded(json_encoder.encode_frame(frame.iloc[:0]))["rows"] == []
+
+
+def test_output_is_ascii_and_valid():
+    body = json_encoder.dumps({"rows": json_encoder.encode_rows(NAMES, ROWS)})
+    body.decode('ascii')
+    assert 'NaN' not in body.decode() and 'Infinity' not in body.decode()
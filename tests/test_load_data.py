@@ -0,0 +1,28 @@
+import io
+
+import pandas as pd
+
+from scripts.load_data import normalize_frame
+
+CSV = """Primary Type,Date,Arrest,Domestic
+THEFT,2024-01-05 10:00:00,Y,true
+BATTERY,2024-01-06 11:30:00,N,false
+ASSAULT,2024-01-07 09:15:00,yes,FALSE
+ROBBERY,2024-01-08 22:45:00,,True
+"""
+
+
+def test_text_flags_are_parsed():
+    frame = normalize_frame(pd.read_csv(io.StringIO(CSV)))
+    assert frame['arrest'].tolist() == [1, 0, 1, 0]
+    assert frame['domestic'].tolist() == [1, 0, 0, 1]
+
+
+def test_numeric_and_bool_flags_pass_through():
+    frame = normalize_frame(pd.DataFrame({
+        'crime_type': ['THEFT', 'BATTERY', 'ASSAULT'],
+        'arrested': [1.0, 0.0, None],
+        'domestic': [True, False, True],
+    }))
+    assert frame['arrest'].tolist() == [1, 0, 0]
+    assert frame['domestic'].tolist() == [1, 0, 1]
@@ -0,0 +1,69 @@
+import re
+
+from backend.app.services.metrics import MetricsRegistry, Summary, metrics
+
+SAMPLE_LINE = re.compile(r'^([a-z_]+)(\{[^}]*\})? (\S+)$')
+
+
+def parse(text):
+    """{(name, labels): value} for the samples in a Prometheus text exposition."""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        match = SAMPLE_LINE.match(line)
+        assert match, line
+        samples[(match.group(1), match.group(2) or '')] = float(match.group(3))
+    return samples
+
+
+def test_summary_quantiles_cover_the_reservoir():
+    summary = Summary(reservoir=100)
+    for value in range(1, 201):
+        summary.observe(value)
+    assert (summary.count, summary.total) == (200, sum(range(1, 201)))
+    # Only the last 100 observations are kept
+    assert summary.quantiles() == {0.5: 151, 0.95: 196, 0.99: 200}
+    assert Summary().quantiles() == {0.5: 0.0, 0.95: 0.0, 0.99: 0.0}
+
+
+def test_render_is_valid_exposition():
+    registry = MetricsRegistry()
+    registry.observe('section_duration_seconds', 0.25, section='sql', op='say "hi"\n')
+    registry.increment('cache_requests_total', result='hit')
+    registry.increment('cache_requests_total', 2, result='hit')
+    text = registry.render()
+
+    assert '# TYPE crime_api_request_duration_seconds summary' in text
+    assert '# TYPE crime_api_cache_requests_total counter' in text
+    samples = parse(text)
+    labels = '{op="say \\"hi\\"\\n",section="sql"}'
+    assert samples[('crime_api_section_duration_seconds_count', labels)] == 1
+    assert samples[('crime_api_section_duration_seconds_sum', labels)] == 0.25
+    assert samples[('crime_api_section_duration_seconds', labels[:-1] + ',quantile="0.99"}')] == 0.25
+    assert samples[('crime_api_cache_requests_total', '{result="hit"}')] == 3
+
+
+def test_requests_show_up_in_metrics(client):
+    metrics.reset()
+    for _ in range(2):
+        assert client.get('/api/health').status_code == 200
+    assert client.get('/api/crimes?limit=0').status_code == 400
+    export = client.get('/api/crimes/export?format=json').get_data()
+    assert client.get('/api/admin/analysis').status_code == 200
+
+    response = client.get('/api/metrics')
+    assert response.mimetype == 'text/plain'
+    samples = parse(response.get_data(as_text=True))
+
+    health = '{endpoint="/api/health",method="GET",status="200"}'
+    assert samples[('crime_api_request_duration_seconds_count', health)] == 2
+    assert samples[('crime_api_response_bytes_count', health)] == 2
+    assert samples[('crime_api_request_duration_seconds_count',
+                    '{endpoint="/api/crimes",method="GET",status="400"}')] == 1
+    # The streamed export is sized once its last chunk is sent
+    assert samples[('crime_api_response_bytes_sum',
+                    '{endpoint="/api/crimes/export",method="GET",status="200"}')] == len(export)
+    # Sections are tagged with the route they ran under
+    assert samples[('crime_api_section_duration_seconds_count',
+                    '{endpoint="/api/admin/analysis",op="crime_summary",section="sql"}')] == 1
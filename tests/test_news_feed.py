@@ -0,0 +1,82 @@
+import threading
+import time
+
+from backend.app.services.news_feed import FALLBACK_SUMMARY, NewsFeedCache
+
+
+class StubSource:
+    label = "Stub feed"
+
+    def __init__(self, titles=('Theft reported downtown', 'Festival opens')):
+        self.titles = list(titles)
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def fetch(self, area):
+        with self._lock:
+            self.calls += 1
+        self.release.wait(5)
+        return self.titles
+
+
+def test_concurrent_misses_share_one_fetch():
+    source = StubSource()
+    source.release.clear()
+    feed = NewsFeedCache(source=source)
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(feed.get('Delhi', wait=5))) for _ in range(8)]
+    for t in callers:
+        t.start()
+    time.sleep(0.1)
+    source.release.set()
+    for t in callers:
+        t.join()
+
+    assert source.calls == 1
+    assert len(results) == 8
+    assert all(summary == {"news_count": 2, "sentiment_score": 1, "fallback": False} and not stale
+               for summary, stale in results)
+
+
+def test_stale_entry_is_served_while_refreshing():
+    source = StubSource()
+    feed = NewsFeedCache(source=source, ttl=0.05)
+    first, _ = feed.get('Delhi', wait=5)
+    time.sleep(0.1)
+
+    source.titles = ['Robbery', 'Murder', 'Scam']
+    source.release.clear()
+    start = time.monotonic()
+    summary, stale = feed.get('Delhi', wait=5)
+    # Answered from memory without waiting for the fetch it started
+    assert time.monotonic() - start < 0.5
+    assert stale and summary == first
+
+    source.release.set()
+    for _ in range(100):
+        summary, stale = feed.get('Delhi', wait=0)
+        if not stale:
+            break
+        time.sleep(0.01)
+    assert summary["sentiment_score"] == 3 and not stale
+    assert source.calls == 2
+
+
+def test_slow_fetch_falls_back():
+    source = StubSource()
+    source.release.clear()
+    feed = NewsFeedCache(source=source)
+    summary, stale = feed.get('Delhi', wait=0.05)
+    assert summary == FALLBACK_SUMMARY and not stale
+    source.release.set()
+
+
+def test_failed_fetch_falls_back():
+    class BrokenSource:
+        def fetch(self, area):
+            raise TimeoutError('feed timed out')
+
+    summary, _ = NewsFeedCache(source=BrokenSource()).get('Delhi', wait=1)
+    assert summary == FALLBACK_SUMMARY
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from backend.app.services.writer import WriteQueue, WriteTimeout
+
+
+@pytest.fixture
+def table(fresh_db):
+    with fresh_db.db_connection() as connection:
+        connection.execute("CREATE TABLE IF NOT EXISTS writer_test (value INTEGER)")
+        connection.execute("DELETE FROM writer_test")
+        connection.commit()
+
+    def values():
+        with fresh_db.db_connection() as connection:
+            return sorted(row[0] for row in connection.execute("SELECT value FROM writer_test"))
+    return values
+
+
+def insert(value, fail=False):
+    def job(connection):
+        connection.execute("INSERT INTO writer_test (value) VALUES (?)", (value,))
+        if fail:
+            raise ValueError(f"job {value} failed")
+        return value
+    return job
+
+
+def hold_writer(writer):
+    """Occupy the writer until the returned event is set, so later jobs queue up as one batch."""
+    release, started = threading.Event(), threading.Event()
+
+    def blocker(connection):
+        started.set()
+        release.wait(5)
+    future = writer.submit(blocker)
+    started.wait(5)
+    return release, future
+
+
+def test_failing_job_only_rolls_back_itself(table):
+    writer = WriteQueue()
+    release, blocker = hold_writer(writer)
+    futures = [writer.submit(insert(1)), writer.submit(insert(2, fail=True)), writer.submit(insert(3))]
+    release.set()
+    blocker.result(5)
+
+    assert futures[0].result(5) == 1
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    assert futures[2].result(5) == 3
+    assert table() == [1, 3]
+
+
+def test_timed_out_job_is_cancelled(table):
+    writer = WriteQueue()
+    release, blocker = hold_writer(writer)
+    with pytest.raises(WriteTimeout):
+        writer.run(insert(7), timeout=0.05)
+    release.set()
+    blocker.result(5)
+
+    assert writer.run(insert(8)) == 8
+    assert table() == [8]
@@ -0,0 +1,52 @@
+"""
+WSGI entry point for production serving.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py sets preload_app, so this module is imported once in the
+master process: the crime column store is loaded and every model registry is
+loaded or fitted here, before the workers fork. Workers then start warm and
+share those arrays copy-on-write instead of each building its own.
+app.py itself leaves scikit-learn, SciPy, pandas and joblib to the code that
+uses them; the warm-up is what imports them here, once, before the fork.
+SERVER_WARM_UP=0 skips the model step (the column store still loads).
+"""
+import os
+import time
+
+from app import app
+from backend.app.models import grid_hotspot_model
+from backend.app.models.cluster_pyramid import cluster_registry
+from backend.app.models.emergence import emergence_registry
+from backend.app.models.forecast_model import FREQUENCIES, forecast_registry
+from backend.app.models.hotspot_registry import grid_registry, hotspot_registry
+from backend.app.models.risk_model import risk_registry
+
+SERVER_WARM_UP = os.getenv('SERVER_WARM_UP', '1') != '0'
+
+
+def warm_up():
+    """
+    Build every registry in-line, as the first request of each kind would.
+    Nothing is left running on a background thread: threads do not survive
+    the fork, and a refresh cut off half-way would never finish in a worker.
+    """
+    steps = [
+        ('hotspots', hotspot_registry.preload),
+        ('grid hotspots', lambda: grid_registry.get_hotspots(10, grid_hotspot_model.DEFAULT_CELL_SIZE)),
+        ('risk model', risk_registry.get_model),
+        ('map clusters', cluster_registry.get_pyramid),
+        ('emerging hotspots', emergence_registry.get_detector),
+    ] + [(f'forecast ({freq})', lambda freq=freq: forecast_registry.get_model(freq)) for freq in FREQUENCIES]
+
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            print(f"Warmed up {name} in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"Error warming up {name}: {e}")
+
+
+if SERVER_WARM_UP:
+    warm_up()